@@ -13,9 +13,26 @@ from src.tools.api import (
     get_market_cap,
     search_line_items,
 )
+from src.tools.prefetch import prefetch_line_items
 from src.utils.llm import call_llm
 from src.utils.progress import progress
 
+# Financial line items requested per ticker (also used to prefetch backtest data)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "free_cash_flow",
+        "ebit",
+        "interest_expense",
+        "capital_expenditure",
+        "depreciation_and_amortization",
+        "outstanding_shares",
+        "net_income",
+        "total_debt",
+    ],
+    "period": "ttm",
+    "limit": 10,
+}
+
 
 class AswathDamodaranSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -39,26 +56,16 @@ def aswath_damodaran_agent(state: AgentState):
     analysis_data: dict[str, dict] = {}
     damodaran_signals: dict[str, dict] = {}
 
+    # Fetch every ticker's line items in a few batched requests; the per-ticker lookups below are then cache hits
+    prefetch_line_items(tickers, end_date, [LINE_ITEM_REQUEST])
+
     for ticker in tickers:
         # ─── Fetch core data ────────────────────────────────────────────────────
         progress.update_status("aswath_damodaran_agent", ticker, "Fetching financial metrics")
         metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
 
         progress.update_status("aswath_damodaran_agent", ticker, "Fetching financial line items")
-        line_items = search_line_items(
-            ticker,
-            [
-                "free_cash_flow",
-                "ebit",
-                "interest_expense",
-                "capital_expenditure",
-                "depreciation_and_amortization",
-                "outstanding_shares",
-                "net_income",
-                "total_debt",
-            ],
-            end_date,
-        )
+        line_items = search_line_items(ticker, end_date=end_date, **LINE_ITEM_REQUEST)
 
         progress.update_status("aswath_damodaran_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
@@ -1,6 +1,7 @@
 from langchain_openai import ChatOpenAI
 from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
+from src.tools.prefetch import prefetch_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
@@ -9,6 +10,24 @@ from typing_extensions import Literal
 from src.utils.progress import progress
 from src.utils.llm import call_llm
 
+# Financial line items requested per ticker (also used to prefetch backtest data)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "revenue",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+        # Optional: intangible_assets if available
+        # "intangible_assets"
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
 
 class BillAckmanSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -29,30 +48,16 @@ def bill_ackman_agent(state: AgentState):
     analysis_data = {}
     ackman_analysis = {}
     
+    # Fetch every ticker's line items in a few batched requests; the per-ticker lookups below are then cache hits
+    prefetch_line_items(tickers, end_date, [LINE_ITEM_REQUEST])
+
     for ticker in tickers:
         progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
         metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
         
         progress.update_status("bill_ackman_agent", ticker, "Gathering financial line items")
         # Request multiple periods of data (annual or TTM) for a more robust long-term view.
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares",
-                # Optional: intangible_assets if available
-                # "intangible_assets"
-            ],
-            end_date,
-            period="annual",
-            limit=5
-        )
+        financial_line_items = search_line_items(ticker, end_date=end_date, **LINE_ITEM_REQUEST)
         
         progress.update_status("bill_ackman_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
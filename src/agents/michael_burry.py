@@ -16,19 +16,37 @@ from src.tools.api import (
     get_market_cap,
     search_line_items,
 )
+from src.tools.prefetch import prefetch_line_items
 from src.utils.llm import call_llm
 from src.utils.progress import progress
 
 __all__ = [
+    "LINE_ITEM_REQUEST",
     "MichaelBurrySignal",
     "michael_burry_agent",
 ]
 
+# Financial line items requested per ticker (also used to prefetch backtest data)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "free_cash_flow",
+        "net_income",
+        "total_debt",
+        "cash_and_equivalents",
+        "total_assets",
+        "total_liabilities",
+        "outstanding_shares",
+        "issuance_or_purchase_of_equity_shares",
+    ],
+    "period": "ttm",
+    "limit": 10,
+}
+
+
 ###############################################################################
 # Pydantic output model
 ###############################################################################
 
-
 class MichaelBurrySignal(BaseModel):
     """Schema returned by the LLM."""
 
@@ -55,6 +73,9 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
     analysis_data: dict[str, dict] = {}
     burry_analysis: dict[str, dict] = {}
 
+    # Fetch every ticker's line items in a few batched requests; the per-ticker lookups below are then cache hits
+    prefetch_line_items(tickers, end_date, [LINE_ITEM_REQUEST])
+
     for ticker in tickers:
         # ------------------------------------------------------------------
         # Fetch raw data
@@ -63,20 +84,7 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
         metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
 
         progress.update_status("michael_burry_agent", ticker, "Fetching line items")
-        line_items = search_line_items(
-            ticker,
-            [
-                "free_cash_flow",
-                "net_income",
-                "total_debt",
-                "cash_and_equivalents",
-                "total_assets",
-                "total_liabilities",
-                "outstanding_shares",
-                "issuance_or_purchase_of_equity_shares",
-            ],
-            end_date,
-        )
+        line_items = search_line_items(ticker, end_date=end_date, **LINE_ITEM_REQUEST)
 
         progress.update_status("michael_burry_agent", ticker, "Fetching insider trades")
         insider_trades = get_insider_trades(ticker, end_date=end_date, start_date=start_date)
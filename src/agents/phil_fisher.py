@@ -6,6 +6,7 @@ from src.tools.api import (
     get_insider_trades,
     get_company_news,
 )
+from src.tools.prefetch import prefetch_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
@@ -15,6 +16,27 @@ from src.utils.progress import progress
 from src.utils.llm import call_llm
 import statistics
 
+# Financial line items requested per ticker (also used to prefetch backtest data)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "revenue",
+        "net_income",
+        "earnings_per_share",
+        "free_cash_flow",
+        "research_and_development",
+        "operating_income",
+        "operating_margin",
+        "gross_margin",
+        "total_debt",
+        "shareholders_equity",
+        "cash_and_equivalents",
+        "ebit",
+        "ebitda",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
 
 class PhilFisherSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -41,6 +63,9 @@ def phil_fisher_agent(state: AgentState):
     analysis_data = {}
     fisher_analysis = {}
 
+    # Fetch every ticker's line items in a few batched requests; the per-ticker lookups below are then cache hits
+    prefetch_line_items(tickers, end_date, [LINE_ITEM_REQUEST])
+
     for ticker in tickers:
         progress.update_status("phil_fisher_agent", ticker, "Fetching financial metrics")
         metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
@@ -51,27 +76,7 @@ def phil_fisher_agent(state: AgentState):
         #   - Margins & Stability: operating_income, operating_margin, gross_margin
         #   - Management Efficiency & Leverage: total_debt, shareholders_equity, free_cash_flow
         #   - Valuation: net_income, free_cash_flow (for P/E, P/FCF), ebit, ebitda
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "net_income",
-                "earnings_per_share",
-                "free_cash_flow",
-                "research_and_development",
-                "operating_income",
-                "operating_margin",
-                "gross_margin",
-                "total_debt",
-                "shareholders_equity",
-                "cash_and_equivalents",
-                "ebit",
-                "ebitda",
-            ],
-            end_date,
-            period="annual",
-            limit=5,
-        )
+        financial_line_items = search_line_items(ticker, end_date=end_date, **LINE_ITEM_REQUEST)
 
         progress.update_status("phil_fisher_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
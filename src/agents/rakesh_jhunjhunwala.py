@@ -5,9 +5,32 @@ from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
+from src.tools.prefetch import prefetch_line_items
 from src.utils.llm import call_llm
 from src.utils.progress import progress
 
+# Financial line items requested per ticker (also used to prefetch backtest data)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "net_income",
+        "earnings_per_share",
+        "ebit",
+        "operating_income",
+        "revenue",
+        "operating_margin",
+        "total_assets",
+        "total_liabilities",
+        "current_assets",
+        "current_liabilities",
+        "free_cash_flow",
+        "dividends_and_other_cash_distributions",
+        "issuance_or_purchase_of_equity_shares",
+    ],
+    "period": "ttm",
+    "limit": 10,
+}
+
+
 class RakeshJhunjhunwalaSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -23,6 +46,9 @@ def rakesh_jhunjhunwala_agent(state: AgentState):
     analysis_data = {}
     jhunjhunwala_analysis = {}
 
+    # Fetch every ticker's line items in a few batched requests; the per-ticker lookups below are then cache hits
+    prefetch_line_items(tickers, end_date, [LINE_ITEM_REQUEST])
+
     for ticker in tickers:
 
         # Core Data
@@ -30,25 +56,7 @@ def rakesh_jhunjhunwala_agent(state: AgentState):
         metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
 
         progress.update_status("rakesh_jhunjhunwala_agent", ticker, "Fetching financial line items")
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "net_income",
-                "earnings_per_share",
-                "ebit",
-                "operating_income",
-                "revenue",
-                "operating_margin",
-                "total_assets",
-                "total_liabilities",
-                "current_assets",
-                "current_liabilities",
-                "free_cash_flow",
-                "dividends_and_other_cash_distributions",
-                "issuance_or_purchase_of_equity_shares"
-            ],
-            end_date,
-        )
+        financial_line_items = search_line_items(ticker, end_date=end_date, **LINE_ITEM_REQUEST)
 
         progress.update_status("rakesh_jhunjhunwala_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
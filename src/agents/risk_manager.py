@@ -1,7 +1,7 @@
 from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
-from src.tools.api import get_prices, prices_to_df
+from src.tools.api import get_price_data
 import json
 
 
@@ -22,24 +22,18 @@ def risk_management_agent(state: AgentState):
     for ticker in all_tickers:
         progress.update_status("risk_management_agent", ticker, "Fetching price data")
         
-        prices = get_prices(
+        prices_df = get_price_data(
             ticker=ticker,
             start_date=data["start_date"],
             end_date=data["end_date"],
         )
 
-        if not prices:
-            progress.update_status("risk_management_agent", ticker, "Warning: No price data found")
-            continue
-
-        prices_df = prices_to_df(prices)
-        
         if not prices_df.empty:
             current_price = prices_df["close"].iloc[-1]
             current_prices[ticker] = current_price
             progress.update_status("risk_management_agent", ticker, f"Current price: {current_price}")
         else:
-            progress.update_status("risk_management_agent", ticker, "Warning: Empty price data")
+            progress.update_status("risk_management_agent", ticker, "Warning: No price data found")
 
     # Calculate total portfolio value based on current market prices (Net Liquidation Value)
     total_portfolio_value = portfolio.get("cash", 0.0)
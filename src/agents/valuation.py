@@ -17,6 +17,21 @@ from src.tools.api import (
     get_market_cap,
     search_line_items,
 )
+from src.tools.prefetch import prefetch_line_items
+
+# Financial line items requested per ticker (also used to prefetch backtest data)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "free_cash_flow",
+        "net_income",
+        "depreciation_and_amortization",
+        "capital_expenditure",
+        "working_capital",
+    ],
+    "period": "ttm",
+    "limit": 2,
+}
+
 
 def valuation_analyst_agent(state: AgentState):
     """Run valuation across tickers and write signals back to `state`."""
@@ -27,6 +42,9 @@ def valuation_analyst_agent(state: AgentState):
 
     valuation_analysis: dict[str, dict] = {}
 
+    # Fetch every ticker's line items in a few batched requests; the per-ticker lookups below are then cache hits
+    prefetch_line_items(tickers, end_date, [LINE_ITEM_REQUEST])
+
     for ticker in tickers:
         progress.update_status("valuation_analyst_agent", ticker, "Fetching financial data")
 
@@ -44,19 +62,7 @@ def valuation_analyst_agent(state: AgentState):
 
         # --- Fine‑grained line‑items (need two periods to calc WC change) ---
         progress.update_status("valuation_analyst_agent", ticker, "Gathering line items")
-        line_items = search_line_items(
-            ticker=ticker,
-            line_items=[
-                "free_cash_flow",
-                "net_income",
-                "depreciation_and_amortization",
-                "capital_expenditure",
-                "working_capital",
-            ],
-            end_date=end_date,
-            period="ttm",
-            limit=2,
-        )
+        line_items = search_line_items(ticker, end_date=end_date, **LINE_ITEM_REQUEST)
         if len(line_items) < 2:
             progress.update_status("valuation_analyst_agent", ticker, "Failed: Insufficient financial line items")
             continue
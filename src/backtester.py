@@ -9,18 +9,16 @@ import pandas as pd
 from colorama import Fore, Style, init
 import numpy as np
 import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
-from src.utils.analysts import ANALYST_ORDER
+from src.utils.analysts import ANALYST_CONFIG, ANALYST_ORDER, get_line_item_requests
 from src.main import run_hedge_fund
-from src.tools.api import (
-    get_company_news,
-    get_price_data,
-    get_prices,
-    get_financial_metrics,
-    get_insider_trades,
-)
-from src.utils.display import print_backtest_results, format_backtest_row
+from src.tools.api import get_price_data
+from src.tools.prefetch import prefetch_financial_metrics_hk, prefetch_line_items, prefetch_ticker
+from src.utils.display import print_backtest_results, print_data_metrics, format_backtest_row
+from src.data.cache import get_cache
+from src.data.metrics import get_data_metrics
 from typing_extensions import Callable
 from src.utils.ollama import ensure_ollama_and_model
 
@@ -39,6 +37,7 @@ class Backtester:
         model_provider: str = "OpenAI",
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
+        prefetch_workers: int = 8,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -50,6 +49,7 @@ class Backtester:
         :param model_provider: Which LLM provider (OpenAI, etc).
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
+        :param prefetch_workers: Number of tickers to pre-fetch data for concurrently.
         """
         self.agent = agent
         self.tickers = tickers
@@ -59,6 +59,7 @@ class Backtester:
         self.model_name = model_name
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
+        self.prefetch_workers = prefetch_workers
 
         # Initialize portfolio with support for long/short positions
         self.portfolio_values = []
@@ -264,28 +265,44 @@ class Backtester:
         return total_value
 
     def prefetch_data(self):
-        """Pre-fetch all data needed for the backtest period."""
-        print("\nPre-fetching data for the entire backtest period...")
+        """Pre-fetch all data needed for the backtest period, several tickers at a time."""
+        print(f"\nPre-fetching data for the entire backtest period ({len(self.tickers)} tickers, {self.prefetch_workers} workers)...")
 
         # Convert end_date string to datetime, fetch up to 1 year before
         end_date_dt = datetime.strptime(self.end_date, "%Y-%m-%d")
         start_date_dt = end_date_dt - relativedelta(years=1)
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
 
-        for ticker in self.tickers:
-            # Fetch price data for the entire period, plus 1 year
-            get_prices(ticker, start_date_str, self.end_date)
-
-            # Fetch financial metrics
-            get_financial_metrics(ticker, self.end_date, limit=10)
-
-            # Fetch insider trades
-            get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000)
+        # Line items (and market caps) only matter for the analysts that will run
+        line_item_requests = get_line_item_requests(self.selected_analysts or list(ANALYST_CONFIG))
+
+        # Line items of all tickers in a few batched requests; the per-ticker prefetch below then reads them from the cache
+        for error in prefetch_line_items(self.tickers, self.end_date, line_item_requests, start_date=self.start_date):
+            print(f"{Fore.YELLOW}Batched {error}; fetching per ticker instead{Style.RESET_ALL}")
+        for error in prefetch_financial_metrics_hk(self.tickers):
+            print(f"{Fore.YELLOW}Batched {error}; fetching per ticker instead{Style.RESET_ALL}")
+
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.prefetch_workers)) as executor:
+            futures = {executor.submit(self._prefetch_ticker, ticker, start_date_str, line_item_requests): ticker for ticker in self.tickers}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                ticker = futures[future]
+                errors = future.result()
+                if errors:
+                    failures[ticker] = errors
+                    print(f"[{completed}/{len(futures)}] {Fore.RED}{ticker}{Style.RESET_ALL} failed: {'; '.join(errors)}")
+                else:
+                    print(f"[{completed}/{len(futures)}] {Fore.GREEN}{ticker}{Style.RESET_ALL} done")
 
-            # Fetch company news
-            get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000)
+        if failures:
+            print(f"{Fore.YELLOW}Data pre-fetch complete with errors for {len(failures)} ticker(s): {', '.join(failures)}{Style.RESET_ALL}")
+        else:
+            print("Data pre-fetch complete.")
 
-        print("Data pre-fetch complete.")
+    def _prefetch_ticker(self, ticker: str, start_date_str: str, line_item_requests: list[dict]) -> list[str]:
+        """Pre-fetch every dataset for one ticker, returning the errors instead of raising."""
+        # Fetch price data for the entire period, plus 1 year
+        return prefetch_ticker(ticker, self.start_date, self.end_date, line_item_requests, price_start_date=start_date_str)
 
     def run_backtest(self):
         # Pre-fetch all data at the start
@@ -462,6 +479,7 @@ class Backtester:
 
         # Store the final performance metrics for reference in analyze_performance
         self.performance_metrics = performance_metrics
+        print_data_metrics(get_data_metrics().snapshot(), get_cache().get_memory_stats())
         return performance_metrics
 
     def _update_performance_metrics(self, performance_metrics):
@@ -652,6 +670,12 @@ if __name__ == "__main__":
         help="Use all available analysts (overrides --analysts)",
     )
     parser.add_argument("--ollama", action="store_true", help="Use Ollama for local LLM inference")
+    parser.add_argument(
+        "--prefetch-workers",
+        type=int,
+        default=8,
+        help="Number of tickers to pre-fetch data for concurrently (default: 8)",
+    )
 
     args = parser.parse_args()
 
@@ -770,6 +794,7 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
+        prefetch_workers=args.prefetch_workers,
     )
 
     performance_metrics = backtester.run_backtest()
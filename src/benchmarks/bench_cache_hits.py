@@ -0,0 +1,66 @@
+"""
+Per-hit cost of turning cached rows into Pydantic models, as the cache-hit paths in src/tools/api.py do:
+re-validating every cached dict on each hit (Model(**row), the old path) versus Cache.get_models, which
+validates a series once per version and serves later hits from the shared instances.
+
+    poetry run python -m src.benchmarks.bench_cache_hits --rows 250 --repeat 200
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+from tabulate import tabulate
+
+from src.data.cache import Cache
+from src.data.models import CompanyNews, FinancialMetrics, InsiderTrade, Price
+
+
+def _rows(n: int) -> dict[str, tuple[type, list[dict[str, any]]]]:
+    """Synthetic rows per dataset, dumped from validated models exactly like the fetchers cache them."""
+    days = [(date(2000, 1, 1) + timedelta(days=i)).isoformat() for i in range(n)]
+    metric_fields = {name: 1.5 for name in FinancialMetrics.model_fields if name not in ("ticker", "report_period", "period", "currency")}
+    trade_fields = dict(issuer="Apple", title="CEO", is_board_director=False, transaction_shares=10.0, transaction_price_per_share=100.0, transaction_value=1000.0, shares_owned_before_transaction=100.0, shares_owned_after_transaction=110.0, security_title="Common")
+    return {
+        "prices": (Price, [Price(open=1.0, close=2.0, high=3.0, low=0.5, volume=1000, time=day).model_dump() for day in days]),
+        "financial_metrics": (FinancialMetrics, [FinancialMetrics(ticker="AAPL", report_period=day, period="ttm", currency="USD", **metric_fields).model_dump() for day in days]),
+        "insider_trades": (InsiderTrade, [InsiderTrade(ticker="AAPL", name=f"insider {i}", transaction_date=day, filing_date=day, **trade_fields).model_dump() for i, day in enumerate(days)]),
+        "company_news": (CompanyNews, [CompanyNews(ticker="AAPL", title="headline", author="author", source="wire", date=day, url=f"https://example.com/{i}", sentiment="positive").model_dump() for i, day in enumerate(days)]),
+    }
+
+
+def _best(fn, repeat: int) -> float:
+    """Best-of-repeat seconds for one call."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Pydantic re-validation versus cached models on cache hits")
+    parser.add_argument("--rows", type=int, default=250, help="Cached rows per dataset (one cache hit returns all of them)")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed hits per measurement; the best one is reported")
+    args = parser.parse_args()
+
+    table = []
+    for dataset, (model, rows) in _rows(args.rows).items():
+        cache = Cache()
+        cache._set(dataset, "AAPL", rows)
+
+        revalidate = _best(lambda: [model(**row) for row in cache.get_range(dataset, "AAPL")], args.repeat)
+        # The first hit after a change pays one batch validation of the whole series
+        first_hit = _best(lambda: (cache._views.clear(), cache.get_models(dataset, "AAPL", model)), args.repeat)
+        cached = _best(lambda: cache.get_models(dataset, "AAPL", model), args.repeat)
+        assert [m.model_dump() for m in cache.get_models(dataset, "AAPL", model)] == [model(**row).model_dump() for row in rows]
+
+        table.append([model.__name__, len(model.model_fields), f"{revalidate * 1e3:.3f}", f"{first_hit * 1e3:.3f}", f"{cached * 1e3:.4f}", f"{revalidate / cached:,.0f}x"])
+
+    print(f"{args.rows} rows per cache hit, best of {args.repeat}")
+    print(tabulate(table, headers=["Model", "Fields", "Re-validate (ms/hit)", "First hit (ms)", "Cached models (ms/hit)", "Speedup"], tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+merge_financial_statements on the bundled DataSet/HK.03690 workbooks and on a synthetic universe, against the
+previous per-date iterrows implementation (kept below as the reference the results are checked against).
+
+    poetry run python -m src.benchmarks.bench_hk_merge --tickers 200 --periods 40
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from src.tools.api_hk import DATA_SET_DIR, load_excel, merge_financial_statements
+from src.tools.financial_mapping_hk import STANDARD_MAPPING
+
+STATEMENTS = ("balance_sheet", "income_statement", "cash_flow")
+
+
+def _merge_iterrows(balance_sheet: pd.DataFrame, income_statement: pd.DataFrame, cash_flow: pd.DataFrame) -> dict:
+    """The previous implementation: every row of every statement visited once per report date."""
+    financials_dict = {}
+    for date_col in [col for col in balance_sheet.columns if isinstance(col, pd.Timestamp)]:
+        period_data = {}
+        for statement, df in zip(STATEMENTS, (balance_sheet, income_statement, cash_flow)):
+            for _, row in df.iterrows():
+                if pd.notna(row[date_col]) and row["item"] in STANDARD_MAPPING[statement]:
+                    period_data[STANDARD_MAPPING[statement][row["item"]]] = float(row[date_col])
+        financials_dict[date_col.strftime("%Y-%m-%d")] = period_data
+    return financials_dict
+
+
+def _synthetic_statements(periods: int, rng: np.random.Generator) -> tuple[pd.DataFrame, ...]:
+    """Three statements shaped like load_excel output: every mapped item plus as many unmapped rows, about 10% blanks."""
+    dates = list(pd.date_range(end="2024-12-31", periods=periods, freq="QE")[::-1])
+    statements = []
+    for statement in STATEMENTS:
+        items = list(STANDARD_MAPPING[statement]) + [f"其他项目{i}" for i in range(len(STANDARD_MAPPING[statement]))]
+        values = rng.normal(1e9, 3e8, size=(len(items), periods)).astype(object)
+        values[rng.random(values.shape) < 0.1] = pd.NA
+        df = pd.DataFrame(values, columns=dates)
+        df.insert(0, "item", items)
+        statements.append(df)
+    return tuple(statements)
+
+
+def _time(fn, *args, repeat: int = 1) -> tuple[float, any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized HK statement merge")
+    parser.add_argument("--tickers", type=int, default=200, help="Synthetic tickers")
+    parser.add_argument("--periods", type=int, default=40, help="Report periods per synthetic ticker")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of the HK.03690 merge; the best one is reported")
+    args = parser.parse_args()
+
+    table = []
+    ticker = "HK.03690"
+    paths = [os.path.join(DATA_SET_DIR, ticker, f"{ticker}_{statement}.xlsx") for statement in STATEMENTS]
+    if all(os.path.exists(path) for path in paths):
+        statements = [load_excel(path, ticker.removeprefix("HK.")) for path in paths]
+        before, expected = _time(_merge_iterrows, *statements, repeat=args.repeat)
+        after, merged = _time(merge_financial_statements, *statements, repeat=args.repeat)
+        assert merged == expected
+        table.append([ticker, len(merged), f"{before * 1e3:.1f}", f"{after * 1e3:.1f}", f"{before / after:.0f}x"])
+
+    rng = np.random.default_rng(0)
+    universe = [_synthetic_statements(args.periods, rng) for _ in range(args.tickers)]
+    before, expected = _time(lambda: [_merge_iterrows(*statements) for statements in universe])
+    after, merged = _time(lambda: [merge_financial_statements(*statements) for statements in universe])
+    assert merged == expected
+    table.append([f"synthetic x{args.tickers}", args.periods, f"{before * 1e3:.1f}", f"{after * 1e3:.1f}", f"{before / after:.0f}x"])
+
+    print(tabulate(table, headers=["Statements", "Periods", "iterrows (ms)", "Vectorized (ms)", "Speedup"], tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Cost of growing a cached series one small batch at a time, as incremental syncs and backtests do: the time per
+SortedSeries.merge should stay flat as the series grows instead of rising with the number of rows already cached.
+
+    poetry run python -m src.benchmarks.bench_series_merge --rows 20000 --batch 5
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from operator import itemgetter
+
+from tabulate import tabulate
+
+from src.data.series import SortedSeries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental inserts into a cached series")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows in the series at the end of the run")
+    parser.add_argument("--batch", type=int, default=5, help="Rows per merge")
+    parser.add_argument("--checkpoints", type=int, default=5, help="Number of series sizes to report")
+    args = parser.parse_args()
+
+    days = [(date(1950, 1, 1) + timedelta(days=i)).isoformat() for i in range(args.rows)]
+    rows = [{"time": day, "close": float(i)} for i, day in enumerate(days)]
+    series = SortedSeries(itemgetter("time"), itemgetter("time"))
+    every = max(1, args.rows // args.checkpoints)
+
+    table = []
+    started, merges = time.perf_counter(), 0
+    for i in range(0, args.rows, args.batch):
+        series.merge(rows[i : i + args.batch])
+        merges += 1
+        if len(series) % every < args.batch or len(series) == args.rows:
+            elapsed = time.perf_counter() - started
+            # A read between writes, as every cache hit does
+            read_started = time.perf_counter()
+            series.range(days[len(series) // 2], days[len(series) - 1])
+            table.append([len(series), series.segments, f"{elapsed / merges * 1e6:.1f}", f"{(time.perf_counter() - read_started) * 1e6:.1f}"])
+            started, merges = time.perf_counter(), 0
+
+    print(f"{args.rows} rows merged {args.batch} at a time")
+    print(tabulate(table, headers=["Rows cached", "Segments", "Merge (us/call)", "Range of last half (us)"], tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Time to export and load a cache snapshot for a synthetic universe, versus the size of the file.
+
+    poetry run python -m src.benchmarks.bench_snapshot --tickers 200 --days 1250
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src.data.cache import Cache
+from src.data.models import CompanyNews, FinancialMetrics, Price
+
+
+def _fill(cache: Cache, tickers: int, days: int):
+    dates = [(date(2020, 1, 1) + timedelta(days=i)).isoformat() for i in range(days)]
+    metric_fields = {name: 1.5 for name in FinancialMetrics.model_fields if name not in ("ticker", "report_period", "period", "currency")}
+    for i in range(tickers):
+        ticker = f"T{i:04d}"
+        cache.set_prices(ticker, [Price(open=1.0 + n, close=2.0 + n, high=3.0 + n, low=0.5 + n, volume=1000 + n, time=day).model_dump() for n, day in enumerate(dates)])
+        cache.add_covered_range("prices", ticker, dates[0], dates[-1])
+        cache.set_financial_metrics(ticker, [FinancialMetrics(ticker=ticker, report_period=day, period="ttm", currency="USD", **metric_fields).model_dump() for day in dates[::90]])
+        cache.set_company_news(ticker, [CompanyNews(ticker=ticker, title=f"headline {n}", author="author", source="wire", date=day, url=f"https://example.com/{ticker}/{n}", sentiment="neutral").model_dump() for n, day in enumerate(dates[::7])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache snapshot export and load")
+    parser.add_argument("--tickers", type=int, default=200, help="Tickers in the synthetic cache")
+    parser.add_argument("--days", type=int, default=1250, help="Days of prices per ticker (metrics quarterly, news weekly)")
+    args = parser.parse_args()
+
+    cache = Cache()
+    _fill(cache, args.tickers, args.days)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.snapshot")
+        started = time.perf_counter()
+        written = cache.export_snapshot(path)
+        exported = time.perf_counter() - started
+
+        started = time.perf_counter()
+        Cache().load_snapshot(path)
+        loaded = time.perf_counter() - started
+
+        print(f"{written['rows']} rows for {written['tickers']} (dataset, ticker) pairs")
+        print(f"Snapshot size: {os.path.getsize(path) / 1e6:.1f} MB, memory estimate: {cache.get_memory_stats()['bytes'] / 1e6:.1f} MB")
+        print(f"Export: {exported:.2f}s, load: {loaded:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,586 @@
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from operator import itemgetter
+from typing import Callable, Hashable
+
+import pandas as pd
+from dotenv import load_dotenv
+from pydantic import BaseModel, TypeAdapter
+
+from src.data.cache_backend import CacheBackend, SQLiteCacheBackend
+from src.data.metrics import get_data_metrics
+from src.data.price_store import PRICE_COLUMNS, PriceColumns
+from src.data.series import SortedSeries
+from src.data.snapshot import read_snapshot, write_snapshot
+
+load_dotenv()
+
+# Seconds a persisted row stays fresh, per dataset (None = never expires).
+# Prices for past dates never change, while the latest TTM metrics, filings and news do.
+DEFAULT_TTLS: dict[str, float | None] = {
+    "prices": None,
+    "financial_metrics": 24 * 60 * 60,
+    "line_items": 24 * 60 * 60,
+    "insider_trades": 12 * 60 * 60,
+    "company_news": 6 * 60 * 60,
+}
+
+# Seconds a live ("as of today") market cap from company facts is reused before asking the API again
+MARKET_CAP_TTL = 5 * 60
+
+# Seconds a fetched range that reaches past its settled part (e.g. today) counts as covered before it is fetched again
+RECENT_TTL = 15 * 60
+
+def _insider_trade_key(row: dict[str, any]) -> str:
+    """Identity of an insider trade; several trades are often filed on the same day."""
+    return "|".join(str(row.get(field)) for field in ("filing_date", "name", "transaction_date", "transaction_shares", "transaction_price_per_share", "security_title"))
+
+
+# (de-duplication key, date used for ordering and range queries) per dataset
+DATASET_KEYS: dict[str, tuple[callable, callable]] = {
+    "prices": (itemgetter("time"), itemgetter("time")),
+    "financial_metrics": (itemgetter("report_period"), itemgetter("report_period")),
+    "line_items": (itemgetter("key"), itemgetter("report_period")),  # key = "<report_period>|<line_item>"
+    "insider_trades": (_insider_trade_key, lambda trade: trade.get("transaction_date") or trade["filing_date"]),
+    "company_news": (itemgetter("url"), itemgetter("date")),  # several articles share a date, but not a URL
+}
+
+
 class Cache:
-    """In-memory cache for API responses."""
+    """In-memory cache for API responses, optionally backed by persistent storage."""
+
+    def __init__(self, backend: CacheBackend | None = None, ttls: dict[str, float | None] | None = None, max_bytes: int | None = None, market_cap_ttl: float = MARKET_CAP_TTL, recent_ttl: float = RECENT_TTL):
+        """
+        :param backend: Optional persistent storage that rows are written through to and reloaded from.
+        :param ttls: Per-dataset TTL overrides in seconds (None = never expires).
+        :param max_bytes: Approximate memory budget; least recently used tickers are evicted above it (None = unbounded).
+        :param market_cap_ttl: Seconds a live market cap is reused before it is fetched again.
+        :param recent_ttl: Seconds the unsettled tail of a fetched range (see add_covered_range) counts as covered.
+        """
+        self._backend = backend
+        self.max_bytes = max_bytes
+        self._ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._data: dict[str, dict[str, SortedSeries]] = {dataset: {} for dataset in DEFAULT_TTLS}
+        # Date ranges [start, end] fully fetched from the API, per dataset and ticker
+        self._coverage: dict[str, dict[str, list[tuple[str, str]]]] = {dataset: {} for dataset in DEFAULT_TTLS}
+        # Unsettled tails of fetched ranges, covered only until they expire: (start, end, monotonic expiry time)
+        self.recent_ttl = recent_ttl
+        self._recent: dict[str, dict[str, list[tuple[str, str, float]]]] = {dataset: {} for dataset in DEFAULT_TTLS}
+        # (dataset, ticker) pairs already read from the backend in this process
+        self._loaded: set[tuple[str, str]] = set()
+        # Columnar copies of price series, keyed by ticker, with the series version they were built from
+        self._price_columns: dict[str, tuple[int, PriceColumns]] = {}
+        # Values derived from a (dataset, ticker) series (e.g. validated models), keyed by view name, with the series version
+        self._views: dict[tuple[str, str], dict[Hashable, tuple[int, any]]] = {}
+        # Approximate bytes per (dataset, ticker), in least to most recently used order
+        self._lru: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._total_bytes = 0
+        self._evictions = 0
+        # Point-in-time market caps derived from metric fetches: ticker -> {as-of date: market cap}
+        self._market_caps: dict[str, dict[str, float]] = {}
+        # Live market caps from company facts: ticker -> (monotonic time fetched, market cap)
+        self.market_cap_ttl = market_cap_ttl
+        self._live_market_caps: dict[str, tuple[float, float]] = {}
+        self._lock = threading.RLock()
+
+    def _series(self, dataset: str, ticker: str) -> SortedSeries | None:
+        """Get a ticker's cached series, loading it from the backend on first access."""
+        with self._lock:
+            store = self._data[dataset]
+            if ticker not in store and self._backend is not None and (dataset, ticker) not in self._loaded:
+                self._loaded.add((dataset, ticker))
+                started = time.monotonic()
+                if rows := self._backend.load(dataset, ticker, max_age=self._ttls.get(dataset)):
+                    store[ticker] = self._new_series(dataset)
+                    store[ticker].merge(rows)
+                if ranges := self._backend.load_coverage(dataset, ticker, max_age=self._ttls.get(dataset)):
+                    self._coverage[dataset][ticker] = _merge_ranges(ranges)
+                metrics = get_data_metrics()
+                metrics.increment(f"cache/{dataset}", ticker, "backend_loads")
+                metrics.increment(f"cache/{dataset}", ticker, "backend_rows", len(rows or []))
+                metrics.observe(f"cache/{dataset}", ticker, "backend_load", time.monotonic() - started)
+                if ticker in store:
+                    self._account(dataset, ticker)
+            elif (dataset, ticker) in self._lru:
+                self._lru.move_to_end((dataset, ticker))
+            return store.get(ticker)
+
+    def _reload(self, dataset: str, ticker: str) -> bool:
+        """Merge in rows and fetched ranges other processes stored in the backend; True if anything was new."""
+        with self._lock:
+            if (dataset, ticker) not in self._loaded:
+                # First access loads everything stored so far
+                return self._series(dataset, ticker) is not None or bool(self._coverage[dataset].get(ticker))
+            series = self._data[dataset].get(ticker)
+            coverage = self._coverage[dataset].get(ticker, [])
+            before = (len(series) if series else 0, coverage)
+            started = time.monotonic()
+            rows = self._backend.load(dataset, ticker, max_age=self._ttls.get(dataset))
+            if rows:
+                if series is None:
+                    series = self._data[dataset][ticker] = self._new_series(dataset)
+                series.merge(rows)
+            if ranges := self._backend.load_coverage(dataset, ticker, max_age=self._ttls.get(dataset)):
+                self._coverage[dataset][ticker] = _merge_ranges(coverage + ranges)
+            metrics = get_data_metrics()
+            metrics.increment(f"cache/{dataset}", ticker, "backend_loads")
+            metrics.increment(f"cache/{dataset}", ticker, "backend_rows", len(rows or []))
+            metrics.observe(f"cache/{dataset}", ticker, "backend_load", time.monotonic() - started)
+            if series is not None:
+                self._account(dataset, ticker)
+            return (len(series) if series else 0, self._coverage[dataset].get(ticker, [])) != before
+
+    def _account(self, dataset: str, ticker: str):
+        """Refresh the byte count of a (dataset, ticker) entry, mark it most recently used and enforce the budget."""
+        key = (dataset, ticker)
+        nbytes = self._data[dataset][ticker].nbytes
+        if dataset == "prices" and ticker in self._price_columns:
+            nbytes += self._price_columns[ticker][1].nbytes
+        # Each derived view is counted as roughly the size of the rows it was built from
+        nbytes += len(self._views.get(key, ())) * self._data[dataset][ticker].nbytes
+        self._total_bytes += nbytes - self._lru.get(key, 0)
+        self._lru[key] = nbytes
+        self._lru.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        """Evict least recently used entries until under budget, always keeping the most recent one."""
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes and len(self._lru) > 1:
+            (dataset, ticker), nbytes = self._lru.popitem(last=False)
+            self._total_bytes -= nbytes
+            self._evictions += 1
+            get_data_metrics().increment(f"cache/{dataset}", ticker, "evictions")
+            self._data[dataset].pop(ticker, None)
+            # Coverage goes with the rows so evicted ranges are fetched (or reloaded from the backend) again
+            self._coverage[dataset].pop(ticker, None)
+            self._loaded.discard((dataset, ticker))
+            self._views.pop((dataset, ticker), None)
+            if dataset == "prices":
+                self._price_columns.pop(ticker, None)
+            elif dataset == "financial_metrics":
+                self._market_caps.pop(ticker, None)
+
+    def _new_series(self, dataset: str) -> SortedSeries:
+        key, sort_key = DATASET_KEYS[dataset]
+        return SortedSeries(key, sort_key)
+
+    def _get(self, dataset: str, ticker: str) -> list[dict[str, any]] | None:
+        """Get all cached rows for a ticker in ascending date order."""
+        series = self._series(dataset, ticker)
+        return series.rows if series else None
+
+    def _set(self, dataset: str, ticker: str, data: list[dict[str, any]]):
+        """Merge rows into the in-memory cache and write them through to the backend."""
+        with self._lock:
+            series = self._series(dataset, ticker)
+            if series is None:
+                series = self._data[dataset][ticker] = self._new_series(dataset)
+            series.merge(data)
+            self._account(dataset, ticker)
+            if self._backend is not None:
+                self._backend.save(dataset, ticker, data, key=series.key)
+
+    def get_range(self, dataset: str, ticker: str, start_date: str | None = None, end_date: str | None = None) -> list[dict[str, any]]:
+        """Get cached rows with start_date <= date <= end_date, in ascending date order."""
+        series = self._series(dataset, ticker)
+        return series.range(start_date, end_date) if series else []
+
+    def get_price_frame(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Get cached prices in [start_date, end_date] as a Date-indexed DataFrame backed by NumPy columns."""
+        with self._lock:
+            series = self._series("prices", ticker)
+            if series is None:
+                return pd.DataFrame(columns=list(PRICE_COLUMNS), index=pd.DatetimeIndex([], name="Date"))
+            version, columns = self._price_columns.get(ticker, (None, None))
+            if version != series.version:
+                columns = PriceColumns(series.rows)
+                self._price_columns[ticker] = (series.version, columns)
+                self._account("prices", ticker)
+        return columns.frame(start_date, end_date)
+
+    def get_view(self, dataset: str, ticker: str, name: Hashable, build: Callable[[SortedSeries], any]) -> any:
+        """
+        Get a value derived from a ticker's series by build(series), rebuilt only when the series changes.
+        Views are shared between callers, so treat them as read-only. Returns None if nothing is cached.
+        """
+        with self._lock:
+            series = self._series(dataset, ticker)
+            if series is None:
+                return None
+            views = self._views.setdefault((dataset, ticker), {})
+            version, value = views.get(name, (None, None))
+            if version != series.version:
+                value = build(series)
+                views[name] = (series.version, value)
+                self._account(dataset, ticker)
+            return value
+
+    def get_models(self, dataset: str, ticker: str, model: type[BaseModel], start_date: str | None = None, end_date: str | None = None) -> list[BaseModel]:
+        """
+        Get cached rows with start_date <= date <= end_date as validated `model` instances, in ascending date order.
+        Rows are validated in one batch per series version instead of on every hit; the instances are shared, so treat them as read-only.
+        """
+        with self._lock:
+            series = self._series(dataset, ticker)
+            if series is None:
+                return []
+            models = self.get_view(dataset, ticker, ("models", model), lambda s: _list_adapter(model).validate_python(s.rows))
+            lo, hi = series.bounds(start_date, end_date)
+            return models[lo:hi]
+
+    @property
+    def shared(self) -> bool:
+        """Whether the backend is shared with other processes on this host."""
+        return self._backend is not None and self._backend.shared
+
+    @contextlib.contextmanager
+    def fetch_lock(self, dataset: str, ticker: str):
+        """
+        Hold the host-wide lock for fetching a ticker's dataset when the backend is shared, yielding True if
+        another process stored new data for it meanwhile; callers should look it up again before fetching.
+        Without a shared backend this yields False immediately.
+        """
+        if not self.shared:
+            yield False
+            return
+        started = time.monotonic()
+        with self._backend.lock(dataset, ticker):
+            get_data_metrics().observe(f"cache/{dataset}", ticker, "lock_wait", time.monotonic() - started)
+            yield self._reload(dataset, ticker)
+
+    @contextlib.asynccontextmanager
+    async def afetch_lock(self, dataset: str, ticker: str):
+        """Async fetch_lock; the lock is awaited on a worker thread so the event loop keeps running."""
+        if not self.shared:
+            yield False
+            return
+        started = time.monotonic()
+        lock = self._backend.lock(dataset, ticker)
+        acquire = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The worker thread still takes the lock, so hand it straight back once it does
+            acquire.add_done_callback(lambda future: future.cancelled() or future.exception() or lock.__exit__(None, None, None))
+            raise
+        try:
+            get_data_metrics().observe(f"cache/{dataset}", ticker, "lock_wait", time.monotonic() - started)
+            yield self._reload(dataset, ticker)
+        finally:
+            lock.__exit__(None, None, None)
+
+    def get_high_water_mark(self, dataset: str, ticker: str, as_of: str) -> str | None:
+        """Get the last date synced up to as_of: the end of the latest fetched range starting on or before it (capped at as_of)."""
+        ends = [end for start, end in self._covered(dataset, ticker) if start <= as_of]
+        return min(ends[-1], as_of) if ends else None
+
+    def get_missing_ranges(self, dataset: str, ticker: str, start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """Get the sub-ranges of [start_date, end_date] that have not been fetched yet."""
+        return _missing_ranges(self._covered(dataset, ticker), start_date, end_date)
+
+    def get_covered_range(self, dataset: str, ticker: str, as_of: str) -> tuple[str, str] | None:
+        """Get the fetched range containing as_of, if any."""
+        return next(((start, end) for start, end in self._covered(dataset, ticker) if start <= as_of <= end), None)
+
+    def _covered(self, dataset: str, ticker: str) -> list[tuple[str, str]]:
+        """Fetched ranges of a ticker, including the unsettled tails that have not expired yet."""
+        self._series(dataset, ticker)
+        with self._lock:
+            coverage = self._coverage[dataset].get(ticker, [])
+            if not (recent := self._recent[dataset].get(ticker)):
+                return coverage
+            now = time.monotonic()
+            recent[:] = [entry for entry in recent if entry[2] > now]
+            return _merge_ranges(coverage + [(start, end) for start, end, _ in recent])
 
-    def __init__(self):
-        self._prices_cache: dict[str, list[dict[str, any]]] = {}
-        self._financial_metrics_cache: dict[str, list[dict[str, any]]] = {}
-        self._line_items_cache: dict[str, list[dict[str, any]]] = {}
-        self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
-        self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+    def add_covered_range(self, dataset: str, ticker: str, start_date: str, end_date: str, settled_until: str | None = None):
+        """
+        Record that [start_date, end_date] has been fully fetched for a ticker.
+        Only days up to settled_until (default yesterday) are covered for good: bars, filings and news for later days can
+        still arrive, so that tail of the range is covered for recent_ttl seconds and fetched again after that.
+        """
+        settled_until = settled_until or (_today() - timedelta(days=1)).isoformat()
+        with self._lock:
+            if settled_until < end_date:
+                tail_start = max(start_date, (date.fromisoformat(settled_until) + timedelta(days=1)).isoformat())
+                self._recent[dataset].setdefault(ticker, []).append((tail_start, end_date, time.monotonic() + self.recent_ttl))
+                end_date = settled_until
+            if start_date > end_date:
+                return
+            self._series(dataset, ticker)
+            coverage = self._coverage[dataset]
+            coverage[ticker] = _merge_ranges(coverage.get(ticker, []) + [(start_date, end_date)])
+            if self._backend is not None:
+                self._backend.save_coverage(dataset, ticker, coverage[ticker], fetched=(start_date, end_date))
 
-    def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
-        """Merge existing and new data, avoiding duplicates based on a key field."""
-        if not existing:
-            return new_data
+    def get_market_cap(self, ticker: str, as_of: str) -> float | None:
+        """Get the market cap recorded for a ticker as of a date, if metrics were fetched for that date."""
+        with self._lock:
+            return self._market_caps.get(ticker, {}).get(as_of)
 
-        # Create a set of existing keys for O(1) lookup
-        existing_keys = {item[key_field] for item in existing}
+    def set_market_cap(self, ticker: str, as_of: str, market_cap: float):
+        """Record a ticker's market cap as of a date."""
+        with self._lock:
+            self._market_caps.setdefault(ticker, {})[as_of] = market_cap
 
-        # Only add items that don't exist yet
-        merged = existing.copy()
-        merged.extend([item for item in new_data if item[key_field] not in existing_keys])
-        return merged
+    def get_live_market_cap(self, ticker: str) -> float | None:
+        """Get the latest live market cap for a ticker if it was fetched within market_cap_ttl seconds."""
+        with self._lock:
+            fetched_at, market_cap = self._live_market_caps.get(ticker, (None, None))
+            if fetched_at is None or time.monotonic() - fetched_at > self.market_cap_ttl:
+                return None
+            return market_cap
+
+    def set_live_market_cap(self, ticker: str, market_cap: float):
+        """Record a live market cap fetched just now."""
+        with self._lock:
+            self._live_market_caps[ticker] = (time.monotonic(), market_cap)
+
+    def get_memory_stats(self) -> dict[str, any]:
+        """Get approximate memory usage per dataset, the budget and the number of evictions so far."""
+        with self._lock:
+            datasets = {dataset: {"bytes": 0, "tickers": 0} for dataset in self._data}
+            for (dataset, _), nbytes in self._lru.items():
+                datasets[dataset]["bytes"] += nbytes
+                datasets[dataset]["tickers"] += 1
+            return {"bytes": self._total_bytes, "max_bytes": self.max_bytes, "evictions": self._evictions, "datasets": datasets}
+
+    def get_memory_usage(self, dataset: str, ticker: str) -> int:
+        """Get the approximate bytes held for one dataset and ticker."""
+        with self._lock:
+            return self._lru.get((dataset, ticker), 0)
+
+    def get_ttl(self, dataset: str) -> float | None:
+        """Get the time-to-live (in seconds) of persisted rows for a dataset."""
+        return self._ttls.get(dataset)
+
+    def clear(self, dataset: str | None = None, ticker: str | None = None):
+        """Drop cached rows from memory and the backend, optionally for one dataset and/or ticker."""
+        with self._lock:
+            if dataset in (None, "prices"):
+                if ticker is None:
+                    self._price_columns.clear()
+                else:
+                    self._price_columns.pop(ticker, None)
+            if dataset in (None, "financial_metrics"):
+                for store in (self._market_caps, self._live_market_caps):
+                    if ticker is None:
+                        store.clear()
+                    else:
+                        store.pop(ticker, None)
+            for name in self._data:
+                if dataset is not None and name != dataset:
+                    continue
+                for store in (self._data[name], self._coverage[name], self._recent[name]):
+                    if ticker is None:
+                        store.clear()
+                    else:
+                        store.pop(ticker, None)
+
+            def matches(d: str, t: str) -> bool:
+                return (dataset is None or d == dataset) and (ticker is None or t == ticker)
+
+            self._loaded = {(d, t) for d, t in self._loaded if not matches(d, t)}
+            self._views = {key: views for key, views in self._views.items() if not matches(*key)}
+            for key in [key for key in self._lru if matches(*key)]:
+                self._total_bytes -= self._lru.pop(key)
+            if self._backend is not None:
+                self._backend.clear(dataset, ticker)
+
+    def export_snapshot(self, path: str) -> dict[str, int]:
+        """Write every cached row, fetched range and point-in-time market cap to a snapshot file; returns the counts written."""
+        with self._lock:
+            datasets = {
+                dataset: {ticker: {"rows": series.rows, "coverage": self._coverage[dataset].get(ticker, [])} for ticker, series in store.items()}
+                for dataset, store in self._data.items()
+            }
+            # Fetched ranges can outlive their rows' series (e.g. a range with no news at all)
+            for dataset, coverage in self._coverage.items():
+                for ticker, ranges in coverage.items():
+                    datasets[dataset].setdefault(ticker, {"rows": [], "coverage": ranges})
+            payload = {"created_at": time.time(), "datasets": datasets, "market_caps": {ticker: dict(caps) for ticker, caps in self._market_caps.items()}}
+        # Rows and ranges are replaced rather than modified in place, so the payload can be written without holding the lock
+        write_snapshot(path, payload)
+        return {"tickers": sum(len(store) for store in datasets.values()), "rows": sum(len(entry["rows"]) for store in datasets.values() for entry in store.values())}
+
+    def load_snapshot(self, path: str) -> dict[str, int]:
+        """
+        Merge a snapshot written by export_snapshot into memory; returns the counts loaded.
+        Rows are not written through to the backend, and rows already cached are kept.
+        Datasets whose TTL has passed since the snapshot was written are skipped, rows and fetched ranges alike.
+        Raises SnapshotError if the file is not a snapshot of this format version or is corrupt.
+        """
+        payload = read_snapshot(path)
+        age = time.time() - payload["created_at"]
+
+        def expired(dataset: str) -> bool:
+            return (ttl := self._ttls.get(dataset)) is not None and age > ttl
+
+        loaded = {"tickers": 0, "rows": 0}
+        with self._lock:
+            for dataset, store in payload["datasets"].items():
+                if dataset not in self._data or expired(dataset):
+                    continue
+                for ticker, entry in store.items():
+                    if entry["rows"]:
+                        series = self._data[dataset].get(ticker)
+                        if series is None:
+                            series = self._data[dataset][ticker] = self._new_series(dataset)
+                        series.merge(entry["rows"])
+                        self._account(dataset, ticker)
+                    if entry["coverage"]:
+                        coverage = self._coverage[dataset]
+                        coverage[ticker] = _merge_ranges(coverage.get(ticker, []) + [tuple(r) for r in entry["coverage"]])
+                    loaded["tickers"] += 1
+                    loaded["rows"] += len(entry["rows"])
+            # Point-in-time market caps come from financial metrics and expire with them
+            for ticker, market_caps in ({} if expired("financial_metrics") else payload["market_caps"]).items():
+                self._market_caps.setdefault(ticker, {}).update(market_caps)
+        return loaded
 
     def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached price data if available."""
-        return self._prices_cache.get(ticker)
+        return self._get("prices", ticker)
 
     def set_prices(self, ticker: str, data: list[dict[str, any]]):
         """Append new price data to cache."""
-        self._prices_cache[ticker] = self._merge_data(self._prices_cache.get(ticker), data, key_field="time")
+        self._set("prices", ticker, data)
 
     def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
         """Get cached financial metrics if available."""
-        return self._financial_metrics_cache.get(ticker)
+        return self._get("financial_metrics", ticker)
 
     def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
         """Append new financial metrics to cache."""
-        self._financial_metrics_cache[ticker] = self._merge_data(self._financial_metrics_cache.get(ticker), data, key_field="report_period")
+        self._set("financial_metrics", ticker, data)
 
-    def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
-        """Get cached line items if available."""
-        return self._line_items_cache.get(ticker)
+    def get_line_items(self, cache_key: str) -> list[dict[str, any]] | None:
+        """Get cached line item rows for a query key if available."""
+        return self._get("line_items", cache_key)
 
-    def set_line_items(self, ticker: str, data: list[dict[str, any]]):
-        """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(self._line_items_cache.get(ticker), data, key_field="report_period")
+    def set_line_items(self, cache_key: str, data: list[dict[str, any]]):
+        """Append new line item rows (one per report period and line item) to cache."""
+        self._set("line_items", cache_key, data)
 
     def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached insider trades if available."""
-        return self._insider_trades_cache.get(ticker)
+        return self._get("insider_trades", ticker)
 
     def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
         """Append new insider trades to cache."""
-        self._insider_trades_cache[ticker] = self._merge_data(self._insider_trades_cache.get(ticker), data, key_field="filing_date")  # Could also use transaction_date if preferred
+        self._set("insider_trades", ticker, data)
 
     def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached company news if available."""
-        return self._company_news_cache.get(ticker)
+        return self._get("company_news", ticker)
 
     def set_company_news(self, ticker: str, data: list[dict[str, any]]):
         """Append new company news to cache."""
-        self._company_news_cache[ticker] = self._merge_data(self._company_news_cache.get(ticker), data, key_field="date")
+        self._set("company_news", ticker, data)
+
+
+@functools.lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """Validator for a list of model instances; validating a whole list at once is faster than one model at a time."""
+    return TypeAdapter(list[model])
+
+
+def _today() -> date:
+    return date.today()
+
+
+def _merge_ranges(ranges: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Merge overlapping or adjacent (next-day) date ranges into a sorted, disjoint list."""
+    merged: list[tuple[str, str]] = []
+    for start, end in sorted(ranges):
+        if merged and date.fromisoformat(start) <= date.fromisoformat(merged[-1][1]) + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _missing_ranges(covered: list[tuple[str, str]], start_date: str, end_date: str) -> list[tuple[str, str]]:
+    """Subtract sorted, disjoint covered ranges from [start_date, end_date]."""
+    missing = []
+    cursor = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    for covered_start, covered_end in covered:
+        covered_start, covered_end = date.fromisoformat(covered_start), date.fromisoformat(covered_end)
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor.isoformat(), (covered_start - timedelta(days=1)).isoformat()))
+        cursor = covered_end + timedelta(days=1)
+        if cursor > end:
+            return missing
+    if cursor <= end:
+        missing.append((cursor.isoformat(), end.isoformat()))
+    return missing
+
+
+def _parse_ttl(value: str) -> float | None:
+    """Parse a TTL environment value; 'none' or a negative number means never expire."""
+    if value.strip().lower() in ("none", "never", "inf", ""):
+        return None
+    ttl = float(value)
+    return None if ttl < 0 else ttl
+
+
+def create_cache_from_env() -> Cache:
+    """
+    Build a Cache configured from environment variables:
+
+    - CACHE_BACKEND: "memory" (default), "sqlite", or "shared" (SQLite shared by every process on the host)
+    - CACHE_DIR: directory for persistent cache files (default ./.cache)
+    - CACHE_TTL_<DATASET>: TTL in seconds per dataset, e.g. CACHE_TTL_FINANCIAL_METRICS=3600
+    - CACHE_MAX_MB: approximate in-memory budget in megabytes before LRU eviction (default unbounded)
+    - CACHE_TTL_MARKET_CAP: seconds a live market cap is reused (default 300)
+    - CACHE_TTL_RECENT: seconds fetched data for today (and other unsettled days) is reused (default 900)
+    - CACHE_SNAPSHOT: snapshot file (see Cache.export_snapshot) loaded at startup if it exists
+    """
+    ttls = {}
+    for dataset in DEFAULT_TTLS:
+        if (value := os.getenv(f"CACHE_TTL_{dataset.upper()}")) is not None:
+            ttls[dataset] = _parse_ttl(value)
+
+    backend = None
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend_name == "sqlite":
+        backend = SQLiteCacheBackend(os.getenv("CACHE_DIR", "./.cache"))
+    elif backend_name == "shared":
+        backend = SQLiteCacheBackend(os.getenv("CACHE_DIR", "./.cache"), shared=True)
+    elif backend_name != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND: {backend_name}")
+
+    max_mb = os.getenv("CACHE_MAX_MB")
+    max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else None
+
+    market_cap_ttl = float(os.getenv("CACHE_TTL_MARKET_CAP") or MARKET_CAP_TTL)
+    recent_ttl = float(os.getenv("CACHE_TTL_RECENT") or RECENT_TTL)
+
+    cache = Cache(backend=backend, ttls=ttls, max_bytes=max_bytes, market_cap_ttl=market_cap_ttl, recent_ttl=recent_ttl)
+
+    snapshot_path = os.getenv("CACHE_SNAPSHOT")
+    if snapshot_path and os.path.exists(snapshot_path):
+        started = time.monotonic()
+        loaded = cache.load_snapshot(snapshot_path)
+        print(f"Loaded cache snapshot {snapshot_path}: {loaded['rows']} rows for {loaded['tickers']} tickers in {time.monotonic() - started:.2f}s")
+    return cache
 
 
 # Global cache instance
-_cache = Cache()
+_cache = create_cache_from_env()
 
 
 def get_cache() -> Cache:
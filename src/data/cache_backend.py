@@ -0,0 +1,231 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Seconds a writer waits for another process's SQLite write transaction before giving up
+BUSY_TIMEOUT = 30
+
+
+class CacheBackend:
+    """Persistent storage behind the in-memory Cache."""
+
+    # Whether other processes read and write the same storage while this one runs
+    shared = False
+
+    def load(self, dataset: str, ticker: str, max_age: float | None = None) -> list[dict[str, any]] | None:
+        """Load stored rows for a ticker, skipping rows older than max_age seconds."""
+        raise NotImplementedError
+
+    def save(self, dataset: str, ticker: str, data: list[dict[str, any]], key: Callable[[dict], str]):
+        """Store rows for a ticker, replacing rows with the same key(row)."""
+        raise NotImplementedError
+
+    def load_coverage(self, dataset: str, ticker: str, max_age: float | None = None) -> list[tuple[str, str]]:
+        """Load the [start, end] date ranges fully fetched for a ticker."""
+        raise NotImplementedError
+
+    def save_coverage(self, dataset: str, ticker: str, ranges: list[tuple[str, str]], fetched: tuple[str, str] | None = None):
+        """
+        Replace the stored fetched date ranges for a ticker.
+        Each range keeps the oldest fetch time of the stored ranges it absorbs, except those inside the just-fetched range.
+        """
+        raise NotImplementedError
+
+    def clear(self, dataset: str | None = None, ticker: str | None = None):
+        """Remove stored rows, optionally limited to a dataset and/or ticker."""
+        raise NotImplementedError
+
+    def lock(self, dataset: str, ticker: str) -> contextlib.AbstractContextManager:
+        """Lock held while fetching a ticker's dataset so processes sharing the storage don't fetch it twice."""
+        return contextlib.nullcontext()
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class FileLock:
+    """Exclusive lock on a file, held across processes on one host and released if the holder dies."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # flock does not exclude threads of one process on every platform, so they also queue on a thread lock
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        """Release the lock; may be called from a different thread than acquire."""
+        try:
+            if fcntl is None:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            # Closing the file drops the flock
+            self._file.close()
+        finally:
+            self._file = None
+            self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    SQLite file backend storing one JSON row per (dataset, ticker, key).
+
+    In shared mode the database runs in WAL mode so several processes can read while one writes, and fetches
+    are serialized per (dataset, ticker) with lock files under <cache_dir>/locks.
+    """
+
+    def __init__(self, cache_dir: str, filename: str = "cache.sqlite3", shared: bool = False):
+        """
+        :param cache_dir: Directory holding the database (and lock files in shared mode).
+        :param filename: Database file name.
+        :param shared: Whether other processes use the same database concurrently.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, filename)
+        self.shared = shared
+        self._lock_dir = os.path.join(cache_dir, "locks")
+        self._file_locks: dict[str, FileLock] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        if shared:
+            os.makedirs(self._lock_dir, exist_ok=True)
+            # Readers see the last committed data while another process writes; NORMAL sync is safe with WAL
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (dataset, ticker, key)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS coverage (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (dataset, ticker, start_date)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, dataset: str, ticker: str, max_age: float | None = None) -> list[dict[str, any]] | None:
+        query = "SELECT payload FROM rows WHERE dataset = ? AND ticker = ?"
+        params: list = [dataset, ticker]
+        if max_age is not None:
+            query += " AND fetched_at >= ?"
+            params.append(time.time() - max_age)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        if not rows:
+            return None
+        return [json.loads(payload) for (payload,) in rows]
+
+    def save(self, dataset: str, ticker: str, data: list[dict[str, any]], key: Callable[[dict], str]):
+        if not data:
+            return
+        fetched_at = time.time()
+        records = [(dataset, ticker, str(key(item)), json.dumps(item), fetched_at) for item in data]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO rows (dataset, ticker, key, payload, fetched_at) VALUES (?, ?, ?, ?, ?)", records)
+            self._conn.commit()
+
+    def load_coverage(self, dataset: str, ticker: str, max_age: float | None = None) -> list[tuple[str, str]]:
+        query = "SELECT start_date, end_date FROM coverage WHERE dataset = ? AND ticker = ?"
+        params: list = [dataset, ticker]
+        if max_age is not None:
+            query += " AND fetched_at >= ?"
+            params.append(time.time() - max_age)
+        query += " ORDER BY start_date"
+
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def save_coverage(self, dataset: str, ticker: str, ranges: list[tuple[str, str]], fetched: tuple[str, str] | None = None):
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute("SELECT start_date, end_date, fetched_at FROM coverage WHERE dataset = ? AND ticker = ?", (dataset, ticker)).fetchall()
+            # Ranges stored before and not fetched again just now hold rows as old as their fetch time
+            stale = [(start, end, fetched_at) for start, end, fetched_at in existing if fetched is None or not (fetched[0] <= start and end <= fetched[1])]
+            self._conn.execute("DELETE FROM coverage WHERE dataset = ? AND ticker = ?", (dataset, ticker))
+            # A merged range expires with the oldest rows in it, so TTLs still apply to the rows fetched earliest
+            records = [(dataset, ticker, start, end, min([fetched_at for old_start, old_end, fetched_at in stale if old_start <= end and start <= old_end], default=now)) for start, end in ranges]
+            self._conn.executemany("INSERT INTO coverage (dataset, ticker, start_date, end_date, fetched_at) VALUES (?, ?, ?, ?, ?)", records)
+            self._conn.commit()
+
+    def clear(self, dataset: str | None = None, ticker: str | None = None):
+        conditions = ""
+        params: list = []
+        if dataset is not None:
+            conditions += " AND dataset = ?"
+            params.append(dataset)
+        if ticker is not None:
+            conditions += " AND ticker = ?"
+            params.append(ticker)
+        with self._lock:
+            for table in ("rows", "coverage"):
+                self._conn.execute(f"DELETE FROM {table} WHERE 1 = 1{conditions}", params)
+            self._conn.commit()
+
+    def lock(self, dataset: str, ticker: str) -> contextlib.AbstractContextManager:
+        if not self.shared:
+            return contextlib.nullcontext()
+        # Tickers and line item query keys may hold characters that are not valid in file names
+        name = hashlib.sha256(f"{dataset}/{ticker}".encode("utf-8")).hexdigest()[:32]
+        with self._lock:
+            if (file_lock := self._file_locks.get(name)) is None:
+                file_lock = self._file_locks[name] = FileLock(os.path.join(self._lock_dir, f"{name}.lock"))
+        return file_lock
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
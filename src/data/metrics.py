@@ -0,0 +1,159 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Upper bounds (seconds) of the latency buckets; values above the last bound land in an overflow bucket
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds (bytes) of the response size buckets
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    """Fixed-bucket histogram that also tracks count, sum, min and max."""
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        """Add another histogram with the same bounds into this one."""
+        for i, n in enumerate(other.buckets):
+            self.buckets[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> float | None:
+        """Approximate quantile: the upper bound of the bucket holding it, capped at the largest value seen."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict[str, any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip([*self.bounds, float("inf")], self.buckets)),
+        }
+
+
+class DataMetrics:
+    """Thread-safe counters and histograms for the data layer, labelled by endpoint and ticker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, str, str], float] = defaultdict(float)
+        self._histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._started = time.monotonic()
+
+    def increment(self, endpoint: str, ticker: str | None, name: str, value: float = 1):
+        """Add value to a counter."""
+        with self._lock:
+            self._counters[(endpoint, ticker or "", name)] += value
+
+    def observe(self, endpoint: str, ticker: str | None, name: str, value: float, bounds: tuple[float, ...] = LATENCY_BUCKETS):
+        """Record a value in a histogram, created with the given bucket bounds on first use."""
+        with self._lock:
+            key = (endpoint, ticker or "", name)
+            if (histogram := self._histograms.get(key)) is None:
+                histogram = self._histograms[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    def record_cache(self, endpoint: str, ticker: str, hit: bool):
+        """Count a lookup answered from the cache (hit) or needing the API (miss)."""
+        self.increment(endpoint, ticker, "cache_hits" if hit else "cache_misses")
+
+    def record_request(self, endpoint: str, ticker: str | None, latency: float, nbytes: int, status: int | None, retries: int):
+        """Record one API call: total latency including retries, response size, outcome and retry count."""
+        self.increment(endpoint, ticker, "requests")
+        self.observe(endpoint, ticker, "latency", latency)
+        self.observe(endpoint, ticker, "response_bytes", nbytes, SIZE_BUCKETS)
+        if retries:
+            self.increment(endpoint, ticker, "retries", retries)
+        if status is None or status >= 400:
+            self.increment(endpoint, ticker, "errors")
+
+    def record_page(self, endpoint: str, ticker: str):
+        """Count one page of a paginated fetch."""
+        self.increment(endpoint, ticker, "pages")
+
+    def snapshot(self, by_ticker: bool = False) -> dict[str, any]:
+        """
+        Get counters and histogram summaries per endpoint, plus seconds elapsed since the last reset.
+        With by_ticker, each endpoint is further split by ticker.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: _copy(histogram) for key, histogram in self._histograms.items()}
+            elapsed = time.monotonic() - self._started
+
+        endpoints: dict[str, dict] = {}
+        merged: dict[tuple, Histogram] = {}
+        for (endpoint, ticker, name), value in counters.items():
+            entry = endpoints.setdefault(endpoint, {})
+            entry = entry.setdefault(ticker, {}) if by_ticker else entry
+            entry[name] = entry.get(name, 0) + value
+        for (endpoint, ticker, name), histogram in histograms.items():
+            key = (endpoint, ticker, name) if by_ticker else (endpoint, name)
+            if key in merged:
+                merged[key].merge(histogram)
+            else:
+                merged[key] = histogram
+        for key, histogram in merged.items():
+            entry = endpoints.setdefault(key[0], {})
+            if by_ticker:
+                entry = entry.setdefault(key[1], {})
+            entry[key[-1]] = histogram.to_dict()
+        return {"elapsed": elapsed, "endpoints": endpoints}
+
+    def counter(self, name: str, endpoint: str | None = None, ticker: str | None = None) -> float:
+        """Sum a counter over all endpoints and tickers, or only the given ones."""
+        with self._lock:
+            return sum(value for (e, t, n), value in self._counters.items() if n == name and endpoint in (None, e) and ticker in (None, t))
+
+    def reset(self):
+        """Clear all counters and histograms and restart the elapsed clock."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = time.monotonic()
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    copy = Histogram(histogram.bounds)
+    copy.merge(histogram)
+    return copy
+
+
+# Global metrics instance
+_metrics = DataMetrics()
+
+
+def get_data_metrics() -> DataMetrics:
+    """Get the global data layer metrics instance."""
+    return _metrics
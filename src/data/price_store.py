@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ("open", "close", "high", "low", "volume")
+
+
+class PriceColumns:
+    """Columnar NumPy copy of one ticker's sorted price rows, sliced into DataFrames without re-parsing."""
+
+    def __init__(self, rows: list[dict[str, any]]):
+        # int64 nanoseconds since the epoch (UTC), ascending like the source rows
+        self.dates = pd.to_datetime([row["time"] for row in rows], utc=True).tz_convert(None).as_unit("ns").asi8
+        self.open = np.array([row["open"] for row in rows], dtype=np.float64)
+        self.close = np.array([row["close"] for row in rows], dtype=np.float64)
+        self.high = np.array([row["high"] for row in rows], dtype=np.float64)
+        self.low = np.array([row["low"] for row in rows], dtype=np.float64)
+        self.volume = np.array([row["volume"] for row in rows], dtype=np.int64)
+        # Frames are views onto these arrays, so make accidental in-place writes fail loudly
+        for column in (self.dates, *(getattr(self, name) for name in PRICE_COLUMNS)):
+            column.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the NumPy columns."""
+        return self.dates.nbytes + sum(getattr(self, name).nbytes for name in PRICE_COLUMNS)
+
+    def frame(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """Prices with start_date <= time <= end_date as a Date-indexed DataFrame sharing this store's arrays."""
+        lo = np.searchsorted(self.dates, pd.Timestamp(start_date).value, side="left")
+        hi = np.searchsorted(self.dates, pd.Timestamp(end_date).value, side="right")
+        index = pd.DatetimeIndex(self.dates[lo:hi].view("datetime64[ns]"), name="Date")
+        return pd.DataFrame({name: getattr(self, name)[lo:hi] for name in PRICE_COLUMNS}, index=index, copy=False)
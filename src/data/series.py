@@ -0,0 +1,136 @@
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Callable
+
+# Segments shorter than this are coalesced with the rows appended after them, bounding the segment count without copying large segments
+SEGMENT_ROWS = 256
+
+
+class SortedSeries:
+    """
+    A ticker's cached rows kept sorted by date, answering range queries by binary search.
+
+    Rows live in append-only segments: sorted runs that do not overlap each other, so adding newer (or older) data
+    creates a segment instead of copying every cached row. Only segments that overlap an out-of-order batch are rewritten.
+    """
+
+    def __init__(self, key: Callable[[dict], str], sort_key: Callable[[dict], str]):
+        self.key = key
+        self.sort_key = sort_key
+        self._keys: set = set()
+        # (segments, first sort keys, last sort keys, row offsets), swapped in together so readers never see them out of step;
+        # each segment is a (rows, sort keys) pair that is never modified once published
+        self._state: tuple[list[tuple[list[dict[str, any]], list[str]]], list[str], list[str], list[int]] = ([], [], [], [0])
+        # Concatenated rows of the current version, built on first use
+        self._rows: tuple[int, list[dict[str, any]]] = (0, [])
+        # Bumped on every change so derived views (e.g. columnar prices) know when to rebuild
+        self.version = 0
+        # Approximate memory held by the rows, sort keys and key index
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return self._state[3][-1]
+
+    @property
+    def segments(self) -> int:
+        return len(self._state[0])
+
+    @property
+    def rows(self) -> list[dict[str, any]]:
+        """All rows in ascending date order."""
+        version, rows = self._rows
+        if version != self.version:
+            version, segments = self.version, self._state[0]
+            rows = [row for segment_rows, _ in segments for row in segment_rows]
+            self._rows = (version, rows)
+        return rows
+
+    def merge(self, data: list[dict[str, any]]):
+        """Add rows whose key is not cached yet (nor repeated earlier in data), keeping the series sorted."""
+        new_rows = []
+        for item in data:
+            key = self.key(item)
+            if key not in self._keys:
+                self._keys.add(key)
+                new_rows.append(item)
+        if not new_rows:
+            return
+        self.nbytes += _rows_size(new_rows)
+
+        new_rows.sort(key=self.sort_key)
+        new_sort_keys = [self.sort_key(item) for item in new_rows]
+        segments, firsts, lasts, offsets = self._state
+        # Segments i..j-1 overlap the new rows' date range and are merged with them; usually none, as data is appended at either end
+        i = bisect_left(lasts, new_sort_keys[0])
+        j = bisect_right(firsts, new_sort_keys[-1])
+        if i == j == len(segments) and i and len(segments[-1][0]) < SEGMENT_ROWS:
+            # Appended after a short tail segment: extend a copy of it rather than starting another tiny one
+            i -= 1
+            new_rows, new_sort_keys = segments[i][0] + new_rows, segments[i][1] + new_sort_keys
+        elif i < j:
+            # Sorted runs; Timsort merges them in linear time
+            merged = sorted(zip([k for _, keys in segments[i:j] for k in keys] + new_sort_keys, [r for rows, _ in segments[i:j] for r in rows] + new_rows), key=lambda pair: pair[0])
+            new_rows, new_sort_keys = [row for _, row in merged], [key for key, _ in merged]
+        # Splice the index lists instead of rebuilding them; only offsets after the new segment shift
+        end = offsets[i] + len(new_rows)
+        shift = end - offsets[j]
+        self._state = (
+            segments[:i] + [(new_rows, new_sort_keys)] + segments[j:],
+            firsts[:i] + [new_sort_keys[0]] + firsts[j:],
+            lasts[:i] + [new_sort_keys[-1]] + lasts[j:],
+            offsets[: i + 1] + [end] + [offset + shift for offset in offsets[j + 1 :]],
+        )
+        self.version += 1
+
+    def range(self, start: str | None = None, end: str | None = None) -> list[dict[str, any]]:
+        """Rows with start <= date <= end in ascending order, in O(log n + k)."""
+        state = self._state
+        segments, _, _, offsets = state
+        lo, hi = _bounds(state, start, end)
+        if lo >= hi:
+            return []
+        first = bisect_right(offsets, lo) - 1
+        last = bisect_left(offsets, hi) - 1
+        if first == last:
+            return segments[first][0][lo - offsets[first]:hi - offsets[first]]
+        result = segments[first][0][lo - offsets[first]:]
+        for rows, _ in segments[first + 1:last]:
+            result.extend(rows)
+        result.extend(segments[last][0][:hi - offsets[last]])
+        return result
+
+    def bounds(self, start: str | None = None, end: str | None = None) -> tuple[int, int]:
+        """Slice [lo, hi) of rows with start <= date <= end."""
+        return _bounds(self._state, start, end)
+
+
+def _bounds(state: tuple, start: str | None, end: str | None) -> tuple[int, int]:
+    segments, firsts, lasts, offsets = state
+    lo, hi = 0, offsets[-1]
+    if start is not None:
+        # First segment holding a date >= start
+        i = bisect_left(lasts, start)
+        lo = offsets[i] + bisect_left(segments[i][1], start) if i < len(segments) else offsets[-1]
+    if end is not None:
+        # Last segment holding a date <= end
+        j = bisect_right(firsts, end) - 1
+        hi = offsets[j] + bisect_right(segments[j][1], end) if j >= 0 else 0
+    return lo, hi
+
+
+# Batches larger than this are sized from an evenly spaced sample of their rows
+SIZE_SAMPLE_ROWS = 32
+
+
+def _rows_size(rows: list[dict[str, any]]) -> int:
+    """Approximate bytes held by a batch of rows; sizing every value is slower than the merge itself for large batches."""
+    if len(rows) <= SIZE_SAMPLE_ROWS:
+        return sum(_row_size(row) for row in rows)
+    sample = rows[:: len(rows) // SIZE_SAMPLE_ROWS]
+    return sum(_row_size(row) for row in sample) * len(rows) // len(sample)
+
+
+def _row_size(row: dict[str, any]) -> int:
+    """Approximate bytes held by one cached row, including its slots in the row, sort key and key lists."""
+    # Field names are shared across rows, so only the dict and its values are counted
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values()) + 3 * 8
@@ -0,0 +1,58 @@
+"""
+Binary snapshot files of the in-memory cache, so a process (or container image) can start with a warm cache.
+
+Layout: a fixed header (magic, format version, CRC-32 and length of the body) followed by the body, a
+zlib-compressed pickle of the cached rows, fetched ranges and market caps. Pickle decodes several times faster
+than JSON; the body holds only built-in containers and scalars, and loading refuses anything else.
+"""
+
+import io
+import os
+import pickle
+import struct
+import zlib
+
+SNAPSHOT_MAGIC = b"AHFCACHE"
+# Bump whenever the body layout changes; older snapshots are then rejected instead of misread
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct(">8sHIQ")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is not a cache snapshot, has another format version, or is corrupt."""
+
+
+class _DataUnpickler(pickle.Unpickler):
+    """Unpickler for plain data: any class or function reference is rejected, so loading cannot run code."""
+
+    def find_class(self, module: str, name: str):
+        raise SnapshotError(f"Snapshot references {module}.{name}; only plain data is allowed")
+
+
+def write_snapshot(path: str, payload: dict[str, any], level: int = 6):
+    """Write a payload as a snapshot file, replacing any existing file only once it is complete."""
+    body = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), level)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, zlib.crc32(body), len(body)))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> dict[str, any]:
+    """Read and verify a snapshot file, returning its payload."""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        body = f.read()
+    if len(header) < _HEADER.size:
+        raise SnapshotError(f"{path} is not a cache snapshot")
+    magic, version, checksum, length = _HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a cache snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path} has snapshot format version {version}, expected {SNAPSHOT_VERSION}")
+    if len(body) != length or zlib.crc32(body) != checksum:
+        raise SnapshotError(f"{path} is truncated or corrupt")
+    return _DataUnpickler(io.BytesIO(zlib.decompress(body))).load()
@@ -8,11 +8,13 @@ import questionary
 from src.agents.portfolio_manager import portfolio_management_agent
 from src.agents.risk_manager import risk_management_agent
 from src.graph.state import AgentState
-from src.utils.display import print_trading_output
+from src.utils.display import print_data_metrics, print_trading_output
 from src.utils.analysts import ANALYST_ORDER, get_analyst_nodes
 from src.utils.progress import progress
 from src.llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
 from src.utils.ollama import ensure_ollama_and_model
+from src.data.cache import get_cache
+from src.data.metrics import get_data_metrics
 
 import argparse
 from datetime import datetime
@@ -51,6 +53,7 @@ def run_hedge_fund(
     selected_analysts: list[str] = [],
     model_name: str = "gpt-4o",
     model_provider: str = "OpenAI",
+    show_data_metrics: bool = False,
 ):
     # Start progress tracking
     progress.start()
@@ -92,6 +95,8 @@ def run_hedge_fund(
     finally:
         # Stop progress tracking
         progress.stop()
+        if show_data_metrics:
+            print_data_metrics(get_data_metrics().snapshot(), get_cache().get_memory_stats())
 
 
 def start(state: AgentState):
@@ -317,5 +322,6 @@ if __name__ == "__main__":
         selected_analysts=selected_analysts,
         model_name=model_name,
         model_provider=model_provider,
+        show_data_metrics=True,
     )
     print_trading_output(result)
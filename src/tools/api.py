@@ -1,10 +1,13 @@
+import asyncio
+import contextlib
 import datetime
-import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-import requests
 
-from data.cache import get_cache
-from data.models import (
+from src.data.cache import get_cache
+from src.data.metrics import get_data_metrics
+from src.data.models import (
     CompanyNews,
     CompanyNewsResponse,
     FinancialMetrics,
@@ -18,43 +21,101 @@ from data.models import (
     CompanyFactsResponse,
 )
 
-from src.tools.api_hk import api_hk  # Hong Kong Api Business
+from src.tools import api_hk  # Hong Kong Api Business
+from src.tools.api_client import get_api_client, get_async_api_client
+from src.tools.single_flight import async_single_flight, single_flight
 
 # Global cache instance
 _cache = get_cache()
 
+# Shared pooled HTTP client with retries and rate limiting
+_client = get_api_client()
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
-    """Fetch price data from cache or API."""
-    # Check cache first
-    if cached_data := _cache.get_prices(ticker):
-        # Filter cached data by date range and convert to Price objects
-        filtered_data = [Price(**price) for price in cached_data if start_date <= price["time"] <= end_date]
-        if filtered_data:
-            return filtered_data
-
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
+# Per-endpoint and per-ticker cache hit/miss and pagination counters
+_metrics = get_data_metrics()
+
+# Insider trade and news backfills are split into windows of this many days, fetched concurrently
+SYNC_WINDOW_DAYS = 90
+SYNC_MAX_WORKERS = 4
+
+# Start of the covered range when an unbounded request returned a ticker's whole history
+EARLIEST_DATE = "1900-01-01"
+
+# Bars for the last few days may be published late, so coverage after the last bar the API returned is only kept briefly
+PRICE_SETTLE_DAYS = 7
+
+# Tickers per request in search_line_items_batch
+LINE_ITEMS_BATCH_SIZE = 20
+
+# Paginated datasets: (endpoint, response model, response field, date field, end date param, start date param)
+_PAGED_DATASETS = {
+    "insider_trades": ("insider-trades", InsiderTradeResponse, "insider_trades", "filing_date", "filing_date_lte", "filing_date_gte"),
+    "company_news": ("news", CompanyNewsResponse, "news", "date", "end_date", "start_date"),
+}
+
+
+def _parse(response, ticker: str, model):
+    """Raise on an error response, else parse its JSON body with a Pydantic model."""
     if response.status_code != 200:
         raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+    return model(**response.json())
 
-    # Parse response with Pydantic model
-    price_response = PriceResponse(**response.json())
-    prices = price_response.prices
 
-    if not prices:
-        return []
+@single_flight
+def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    """Fetch price data from cache or API, only requesting date ranges not fetched before."""
+    _fetch_missing_prices(ticker, start_date, end_date)
+    return _cached_prices(ticker, start_date, end_date)
 
-    # Cache the results as dicts
-    _cache.set_prices(ticker, [p.model_dump() for p in prices])
-    return prices
+
+def _cached_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    # Cached series is kept sorted, so the window comes back in date order
+    return _cache.get_models("prices", ticker, Price, start_date, end_date)
+
+
+def _fetch_missing_prices(ticker: str, start_date: str, end_date: str):
+    """Fetch the sub-ranges of the window the cache has not covered yet."""
+    if not _missing_price_ranges(ticker, start_date, end_date):
+        return
+    with _cache.fetch_lock("prices", ticker):
+        # Look again: another process sharing the cache may have fetched some of the ranges meanwhile
+        for gap_start, gap_end in _cache.get_missing_ranges("prices", ticker, start_date, end_date):
+            _store_prices(ticker, gap_start, gap_end, _fetch_prices(ticker, gap_start, gap_end))
+
+
+def _missing_price_ranges(ticker: str, start_date: str, end_date: str) -> list[tuple[str, str]]:
+    missing_ranges = _cache.get_missing_ranges("prices", ticker, start_date, end_date)
+    _metrics.record_cache("prices", ticker, hit=not missing_ranges)
+    return missing_ranges
+
+
+def _store_prices(ticker: str, start_date: str, end_date: str, prices: list[Price]):
+    if prices:
+        # Cache the results as dicts
+        _cache.set_prices(ticker, [p.model_dump() for p in prices])
+    settled_until = None
+    if end_date >= (_today() - datetime.timedelta(days=PRICE_SETTLE_DAYS)).isoformat():
+        # Days after the last returned bar may still get one, so they are only covered briefly; older days without bars are weekends and holidays
+        yesterday = (_today() - datetime.timedelta(days=1)).isoformat()
+        settled_until = min(max(p.time for p in prices).split("T")[0], yesterday) if prices else EARLIEST_DATE
+    _cache.add_covered_range("prices", ticker, start_date, end_date, settled_until=settled_until)
 
 
+def _today() -> datetime.date:
+    return datetime.date.today()
+
+
+def _prices_url(ticker: str, start_date: str, end_date: str) -> str:
+    return f"/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
+
+
+def _fetch_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    """Fetch price data for a date range from the API."""
+    response = _client.get(_prices_url(ticker, start_date, end_date))
+    return _parse(response, ticker, PriceResponse).prices
+
+
+@single_flight
 def get_financial_metrics(
         ticker: str,
         end_date: str,
@@ -71,35 +132,48 @@ def get_financial_metrics(
 
     """美股业务"""
     # Check cache first
-    if cached_data := _cache.get_financial_metrics(ticker):
-        # Filter cached data by date and limit
-        filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
-        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
-        if filtered_data:
-            return filtered_data[:limit]
-
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+    if (cached_metrics := _cached_financial_metrics(ticker, end_date, period, limit)) is not None:
+        return cached_metrics
+
+    with _cache.fetch_lock("financial_metrics", ticker) as refreshed:
+        # Another process sharing the cache may have fetched them while this one waited
+        if refreshed and (cached_metrics := _cached_financial_metrics(ticker, end_date, period, limit)) is not None:
+            return cached_metrics
+
+        # If not in cache or insufficient data, fetch from API
+        response = _client.get(_financial_metrics_url(ticker, end_date, period, limit))
+        return _store_financial_metrics(ticker, end_date, period, _parse(response, ticker, FinancialMetricsResponse).financial_metrics)
 
-    # Parse response with Pydantic model
-    metrics_response = FinancialMetricsResponse(**response.json())
-    # Return the FinancialMetrics objects directly instead of converting to dict
-    financial_metrics = metrics_response.financial_metrics
 
+def _cached_financial_metrics(ticker: str, end_date: str, period: str, limit: int) -> list[FinancialMetrics] | None:
+    """Cached metrics up to end_date (latest report periods first, up to limit), or None on a miss."""
+    cached_metrics = _cache.get_models("financial_metrics", ticker, FinancialMetrics, end_date=end_date)
+    _metrics.record_cache("financial-metrics", ticker, hit=bool(cached_metrics))
+    if not cached_metrics:
+        return None
+    _index_market_cap(ticker, end_date, period, cached_metrics[-1].market_cap)
+    return cached_metrics[::-1][:limit]
+
+
+def _financial_metrics_url(ticker: str, end_date: str, period: str, limit: int) -> str:
+    return f"/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
+
+
+def _store_financial_metrics(ticker: str, end_date: str, period: str, financial_metrics: list[FinancialMetrics]) -> list[FinancialMetrics]:
     if not financial_metrics:
         return []
 
     # Cache the results as dicts
     _cache.set_financial_metrics(ticker, [m.model_dump() for m in financial_metrics])
+    _index_market_cap(ticker, end_date, period, financial_metrics[0].market_cap)
     return financial_metrics
 
+
+def _index_market_cap(ticker: str, end_date: str, period: str, market_cap: float | None):
+    """Remember the latest TTM market cap as of end_date so get_market_cap can skip rebuilding metrics."""
+    if period == "ttm" and market_cap:
+        _cache.set_market_cap(ticker, end_date, market_cap)
+
 """
 post 请求如下
 curl --request POST \
@@ -150,6 +224,7 @@ line_items = [
 {"search_results": [{"ticker": "AAPL", "report_period": "2025-03-29", "period": "ttm", "currency": "USD", "gross_profit": 186699000000.0, "revenue": 400366000000.0}]}
 
 """
+@single_flight
 def search_line_items(
         ticker: str,
         line_items: list[str],
@@ -157,184 +232,387 @@ def search_line_items(
         period: str = "ttm",
         limit: int = 10,
 ) -> list[LineItem]:
-    """Fetch line items from API."""
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = "https://api.financialdatasets.ai/financials/search/line-items"
-
-    body = {
-        "tickers": [ticker],
+    """Fetch line items from cache or API, only requesting line items not synced far enough back for this end date and limit."""
+    # Check cache first: line items are cached one by one per ticker and period, so earlier requests for any later end date are served locally
+    cache_key, missing_items = _cached_line_items(ticker, line_items, end_date, period, limit)
+    if missing_items:
+        with _cache.fetch_lock("line_items", cache_key) as refreshed:
+            if refreshed:
+                # Another process sharing the cache may have fetched some of them while this one waited
+                _, missing_items = _cached_line_items(ticker, line_items, end_date, period, limit)
+            if missing_items:
+                # If not in cache or insufficient data, fetch from API
+                _store_line_items(cache_key, _fetch_line_items(ticker, missing_items, end_date, period, limit), missing_items, end_date, limit)
+    return _line_items_result(cache_key, line_items, end_date, limit)
+
+
+def sync_line_items(
+        ticker: str,
+        line_items: list[str],
+        start_date: str,
+        end_date: str,
+        period: str = "ttm",
+        limit: int = 10,
+):
+    """Cache line items so that search_line_items is answered from the cache for every end date in [start_date, end_date]."""
+    search_line_items(ticker, line_items, end_date, period, limit)
+    cache_key = _line_items_cache_key(ticker, period)
+    # Each search syncs the `limit` reports before its end date; search again before the oldest of them until start_date is reached
+    while (synced_start := _line_items_synced_start(cache_key, line_items, end_date)) is not None and synced_start > start_date:
+        search_line_items(ticker, line_items, (datetime.date.fromisoformat(synced_start) - datetime.timedelta(days=1)).isoformat(), period, limit)
+    # The first days of the range need `limit` reports before them too
+    search_line_items(ticker, line_items, start_date, period, limit)
+
+
+def _cached_line_items(ticker: str, line_items: list[str], end_date: str, period: str, limit: int) -> tuple[str, list[str]]:
+    """Cache key and the line items still missing for a query."""
+    cache_key = _line_items_cache_key(ticker, period)
+    missing_items = [item for item in line_items if not _line_item_synced(cache_key, item, end_date, limit)]
+    _metrics.record_cache("financials/search/line-items", ticker, hit=not missing_items)
+    return cache_key, missing_items
+
+
+def _line_item_synced(cache_key: str, item: str, end_date: str, limit: int) -> bool:
+    """Whether the latest `limit` reports of a line item up to end_date are cached."""
+    if (synced_start := _line_item_synced_start(cache_key, item, end_date)) is None:
+        return False
+    # A search that returned fewer than `limit` reports synced the line item's whole history
+    return synced_start == EARLIEST_DATE or sum(row["line_item"] == item for row in _cache.get_range("line_items", cache_key, synced_start, end_date)) >= limit
+
+
+def _line_item_synced_start(cache_key: str, item: str, end_date: str) -> str | None:
+    """
+    First report period of the contiguous synced range of a line item that reaches end_date, or None if end_date is not synced.
+    Each search stores a sync row (report_period "", so it sorts before every report) with the report periods it fetched completely.
+    """
+    synced = sorted(tuple(row["synced"]) for row in _cache.get_range("line_items", cache_key, None, "") if row["line_item"] == item)
+    block = None
+    for start, end in synced:
+        if start > end_date:
+            break
+        if block and datetime.date.fromisoformat(start) <= datetime.date.fromisoformat(block[1]) + datetime.timedelta(days=1):
+            block = (block[0], max(block[1], end))
+        else:
+            block = (start, end)
+    return block[0] if block and block[1] >= end_date else None
+
+
+def _line_items_synced_start(cache_key: str, line_items: list[str], end_date: str) -> str | None:
+    """The latest _line_item_synced_start of several line items, or None if any of them is not synced at end_date."""
+    starts = [_line_item_synced_start(cache_key, item, end_date) for item in line_items]
+    return None if None in starts else max(starts)
+
+
+def _store_line_items(cache_key: str, search_results: list[LineItem], line_items: list[str], end_date: str, limit: int):
+    """Cache the results, one row per (report period, line item), plus a sync row per line item for the report periods they cover."""
+    search_results = search_results[:limit]
+    # Every report from the oldest one returned up to end_date is now cached; fewer than `limit` means there are no older ones
+    synced_start = EARLIEST_DATE if len(search_results) < limit else min([result.report_period for result in search_results] + [end_date])
+    # Sync rows are stored and expire with the rows of the same search, so the TTL applies to what they vouch for
+    sync_rows = [{"key": f"@{item}|{end_date}", "report_period": "", "line_item": item, "synced": [synced_start, end_date]} for item in line_items]
+    _cache.set_line_items(cache_key, _line_item_rows(search_results, line_items) + sync_rows)
+
+
+def _line_items_result(cache_key: str, line_items: list[str], end_date: str, limit: int) -> list[LineItem]:
+    """LineItems for a query, from reports rebuilt from the cached rows only when they change."""
+    view = _cache.get_view("line_items", cache_key, ("reports", tuple(sorted(line_items))), lambda series: _build_line_items(series.rows, line_items))
+    return [report for report in view or [] if report.report_period <= end_date][:limit]
+
+
+def _build_line_items(cached_data: list[dict[str, any]], line_items: list[str]) -> list[LineItem]:
+    """Rebuild one LineItem per report period, latest first."""
+    wanted = set(line_items)
+    reports: dict[str, dict] = {}
+    for row in reversed(cached_data):
+        if row["line_item"] not in wanted or not row["report_period"]:
+            continue
+        report = reports.setdefault(row["report_period"], {"ticker": row["ticker"], "report_period": row["report_period"], "period": row["period"], "currency": row["currency"]})
+        if "value" in row:
+            report[row["line_item"]] = row["value"]
+    return [LineItem(**report) for report in reports.values()]
+
+
+def _line_items_cache_key(ticker: str, period: str) -> str:
+    """Cache key for a ticker's line items; reports differ per period, and a query's end date and limit select from them."""
+    return f"{ticker}|{period}"
+
+
+def _line_item_rows(search_results: list[LineItem], line_items: list[str]) -> list[dict[str, any]]:
+    """Split search results into one cache row per (report period, line item)."""
+    rows = []
+    for result in search_results:
+        data = result.model_dump()
+        for item in line_items:
+            row = {
+                "key": f"{result.report_period}|{item}",
+                "ticker": result.ticker,
+                "report_period": result.report_period,
+                "period": result.period,
+                "currency": result.currency,
+                "line_item": item,
+            }
+            # Leave "value" out when the API did not return the field at all
+            if item in data:
+                row["value"] = data[item]
+            rows.append(row)
+    return rows
+
+
+def _line_items_body(tickers: list[str], line_items: list[str], end_date: str, period: str, limit: int) -> dict[str, any]:
+    return {
+        "tickers": tickers,
         "line_items": line_items,
         "end_date": end_date,
         "period": period,
         "limit": limit,
     }
-    response = requests.post(url, headers=headers, json=body)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-    data = response.json()
-    response_model = LineItemResponse(**data)
-    search_results = response_model.search_results
-    if not search_results:
-        return []
 
-    # Cache the results
-    return search_results[:limit]
 
+def _fetch_line_items(ticker: str, line_items: list[str], end_date: str, period: str, limit: int) -> list[LineItem]:
+    """Fetch line items from the API."""
+    response = _client.post("/financials/search/line-items", json=_line_items_body([ticker], line_items, end_date, period, limit))
+    return _parse(response, ticker, LineItemResponse).search_results
 
+
+def search_line_items_batch(
+        tickers: list[str],
+        line_items: list[str],
+        end_date: str,
+        period: str = "ttm",
+        limit: int = 10,
+) -> dict[str, list[LineItem]]:
+    """
+    search_line_items for many tickers, returned by ticker. Tickers missing the same line items from the cache are
+    fetched together, LINE_ITEMS_BATCH_SIZE tickers per request, instead of one request per ticker.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    with _line_items_locks(tickers, line_items, end_date, period, limit) as lookups:
+        for chunk, missing_items in _line_items_batches(lookups):
+            response = _client.post("/financials/search/line-items", json=_line_items_body(chunk, missing_items, end_date, period, limit * len(chunk)))
+            for ticker in _store_line_items_batch(lookups, chunk, missing_items, end_date, limit, _parse(response, ",".join(chunk), LineItemResponse).search_results):
+                _store_line_items(lookups[ticker][0], _fetch_line_items(ticker, missing_items, end_date, period, limit), missing_items, end_date, limit)
+        return {ticker: _line_items_result(lookups[ticker][0], line_items, end_date, limit) for ticker in tickers}
+
+
+@contextlib.contextmanager
+def _line_items_locks(tickers: list[str], line_items: list[str], end_date: str, period: str, limit: int):
+    """Cache lookups (cache key, missing line items) per ticker, held under the fetch locks of the tickers missing any."""
+    lookups = {ticker: _cached_line_items(ticker, line_items, end_date, period, limit) for ticker in tickers}
+    with contextlib.ExitStack() as stack:
+        # Locks are always taken in the same order so concurrent batches cannot deadlock
+        refreshed = [stack.enter_context(_cache.fetch_lock("line_items", cache_key)) for cache_key, missing_items in sorted(lookups.values()) if missing_items]
+        if any(refreshed):
+            # Another process sharing the cache may have fetched some of them while this one waited
+            lookups = {ticker: _cached_line_items(ticker, line_items, end_date, period, limit) for ticker in tickers}
+        yield lookups
+
+
+def _line_items_batches(lookups: dict[str, tuple[str, list[str]]]) -> list[tuple[list[str], list[str]]]:
+    """(tickers, line items) per request: tickers missing the same line items share requests of up to LINE_ITEMS_BATCH_SIZE tickers."""
+    groups: dict[tuple[str, ...], list[str]] = {}
+    for ticker, (_, missing_items) in lookups.items():
+        if missing_items:
+            groups.setdefault(tuple(missing_items), []).append(ticker)
+    return [(group[i : i + LINE_ITEMS_BATCH_SIZE], list(missing_items)) for missing_items, group in groups.items() for i in range(0, len(group), LINE_ITEMS_BATCH_SIZE)]
+
+
+def _store_line_items_batch(lookups: dict, tickers: list[str], line_items: list[str], end_date: str, limit: int, search_results: list[LineItem]) -> list[str]:
+    """Split a batched response by ticker and cache each ticker's results like search_line_items does, returning the tickers to fetch on their own."""
+    by_ticker: dict[str, list[LineItem]] = {ticker: [] for ticker in tickers}
+    for result in search_results:
+        by_ticker.setdefault(result.ticker, []).append(result)
+    # A full response may have cut some tickers' reports off, so only a shorter one shows that every ticker got all of its reports
+    complete = len(search_results) < limit * len(tickers)
+    truncated = []
+    for ticker in tickers:
+        if complete or len(by_ticker[ticker]) >= limit:
+            _store_line_items(lookups[ticker][0], by_ticker[ticker], line_items, end_date, limit)
+        else:
+            truncated.append(ticker)
+    return truncated
+
+
+@single_flight
 def get_insider_trades(
         ticker: str,
         end_date: str,
         start_date: str | None = None,
         limit: int = 1000,
 ) -> list[InsiderTrade]:
-    """Fetch insider trades from cache or API."""
-    # Check cache first
-    if cached_data := _cache.get_insider_trades(ticker):
-        # Filter cached data by date range
-        filtered_data = [InsiderTrade(**trade) for trade in cached_data
-                         if
-                         (start_date is None or (trade.get("transaction_date") or trade["filing_date"]) >= start_date)
-                         and (trade.get("transaction_date") or trade["filing_date"]) <= end_date]
-        filtered_data.sort(key=lambda x: x.transaction_date or x.filing_date, reverse=True)
-        if filtered_data:
-            return filtered_data
-
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    all_trades = []
-    current_end_date = end_date
-
-    while True:
-        url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={current_end_date}"
-        if start_date:
-            url += f"&filing_date_gte={start_date}"
-        url += f"&limit={limit}"
-
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-
-        data = response.json()
-        response_model = InsiderTradeResponse(**data)
-        insider_trades = response_model.insider_trades
-
-        if not insider_trades:
-            break
-
-        all_trades.extend(insider_trades)
-
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(insider_trades) < limit:
-            break
-
-        # Update end_date to the oldest filing date from current batch for next iteration
-        current_end_date = min(trade.filing_date for trade in insider_trades).split('T')[0]
-
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
-
-    if not all_trades:
-        return []
-
-    # Cache the results
-    _cache.set_insider_trades(ticker, [trade.model_dump() for trade in all_trades])
-    return all_trades
+    """Fetch insider trades from cache or API, only requesting filings newer than (or missing from) what was synced."""
+    _backfill("insider_trades", ticker, start_date, end_date, limit)
+    # Most recent trades first
+    return _cached_latest_first("insider_trades", ticker, start_date, end_date, limit, InsiderTrade)
 
 
+@single_flight
 def get_company_news(
         ticker: str,
         end_date: str,
         start_date: str | None = None,
         limit: int = 1000,
 ) -> list[CompanyNews]:
-    """Fetch company news from cache or API."""
-    # Check cache first
-    if cached_data := _cache.get_company_news(ticker):
-        # Filter cached data by date range
-        filtered_data = [CompanyNews(**news) for news in cached_data
-                         if (start_date is None or news["date"] >= start_date)
-                         and news["date"] <= end_date]
-        filtered_data.sort(key=lambda x: x.date, reverse=True)
-        if filtered_data:
-            return filtered_data
-
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    all_news = []
+    """Fetch company news from cache or API, only requesting news newer than (or missing from) what was synced."""
+    _backfill("company_news", ticker, start_date, end_date, limit)
+    # Most recent news first
+    return _cached_latest_first("company_news", ticker, start_date, end_date, limit, CompanyNews)
+
+
+def _cached_latest_first(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int, model) -> list:
+    """Cached items in [start_date, end_date], newest first; without a start_date, the latest `limit` like a single API page."""
+    models = _cache.get_models(dataset, ticker, model, start_date, end_date)[::-1]
+    return models if start_date else models[:limit]
+
+
+def _backfill(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int):
+    """Bring a ticker's cached filings or news up to date for [start_date, end_date], fetching windows concurrently."""
+    windows = _backfill_windows(dataset, ticker, start_date, end_date, limit)
+    _metrics.record_cache(_PAGED_DATASETS[dataset][0], ticker, hit=not windows)
+    if not windows:
+        return
+    with _cache.fetch_lock(dataset, ticker) as refreshed:
+        if refreshed:
+            # Another process sharing the cache may have synced part of it while this one waited
+            windows = _backfill_windows(dataset, ticker, start_date, end_date, limit)
+        if len(windows) == 1:
+            _fetch_window(dataset, ticker, *windows[0], limit)
+        elif windows:
+            with ThreadPoolExecutor(max_workers=min(SYNC_MAX_WORKERS, len(windows))) as executor:
+                futures = [executor.submit(_fetch_window, dataset, ticker, window_start, window_end, limit) for window_start, window_end in windows]
+                for future in futures:
+                    future.result()
+
+
+def _backfill_windows(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int) -> list[tuple[str | None, str]]:
+    """
+    Windows still to fetch for [start_date, end_date].
+    Without a start_date only items newer than the high-water mark are needed, plus the latest items before the synced
+    range when it holds fewer than `limit`; deep backfills are split into SYNC_WINDOW_DAYS windows so they can be fetched concurrently.
+    """
+    if start_date:
+        gaps = _cache.get_missing_ranges(dataset, ticker, start_date, end_date)
+    elif (mark := _cache.get_high_water_mark(dataset, ticker, end_date)) is None:
+        gaps = [(None, end_date)]
+    else:
+        gaps = [((datetime.date.fromisoformat(mark) + datetime.timedelta(days=1)).isoformat(), end_date)] if mark < end_date else []
+        # A narrow start_date sync leaves the synced range short of the latest `limit` items, so fetch the ones before it
+        synced_start = _cache.get_covered_range(dataset, ticker, mark)[0]
+        if synced_start > EARLIEST_DATE and len(_cache.get_range(dataset, ticker, synced_start, end_date)) < limit:
+            gaps.append((None, (datetime.date.fromisoformat(synced_start) - datetime.timedelta(days=1)).isoformat()))
+    return [window for gap_start, gap_end in gaps for window in _split_range(gap_start, gap_end, SYNC_WINDOW_DAYS)]
+
+
+def _fetch_window(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int):
+    """Fetch one window, paging backwards from end_date, and cache it."""
+    endpoint, model, field, date_field, _, _ = _PAGED_DATASETS[dataset]
+    all_items = []
     current_end_date = end_date
-
-    while True:
-        url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={current_end_date}"
-        if start_date:
-            url += f"&start_date={start_date}"
-        url += f"&limit={limit}"
-
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-
-        data = response.json()
-        response_model = CompanyNewsResponse(**data)
-        company_news = response_model.news
-
-        if not company_news:
-            break
-
-        all_news.extend(company_news)
-
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(company_news) < limit:
-            break
-
-        # Update end_date to the oldest date from current batch for next iteration
-        current_end_date = min(news.date for news in company_news).split('T')[0]
-
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
-
-    if not all_news:
-        return []
-
-    # Cache the results
-    _cache.set_company_news(ticker, [news.model_dump() for news in all_news])
-    return all_news
-
-
+    while current_end_date is not None:
+        response = _client.get(_page_url(dataset, ticker, start_date, current_end_date, limit))
+        page = getattr(_parse(response, ticker, model), field)
+        _metrics.record_page(endpoint, ticker)
+        all_items.extend(page)
+        current_end_date = _next_page_end(start_date, current_end_date, [getattr(item, date_field) for item in page], limit)
+    _store_window(dataset, ticker, start_date, end_date, limit, all_items)
+
+
+def _page_url(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int) -> str:
+    endpoint, _, _, _, end_param, start_param = _PAGED_DATASETS[dataset]
+    url = f"/{endpoint}/?ticker={ticker}&{end_param}={end_date}"
+    if start_date:
+        url += f"&{start_param}={start_date}"
+    return url + f"&limit={limit}"
+
+
+def _next_page_end(start_date: str | None, current_end_date: str, dates: list[str], limit: int) -> str | None:
+    """End date of the next page to request, or None when pagination is done."""
+    # Only continue pagination if we have a start_date and got a full page
+    if not start_date or len(dates) < limit:
+        return None
+    # Continue from the oldest date of the current batch
+    next_end_date = min(dates).split("T")[0]
+    # If we've reached or passed the start_date, or a whole page shares one date, we can stop
+    if next_end_date <= start_date or next_end_date >= current_end_date:
+        return None
+    return next_end_date
+
+
+def _store_window(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int, items: list):
+    """Cache a fetched window's items and mark the fully fetched part of it as covered."""
+    if items:
+        # Cache the results as dicts via set_insider_trades / set_company_news
+        getattr(_cache, f"set_{dataset}")(ticker, [item.model_dump() for item in items])
+    date_field = _PAGED_DATASETS[dataset][3]
+    _cache.add_covered_range(dataset, ticker, _covered_start(start_date, [getattr(item, date_field) for item in items], limit), end_date)
+
+
+def _covered_start(start_date: str | None, dates: list[str], limit: int) -> str:
+    """Start of the range fully fetched by an unbounded (latest `limit` items) request, or start_date if one was given."""
+    if start_date:
+        return start_date
+    if len(dates) < limit:
+        # The API returned everything up to end_date
+        return EARLIEST_DATE
+    # A full page may have cut the oldest day short, so only the days after it are complete
+    return (datetime.date.fromisoformat(min(dates).split("T")[0]) + datetime.timedelta(days=1)).isoformat()
+
+
+def _split_range(start_date: str | None, end_date: str, days: int) -> list[tuple[str | None, str]]:
+    """Split [start_date, end_date] into consecutive windows of at most `days` days, newest first."""
+    if start_date is None:
+        return [(None, end_date)]
+    windows = []
+    start = datetime.date.fromisoformat(start_date)
+    window_end = datetime.date.fromisoformat(end_date)
+    while window_end >= start:
+        window_start = max(start, window_end - datetime.timedelta(days=days - 1))
+        windows.append((window_start.isoformat(), window_end.isoformat()))
+        window_end = window_start - datetime.timedelta(days=1)
+    return windows
+
+
+@single_flight
 def get_market_cap(
         ticker: str,
         end_date: str,
 ) -> float | None:
-    """Fetch market cap from the API."""
+    """Fetch market cap from cache or API."""
     # Check if end_date is today
     if end_date == datetime.datetime.now().strftime("%Y-%m-%d"):
+        # Live market caps are reused for a few minutes instead of asking company facts once per agent
+        if (market_cap := _cached_live_market_cap(ticker)) is not None:
+            return market_cap
+
         # Get the market cap from company facts API
-        headers = {}
-        if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-            headers["X-API-KEY"] = api_key
+        return _store_live_market_cap(ticker, _client.get(f"/company/facts/?ticker={ticker}"))
+
+    # Point-in-time index, filled whenever TTM metrics are fetched for this date
+    if (market_cap := _cache.get_market_cap(ticker, end_date)) is not None:
+        return market_cap
+
+    return _market_cap_from_metrics(get_financial_metrics(ticker, end_date))
 
-        url = f"https://api.financialdatasets.ai/company/facts/?ticker={ticker}"
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            print(f"Error fetching company facts: {ticker} - {response.status_code}")
-            return None
 
-        data = response.json()
-        response_model = CompanyFactsResponse(**data)
-        return response_model.company_facts.market_cap
+def _cached_live_market_cap(ticker: str) -> float | None:
+    market_cap = _cache.get_live_market_cap(ticker)
+    _metrics.record_cache("company/facts", ticker, hit=market_cap is not None)
+    return market_cap
+
+
+def _store_live_market_cap(ticker: str, response) -> float | None:
+    if response.status_code != 200:
+        print(f"Error fetching company facts: {ticker} - {response.status_code}")
+        return None
 
-    financial_metrics = get_financial_metrics(ticker, end_date)
+    data = response.json()
+    response_model = CompanyFactsResponse(**data)
+    market_cap = response_model.company_facts.market_cap
+    if market_cap is not None:
+        _cache.set_live_market_cap(ticker, market_cap)
+    return market_cap
+
+
+def _market_cap_from_metrics(financial_metrics: list[FinancialMetrics]) -> float | None:
     if not financial_metrics:
         return None
 
@@ -358,7 +636,171 @@ def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     return df
 
 
-# Update the get_price_data function to use the new functions
+@single_flight
 def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
\ No newline at end of file
+    """Get prices as a DataFrame straight from the columnar price cache, skipping Price models."""
+    _fetch_missing_prices(ticker, start_date, end_date)
+    return _cache.get_price_frame(ticker, start_date, end_date)
+
+
+# Async variants of the functions above, sharing their cache and helpers
+
+
+@async_single_flight
+async def aget_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    """Async get_prices."""
+    await _afetch_missing_prices(ticker, start_date, end_date)
+    return _cached_prices(ticker, start_date, end_date)
+
+
+async def _afetch_missing_prices(ticker: str, start_date: str, end_date: str):
+    if not _missing_price_ranges(ticker, start_date, end_date):
+        return
+    client = get_async_api_client()
+
+    async def fetch(gap_start: str, gap_end: str):
+        response = await client.get(_prices_url(ticker, gap_start, gap_end))
+        _store_prices(ticker, gap_start, gap_end, _parse(response, ticker, PriceResponse).prices)
+
+    async with _cache.afetch_lock("prices", ticker):
+        await asyncio.gather(*(fetch(gap_start, gap_end) for gap_start, gap_end in _cache.get_missing_ranges("prices", ticker, start_date, end_date)))
+
+
+@async_single_flight
+async def aget_financial_metrics(
+        ticker: str,
+        end_date: str,
+        period: str = "ttm",
+        limit: int = 10,
+) -> list[FinancialMetrics]:
+    """Async get_financial_metrics."""
+    if "HK" in ticker.upper():
+        # 港股走本地财报计算，放到线程中执行以免阻塞事件循环
+        return await asyncio.to_thread(api_hk.get_financial_metrics_hk, ticker)
+
+    if (cached_metrics := _cached_financial_metrics(ticker, end_date, period, limit)) is not None:
+        return cached_metrics
+
+    async with _cache.afetch_lock("financial_metrics", ticker) as refreshed:
+        if refreshed and (cached_metrics := _cached_financial_metrics(ticker, end_date, period, limit)) is not None:
+            return cached_metrics
+        response = await get_async_api_client().get(_financial_metrics_url(ticker, end_date, period, limit))
+        return _store_financial_metrics(ticker, end_date, period, _parse(response, ticker, FinancialMetricsResponse).financial_metrics)
+
+
+@async_single_flight
+async def asearch_line_items(
+        ticker: str,
+        line_items: list[str],
+        end_date: str,
+        period: str = "ttm",
+        limit: int = 10,
+) -> list[LineItem]:
+    """Async search_line_items."""
+    cache_key, missing_items = _cached_line_items(ticker, line_items, end_date, period, limit)
+    if missing_items:
+        async with _cache.afetch_lock("line_items", cache_key) as refreshed:
+            if refreshed:
+                _, missing_items = _cached_line_items(ticker, line_items, end_date, period, limit)
+            if missing_items:
+                response = await get_async_api_client().post("/financials/search/line-items", json=_line_items_body([ticker], missing_items, end_date, period, limit))
+                _store_line_items(cache_key, _parse(response, ticker, LineItemResponse).search_results, missing_items, end_date, limit)
+    return _line_items_result(cache_key, line_items, end_date, limit)
+
+
+async def asearch_line_items_batch(
+        tickers: list[str],
+        line_items: list[str],
+        end_date: str,
+        period: str = "ttm",
+        limit: int = 10,
+) -> dict[str, list[LineItem]]:
+    """Async search_line_items_batch; the batched requests are awaited together."""
+    tickers = list(dict.fromkeys(tickers))
+    client = get_async_api_client()
+
+    async def fetch(chunk: list[str], missing_items: list[str]):
+        response = await client.post("/financials/search/line-items", json=_line_items_body(chunk, missing_items, end_date, period, limit * len(chunk)))
+        truncated = _store_line_items_batch(lookups, chunk, missing_items, end_date, limit, _parse(response, ",".join(chunk), LineItemResponse).search_results)
+        responses = await asyncio.gather(*(client.post("/financials/search/line-items", json=_line_items_body([ticker], missing_items, end_date, period, limit)) for ticker in truncated))
+        for ticker, response in zip(truncated, responses):
+            _store_line_items(lookups[ticker][0], _parse(response, ticker, LineItemResponse).search_results, missing_items, end_date, limit)
+
+    # Shared-cache locks are file locks taken on a worker thread, so hold them there for the whole batch
+    async with contextlib.AsyncExitStack() as stack:
+        lookups = await asyncio.to_thread(stack.enter_context, _line_items_locks(tickers, line_items, end_date, period, limit))
+        await asyncio.gather(*(fetch(chunk, missing_items) for chunk, missing_items in _line_items_batches(lookups)))
+        return {ticker: _line_items_result(lookups[ticker][0], line_items, end_date, limit) for ticker in tickers}
+
+
+@async_single_flight
+async def aget_insider_trades(
+        ticker: str,
+        end_date: str,
+        start_date: str | None = None,
+        limit: int = 1000,
+) -> list[InsiderTrade]:
+    """Async get_insider_trades."""
+    await _abackfill("insider_trades", ticker, start_date, end_date, limit)
+    return _cached_latest_first("insider_trades", ticker, start_date, end_date, limit, InsiderTrade)
+
+
+@async_single_flight
+async def aget_company_news(
+        ticker: str,
+        end_date: str,
+        start_date: str | None = None,
+        limit: int = 1000,
+) -> list[CompanyNews]:
+    """Async get_company_news."""
+    await _abackfill("company_news", ticker, start_date, end_date, limit)
+    return _cached_latest_first("company_news", ticker, start_date, end_date, limit, CompanyNews)
+
+
+async def _abackfill(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int):
+    windows = _backfill_windows(dataset, ticker, start_date, end_date, limit)
+    _metrics.record_cache(_PAGED_DATASETS[dataset][0], ticker, hit=not windows)
+    if not windows:
+        return
+    async with _cache.afetch_lock(dataset, ticker) as refreshed:
+        if refreshed:
+            windows = _backfill_windows(dataset, ticker, start_date, end_date, limit)
+        await asyncio.gather(*(_afetch_window(dataset, ticker, window_start, window_end, limit) for window_start, window_end in windows))
+
+
+async def _afetch_window(dataset: str, ticker: str, start_date: str | None, end_date: str, limit: int):
+    endpoint, model, field, date_field, _, _ = _PAGED_DATASETS[dataset]
+    client = get_async_api_client()
+    all_items = []
+    current_end_date = end_date
+    while current_end_date is not None:
+        response = await client.get(_page_url(dataset, ticker, start_date, current_end_date, limit))
+        page = getattr(_parse(response, ticker, model), field)
+        _metrics.record_page(endpoint, ticker)
+        all_items.extend(page)
+        current_end_date = _next_page_end(start_date, current_end_date, [getattr(item, date_field) for item in page], limit)
+    _store_window(dataset, ticker, start_date, end_date, limit, all_items)
+
+
+@async_single_flight
+async def aget_market_cap(
+        ticker: str,
+        end_date: str,
+) -> float | None:
+    """Async get_market_cap."""
+    if end_date == datetime.datetime.now().strftime("%Y-%m-%d"):
+        if (market_cap := _cached_live_market_cap(ticker)) is not None:
+            return market_cap
+        return _store_live_market_cap(ticker, await get_async_api_client().get(f"/company/facts/?ticker={ticker}"))
+
+    if (market_cap := _cache.get_market_cap(ticker, end_date)) is not None:
+        return market_cap
+
+    return _market_cap_from_metrics(await aget_financial_metrics(ticker, end_date))
+
+
+@async_single_flight
+async def aget_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """Async get_price_data."""
+    await _afetch_missing_prices(ticker, start_date, end_date)
+    return _cache.get_price_frame(ticker, start_date, end_date)
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Status returned for injected failures; it is in RETRY_STATUS_CODES so the client's retry path is exercised
+INJECTED_ERROR_STATUS = 503
+
+
+def request_key(method: str, url: str, body: bytes | str | None = None) -> str:
+    """Stable archive key for a request: method, path, sorted query and canonical JSON body (host and headers are ignored)."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+    raw = f"{method.upper()} {parts.path.rstrip('/')}?{query}\n{body or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseArchive:
+    """Directory of recorded API responses, one JSON file per request key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def save(self, method: str, url: str, body: bytes | str | None, status: int, content: bytes, content_type: str | None = None):
+        """Store a response, replacing any earlier recording of the same request unless that succeeded and this did not."""
+        key = request_key(method, url, body)
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        record = {
+            "method": method.upper(),
+            "url": url,
+            "body": body,
+            "status": status,
+            "content_type": content_type,
+            "content": content.decode("utf-8"),
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            # A retried rate limit or upstream failure must not overwrite the good response recorded earlier
+            if not _is_success(status) and (existing := self.load(method, url, body)) is not None and _is_success(existing["status"]):
+                return
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def load(self, method: str, url: str, body: bytes | str | None = None) -> dict[str, any] | None:
+        """Get the recording for a request, or None if it was never recorded."""
+        try:
+            with open(self._path(request_key(method, url, body)), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def _is_success(status: int) -> bool:
+    return 200 <= status < 300
+
+
+class FaultInjector:
+    """Adds latency and random failures to simulate a slow or flaky upstream."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0):
+        """
+        :param latency: Seconds added to every response.
+        :param jitter: Up to this many extra seconds, drawn uniformly per response.
+        :param error_rate: Fraction of responses (0-1) replaced by a 503.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def next_delay(self) -> float:
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def delay(self):
+        if wait := self.next_delay():
+            time.sleep(wait)
+
+    async def delay_async(self):
+        if wait := self.next_delay():
+            await asyncio.sleep(wait)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTP adapter that sends requests as usual and writes every response to an archive."""
+
+    def __init__(self, archive: ResponseArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = super().send(request, **kwargs)
+        self.archive.save(request.method, request.url, request.body, response.status_code, response.content, response.headers.get("Content-Type"))
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers requests from an archive without touching the network."""
+
+    def __init__(self, archive: ResponseArchive, faults: FaultInjector | None = None):
+        super().__init__()
+        self.archive = archive
+        self.faults = faults or FaultInjector()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.faults.delay()
+        if self.faults.should_fail():
+            return _build_response(request, INJECTED_ERROR_STATUS, b'{"error": "injected failure"}')
+        record = self.archive.load(request.method, request.url, request.body)
+        if record is None:
+            return _build_response(request, 404, json.dumps({"error": f"no recording for {request.method} {request.url}"}).encode("utf-8"))
+        return _build_response(request, record["status"], record["content"].encode("utf-8"), record.get("content_type"))
+
+    def close(self):
+        pass
+
+
+class AsyncArchiveTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records responses from an inner transport, or replays them from an archive when there is none."""
+
+    def __init__(self, archive: ResponseArchive, inner: httpx.AsyncBaseTransport | None = None, faults: FaultInjector | None = None):
+        self.archive = archive
+        self.inner = inner
+        self.faults = faults or FaultInjector()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        method, url, body = request.method, str(request.url), request.content
+        if self.inner is not None:
+            response = await self.inner.handle_async_request(request)
+            # aread() returns the decoded body, so drop the headers that described the encoded one
+            content = await response.aread()
+            self.archive.save(method, url, body, response.status_code, content, response.headers.get("Content-Type"))
+            headers = [(name, value) for name, value in response.headers.items() if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+            return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+        await self.faults.delay_async()
+        if self.faults.should_fail():
+            return httpx.Response(INJECTED_ERROR_STATUS, json={"error": "injected failure"}, request=request)
+        record = self.archive.load(method, url, body)
+        if record is None:
+            return httpx.Response(404, json={"error": f"no recording for {method} {url}"}, request=request)
+        return httpx.Response(record["status"], headers={"Content-Type": record.get("content_type") or "application/json"}, content=record["content"].encode("utf-8"), request=request)
+
+    async def aclose(self):
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+def _build_response(request: requests.PreparedRequest, status: int, content: bytes, content_type: str | None = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = content
+    response.headers = CaseInsensitiveDict({"Content-Type": content_type or "application/json"})
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
@@ -0,0 +1,347 @@
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+import weakref
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from src.data.metrics import get_data_metrics
+from src.tools.api_archive import AsyncArchiveTransport, FaultInjector, RecordingAdapter, ReplayAdapter, ResponseArchive
+
+load_dotenv()
+
+BASE_URL = "https://api.financialdatasets.ai"
+
+# Status codes worth retrying: rate limited or transient upstream failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Client-side rate limiter allowing `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available (returning 0), else return the seconds until the next one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while (wait := self._take()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a token is available, then take it."""
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+
+class _RetryingClient:
+    """Settings and backoff policy shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+        timeout: float = 30.0,
+        bucket: TokenBucket | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._bucket = bucket or (TokenBucket(rate_limit, burst or max(1.0, rate_limit)) if rate_limit and rate_limit > 0 else None)
+
+    def _url(self, path: str) -> str:
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    def _headers(self) -> dict[str, str]:
+        headers = {}
+        if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+            headers["X-API-KEY"] = api_key
+        return headers
+
+    def _backoff(self, attempt: int, response: requests.Response | httpx.Response | None = None) -> float:
+        """Delay before the next attempt: Retry-After if the server sent one, else exponential backoff with full jitter."""
+        if response is not None and (retry_after := _parse_retry_after(response.headers.get("Retry-After"))) is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+
+class FinancialDatasetsClient(_RetryingClient):
+    """Shared HTTP client for financialdatasets.ai with connection pooling, retries and rate limiting."""
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+        pool_size: int = 32,
+        timeout: float = 30.0,
+        adapter: BaseAdapter | None = None,
+        bucket: TokenBucket | None = None,
+    ):
+        """
+        :param base_url: API root that request paths are joined to.
+        :param max_retries: Retries after the first attempt for 429/5xx responses and connection errors.
+        :param backoff_base: First backoff delay in seconds, doubled on each retry.
+        :param backoff_max: Upper bound for a single backoff delay in seconds.
+        :param rate_limit: Requests per second allowed by the plan (None or <= 0 disables limiting).
+        :param burst: Requests allowed back to back before rate limiting kicks in.
+        :param pool_size: Keep-alive connections kept open to the API.
+        :param timeout: Per-request timeout in seconds.
+        :param adapter: Transport to mount instead of a pooled HTTPAdapter (e.g. to record or replay responses).
+        :param bucket: Rate limiter to share with another client instead of creating one from rate_limit and burst.
+        """
+        super().__init__(base_url, max_retries, backoff_base, backoff_max, rate_limit, burst, timeout, bucket)
+        self._session = requests.Session()
+        adapter = adapter or HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying rate-limited and transient failures.
+        Returns the final response (which may still be an error) so callers keep their own status handling.
+        """
+        url = self._url(path)
+        headers = {**self._headers(), **kwargs.pop("headers", {})}
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint, ticker = _labels(url, kwargs.get("json"))
+        started = time.monotonic()
+
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                response = self._session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    get_data_metrics().record_request(endpoint, ticker, time.monotonic() - started, 0, None, attempt)
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                get_data_metrics().record_request(endpoint, ticker, time.monotonic() - started, len(response.content), response.status_code, attempt)
+                return response
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self._session.close()
+
+
+class AsyncFinancialDatasetsClient(_RetryingClient):
+    """Async counterpart of FinancialDatasetsClient on a pooled httpx.AsyncClient, with the same retries and rate limiting."""
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+        pool_size: int = 100,
+        timeout: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+        bucket: TokenBucket | None = None,
+    ):
+        """
+        Same parameters as FinancialDatasetsClient, except:
+        :param pool_size: Connections kept open to the API; requests beyond it wait for a free connection.
+        :param transport: httpx transport to use instead of a pooled HTTP transport (e.g. to record or replay responses).
+        """
+        super().__init__(base_url, max_retries, backoff_base, backoff_max, rate_limit, burst, timeout, bucket)
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client = httpx.AsyncClient(limits=limits, timeout=timeout, transport=transport or httpx.AsyncHTTPTransport(limits=limits))
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying rate-limited and transient failures without blocking the event loop.
+        Returns the final response (which may still be an error) so callers keep their own status handling.
+        """
+        url = self._url(path)
+        headers = {**self._headers(), **kwargs.pop("headers", {})}
+        endpoint, ticker = _labels(url, kwargs.get("json"))
+        started = time.monotonic()
+
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                await self._bucket.acquire_async()
+            try:
+                response = await self._client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    get_data_metrics().record_request(endpoint, ticker, time.monotonic() - started, 0, None, attempt)
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                get_data_metrics().record_request(endpoint, ticker, time.monotonic() - started, len(response.content), response.status_code, attempt)
+                return response
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _labels(url: str, body: dict | None) -> tuple[str, str | None]:
+    """Metrics labels for a request: the endpoint path and the ticker(s) from the query string or JSON body."""
+    parts = urlsplit(url)
+    tickers = parse_qs(parts.query).get("ticker") or (body or {}).get("tickers") or []
+    return parts.path.strip("/"), ",".join(tickers) or None
+
+
+def _float_env(name: str, default: float | None) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _archive_from_env() -> tuple[str, ResponseArchive | None, FaultInjector | None]:
+    """
+    Record/replay settings from FINANCIAL_DATASETS_MODE:
+    - live (default): plain pooled HTTP
+    - record: HTTP, writing every response to FINANCIAL_DATASETS_ARCHIVE
+    - replay: serve responses from FINANCIAL_DATASETS_ARCHIVE with no network access, adding
+      FINANCIAL_DATASETS_REPLAY_LATENCY (+ up to FINANCIAL_DATASETS_REPLAY_JITTER) seconds and failing
+      FINANCIAL_DATASETS_REPLAY_ERROR_RATE of requests with a 503
+    """
+    mode = os.getenv("FINANCIAL_DATASETS_MODE", "live").lower()
+    if mode not in ("live", "record", "replay"):
+        raise ValueError(f"Unknown FINANCIAL_DATASETS_MODE: {mode}")
+    if mode == "live":
+        return mode, None, None
+    archive = ResponseArchive(os.getenv("FINANCIAL_DATASETS_ARCHIVE", os.path.join(".cache", "api_archive")))
+    faults = FaultInjector(
+        latency=_float_env("FINANCIAL_DATASETS_REPLAY_LATENCY", 0.0),
+        jitter=_float_env("FINANCIAL_DATASETS_REPLAY_JITTER", 0.0),
+        error_rate=_float_env("FINANCIAL_DATASETS_REPLAY_ERROR_RATE", 0.0),
+    )
+    return mode, archive, faults
+
+
+def _adapter_from_env(pool_size: int = 32) -> BaseAdapter | None:
+    """requests transport for the FINANCIAL_DATASETS_MODE (None = default pooled HTTP)."""
+    mode, archive, faults = _archive_from_env()
+    if mode == "record":
+        return RecordingAdapter(archive, pool_connections=pool_size, pool_maxsize=pool_size)
+    if mode == "replay":
+        return ReplayAdapter(archive, faults)
+    return None
+
+
+def _async_transport_from_env(pool_size: int = 100) -> httpx.AsyncBaseTransport | None:
+    """httpx transport for the FINANCIAL_DATASETS_MODE (None = default pooled HTTP)."""
+    mode, archive, faults = _archive_from_env()
+    if mode == "record":
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        return AsyncArchiveTransport(archive, inner=httpx.AsyncHTTPTransport(limits=limits))
+    if mode == "replay":
+        return AsyncArchiveTransport(archive, faults=faults)
+    return None
+
+
+# Global client instance, sized by environment:
+# FINANCIAL_DATASETS_RATE_LIMIT (requests/second, 0 disables), FINANCIAL_DATASETS_BURST, FINANCIAL_DATASETS_MAX_RETRIES,
+# FINANCIAL_DATASETS_BASE_URL (e.g. a local replay server) and FINANCIAL_DATASETS_MODE (see _archive_from_env)
+_client = FinancialDatasetsClient(
+    base_url=os.getenv("FINANCIAL_DATASETS_BASE_URL", BASE_URL),
+    rate_limit=_float_env("FINANCIAL_DATASETS_RATE_LIMIT", 10.0),
+    burst=_float_env("FINANCIAL_DATASETS_BURST", None),
+    max_retries=int(_float_env("FINANCIAL_DATASETS_MAX_RETRIES", 5)),
+    adapter=_adapter_from_env(),
+)
+
+# Async clients, one per event loop (httpx connections belong to the loop that opened them)
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncFinancialDatasetsClient] = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_api_client() -> FinancialDatasetsClient:
+    """Get the global API client instance."""
+    return _client
+
+
+def get_async_api_client() -> AsyncFinancialDatasetsClient:
+    """Get the async API client for the running event loop, sharing the global client's settings and rate limit."""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        if (client := _async_clients.get(loop)) is None:
+            client = _async_clients[loop] = AsyncFinancialDatasetsClient(
+                base_url=_client.base_url,
+                max_retries=_client.max_retries,
+                timeout=_client.timeout,
+                transport=_async_transport_from_env(),
+                bucket=_client._bucket,
+            )
+        return client
+
+
+async def aclose_async_api_client():
+    """Close the async API client of the running event loop, if one was opened; call before the loop shuts down."""
+    with _async_clients_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -1,19 +1,27 @@
 # api_hk.py
 import os
 import sys
+import threading
+import time
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
 from typing import List
+from pydantic import TypeAdapter
 from sqlalchemy.dialects.mysql import DATETIME
+from src.data.metrics import get_data_metrics
 from src.data.models import FinancialMetrics
 from src.tools.financial_mapping_hk import (
     STANDARD_MAPPING,
     METRICS_CALCULATION,
     REPORT_PERIOD_MAPPING,
-    CURRENCY_MAPPING
+    CURRENCY_MAPPING,
+    GROWTH_MAPPING
 )
 
 from src.tools.logger import logger
+from src.tools.statement_cache import cached_sheet
+from src.tools.header_dates import convert_to_datetime, parse_date_headers
 from src.futu.futu_market import FutuMarket # futu api
 
 # 获取环境变量
@@ -23,21 +31,38 @@ load_dotenv()
 DATA_SET_DIR = os.getenv("DATA_SET_DIR", "./DataSet")
 logger.info(f"数据集目录: {DATA_SET_DIR}")
 
+# 富途 get_market_snapshot 单次请求最多 400 个代码
+SNAPSHOT_BATCH_SIZE = 400
+
+# 增长率只与约一年前的同类型报告期比较，中间缺期时不计算（避免把两年的变化当作一年）
+GROWTH_MAX_GAP_DAYS = 400
+
+# 财务指标含实时市场快照数据，计算结果只复用这么多秒（与 CACHE_TTL_MARKET_CAP 一样默认 5 分钟）
+HK_METRICS_TTL = float(os.getenv("CACHE_TTL_HK_METRICS", 5 * 60))
+
+# 股票代码 -> (计算时间 monotonic, 财务指标)，按股票缓存，各 end_date 共用
+_metrics_lock = threading.Lock()
+_metrics_memo: dict[str, tuple[float, list]] = {}
+
+# 整批校验 FinancialMetrics，比逐个构造模型快
+_metrics_adapter = TypeAdapter(List[FinancialMetrics])
+
+# 解析结果按文件 mtime/size 缓存在内存和 CACHE_DIR/hk_statements 旁路文件中，避免每次调用都重新打开 xlsx
+@cached_sheet
 def load_excel(file_path: str, sheet_name: str) -> pd.DataFrame:
     try:
         # 读取Excel文件
         df = pd.read_excel(file_path, sheet_name=sheet_name, header=0)
 
         # 转换日期列名
+        # 整个工作簿的表头一次解析: 推断一次日期格式后批量转换，结果按字符串缓存
         date_cols = []
-        for col in df.columns[1:]:
-            original_col = col
-            dt = convert_to_datetime(col)
+        for col, dt in zip(df.columns[1:], parse_date_headers(df.columns[1:])):
             if not pd.isna(dt):
                 date_cols.append(dt)
             else:
                 date_cols.append(col)
-                logger.debug(f"转换失败: {original_col}")
+                logger.debug(f"转换失败: {col}")
 
         # ==== 关键修复：将转换后的列名应用到 DataFrame ====
         # 创建新的列名列表（第一列保持不变）
@@ -59,43 +84,6 @@ def load_excel(file_path: str, sheet_name: str) -> pd.DataFrame:
         logger.error(f"[Exception]加载Excel失败: {str(e)} \n{file_path}", exc_info=True)
         return pd.DataFrame()
 
-# 轉換日期
-def convert_to_datetime(date_str):
-    """将各种日期格式转换为统一的datetime对象"""
-    try:
-        # 尝试常见日期格式
-        formats = [
-            "%Y-%m-%d", "%Y/%m/%d", "%Y%m%d",
-            "%Y年%m月%d日", "%d/%m/%Y", "%m/%d/%Y",
-            "%Y.%m.%d", "%d-%b-%y", "%d-%b-%Y",
-            "%b %d, %Y", "%B %d, %Y"
-        ]
-
-        # 尝试去除时间部分（如果有）
-        if isinstance(date_str, str):
-            date_str = date_str.split()[0]  # 取日期部分
-
-            # 处理中文日期
-            date_str = date_str.replace("年", "-").replace("月", "-").replace("日", "")
-
-            # 处理特殊格式
-            if "季度" in date_str:
-                year, quarter = date_str.split("年")
-                quarter = quarter.replace("季度", "").strip()
-                month = {"一": "03", "二": "06", "三": "09", "四": "12"}.get(quarter, "01")
-                date_str = f"{year}-{month}-01"
-
-        for fmt in formats:
-            try:
-                return pd.to_datetime(date_str, format=fmt, errors="raise")
-            except:
-                continue
-
-        # 作为最后手段尝试自动解析
-        return pd.to_datetime(date_str, errors="coerce")
-    except:
-        return pd.NaT
-
 def merge_financial_statements(
         balance_sheet: pd.DataFrame,
         income_statement: pd.DataFrame,
@@ -107,8 +95,30 @@ def merge_financial_statements(
     返回:
         dict: {报告日期: {财务指标: 值}}
     """
-    financials_dict = {}
+    frame = merge_financial_statements_frame(balance_sheet, income_statement, cash_flow)
+
+    # 每个报告期只保留有值的指标（NaN 即原表中为空，NaN != NaN）
+    fields = frame.columns.tolist()
+    financials_dict = {
+        date_col.strftime('%Y-%m-%d'): {field: value for field, value in zip(fields, row) if value == value}
+        for date_col, row in zip(frame.index, frame.to_numpy(dtype=float).tolist())
+    }
+
+    logger.info(f"Merged {len(financials_dict)} 个报告期的财务数据")
+    return financials_dict
+
+
+def merge_financial_statements_frame(
+        balance_sheet: pd.DataFrame,
+        income_statement: pd.DataFrame,
+        cash_flow: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    合并三大财务报表数据为 报告期 × 财务指标 的 DataFrame（行按资产负债表的日期列顺序，缺失值为 NaN）
 
+    向量化实现: item 列一次性映射为英文字段，展开成 (字段, 日期, 值) 长表，过滤空值后 pivot 成矩阵，
+    代替逐个日期对每张报表 iterrows。
+    """
     # 获取所有报告日期（从资产负债表获取）
     date_columns = [col for col in balance_sheet.columns if isinstance(col, pd.Timestamp)]
 
@@ -120,254 +130,203 @@ def merge_financial_statements(
         # 列出所有列名帮助调试
         logger.warning(f"日期转换失败，列名: {balance_sheet.columns.tolist()}")
         logger.warning(f"日期转换失败，列类型: {[type(col) for col in balance_sheet.columns]}")
-        return financials_dict
-
-
-    for date_col in date_columns:
-        # 统一使用日期字符串作为键
-        report_date = date_col.strftime('%Y-%m-%d')
-        period_data = {}
-
-        # 处理资产负债表
-        for _, row in balance_sheet.iterrows():
-            item = row['item']
-            value = row[date_col]
-            if pd.notna(value) and item in STANDARD_MAPPING["balance_sheet"]:
-                eng_name = STANDARD_MAPPING["balance_sheet"][item]
-                period_data[eng_name] = float(value)
-
-        # 处理利润表
-        for _, row in income_statement.iterrows():
-            item = row['item']
-            value = row[date_col]
-            if pd.notna(value) and item in STANDARD_MAPPING["income_statement"]:
-                eng_name = STANDARD_MAPPING["income_statement"][item]
-                period_data[eng_name] = float(value)
-
-        # 处理现金流量表
-        for _, row in cash_flow.iterrows():
-            item = row['item']
-            value = row[date_col]
-            if pd.notna(value) and item in STANDARD_MAPPING["cash_flow"]:
-                eng_name = STANDARD_MAPPING["cash_flow"][item]
-                period_data[eng_name] = float(value)
-
-        financials_dict[report_date] = period_data
+        return pd.DataFrame(index=pd.DatetimeIndex([]))
+
+    fields, date_positions, values = [], [], []
+    for statement, df in (("balance_sheet", balance_sheet), ("income_statement", income_statement), ("cash_flow", cash_flow)):
+        # 加载失败的报表是空 DataFrame（没有 item 列），视为无数据
+        if df is None or "item" not in df.columns:
+            continue
+        # 只映射一次 item 列，未在 STANDARD_MAPPING 中的科目为 NaN 并被过滤
+        mapped_fields = df["item"].map(STANDARD_MAPPING[statement]).to_numpy()
+        mapped = pd.notna(mapped_fields)
+        # 其他报表缺少的日期列视为无数据
+        positions = df.columns.get_indexer(date_columns)
+        present_dates = np.flatnonzero(positions >= 0)
+        block = df.to_numpy(dtype=object)[mapped][:, positions[present_dates]]
+        # 展开成长表（melt 的等价写法）: 按行依次取各日期的非空值
+        rows, cols = np.nonzero(pd.notna(block))
+        fields.append(mapped_fields[mapped][rows])
+        date_positions.append(present_dates[cols])
+        values.append(block[rows, cols].astype(float))
+
+    if not fields:
+        return pd.DataFrame(index=pd.DatetimeIndex(date_columns))
+
+    fields, date_positions, values = np.concatenate(fields), np.concatenate(date_positions), np.concatenate(values)
+    codes, field_names = pd.factorize(fields)
+
+    # 与逐行合并一致: 同一报告期的同名字段，后出现的报表/行覆盖先出现的（反转后取每个键第一次出现的位置）
+    keys = date_positions * max(len(field_names), 1) + codes
+    _, reversed_first = np.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - reversed_first
+
+    # pivot 成 报告期 × 字段，没有任何数据的报告期也保留（空字典）
+    matrix = np.full((len(date_columns), len(field_names)), np.nan)
+    matrix[date_positions[last], codes[last]] = values[last]
+    return pd.DataFrame(matrix, index=pd.DatetimeIndex(date_columns), columns=list(field_names))
+
+
+def get_market_snapshots_hk(tickers: List[str]) -> dict:
+    """
+    批量获取港股市场快照，每 SNAPSHOT_BATCH_SIZE 个代码只请求一次 OpenD
 
-    logger.info(f"Merged {len(financials_dict)} 个报告期的财务数据")
-    return financials_dict
+    返回:
+        dict: {股票代码: 市场快照}，获取失败的代码不在其中
+    """
+    snapshots = {}
+    for i in range(0, len(tickers), SNAPSHOT_BATCH_SIZE):
+        chunk = tickers[i:i + SNAPSHOT_BATCH_SIZE]
+        for snapshot in FutuMarket.get_market_snapshot(chunk):
+            snapshots[snapshot.code] = snapshot
+    if missing := [ticker for ticker in tickers if ticker not in snapshots]:
+        logger.warning(f"未获取到市场快照: {', '.join(missing)}")
+    return snapshots
+
+
+def _ratio(numerator, denominator: np.ndarray) -> np.ndarray:
+    """逐期相除，分母为 0 或缺失时结果为 NaN"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return numerator / np.where(denominator != 0, denominator, np.nan)
+
+
+def _snapshot_value(market_snapshot, name: str) -> float:
+    """市场快照中的数值字段，缺失或非数字时为 NaN"""
+    try:
+        return float(getattr(market_snapshot, name))
+    except (AttributeError, TypeError, ValueError):
+        return np.nan
+
+
+def _previous_periods(index: pd.DatetimeIndex) -> np.ndarray:
+    """每个报告期在同一报告期类型中上一期的行号，没有可比的上一期时为 -1"""
+    dates = index.to_numpy()
+    groups = np.array([get_report_period(date) for date in index.strftime("%Y-%m-%d")])
+    # 先按类型再按日期排序，相邻两行类型相同且相隔不超过 GROWTH_MAX_GAP_DAYS 即为可比的上一期
+    order = np.lexsort((dates, groups))
+    comparable = (groups[order][1:] == groups[order][:-1]) & (np.diff(dates[order]) <= np.timedelta64(GROWTH_MAX_GAP_DAYS, "D"))
+    previous = np.full(len(index), -1)
+    previous[order[1:]] = np.where(comparable, order[:-1], -1)
+    return previous
 
 
-def calculate_derived_metrics(ticker: str,period_data: dict) -> dict:
+def calculate_derived_metrics_frame(frame: pd.DataFrame, market_snapshot) -> pd.DataFrame:
     """
-    根据原始财务数据计算衍生指标
+    按列一次性计算所有报告期的衍生指标
+
+    参数:
+        frame: merge_financial_statements_frame 的结果（报告期 × 财务字段）
+        market_snapshot: 该股票的市场快照，所有报告期共用
 
     返回:
-        dict: {指标名称: 计算值}
+        DataFrame: 报告期 × 指标（与 frame 同索引），无法计算处为 NaN
     """
+    values = frame.to_numpy(dtype=float)
+    positions = {name: i for i, name in enumerate(frame.columns)}
+    missing = np.full(len(frame.index), np.nan)
+    col = lambda name: values[:, positions[name]] if name in positions else missing
     metrics = {}
 
-    try:
-        stock_code_list = [ticker]
-        market_snapshot_list = FutuMarket.get_market_snapshot(stock_code_list)
-        market_snapshot_model = market_snapshot_list[0]
-
-        # 0. metrics['ticker'] = period_data['ticker']
-        total_market_val = market_snapshot_model.total_market_val # 总市值
-        shares_outstanding = market_snapshot_model.outstanding_shares # 6_280_000_000  # 美团2023年总股本约62.8亿股
-
-        # 1. 基本比率
-        # 毛利率
-        if all(k in period_data for k in ('gross_profit', 'revenue')) and period_data['revenue'] != 0:
-            metrics['gross_margin'] = (period_data['gross_profit'] / period_data['revenue']) * 100
-
-        # 2、book_value_growth 账面价值增长 目前没有可计算
-
-        # 3.每股账面价值  book_value_per_share 目前没有可计算
-
-        # 净利润率 net_margin
-        if all(k in period_data for k in ('profit_attributable', 'revenue')) and period_data['revenue'] != 0:
-            metrics['net_margin'] = (period_data['profit_attributable'] / period_data['revenue']) * 100
-
-        # 29.营业利润率 operating_margin
-        if all(k in period_data for k in ('operating_profit', 'revenue')) and period_data['revenue'] != 0:
-            metrics['operating_margin'] = (period_data['operating_profit'] / period_data['revenue']) * 100
-
-        # 2. 流动性比率
-        # 5.流动比率
-        if all(k in period_data for k in ('total_current_assets', 'total_current_liabilities')) and period_data[
-            'total_current_liabilities'] != 0:
-            metrics['current_ratio'] = period_data['total_current_assets'] / period_data['total_current_liabilities']
-
-        # 速动比率
-        if all(k in period_data for k in ('cash_equivalents', 'accounts_receivable', 'total_current_liabilities')) and \
-                period_data['total_current_liabilities'] != 0:
-            quick_assets = period_data['cash_equivalents'] + period_data['accounts_receivable']
-            metrics['quick_ratio'] = quick_assets / period_data['total_current_liabilities']
-
-        # 现金比率
-        if all(k in period_data for k in ('cash_equivalents', 'total_current_liabilities')) and period_data[
-            'total_current_liabilities'] != 0:
-            metrics['cash_ratio'] = period_data['cash_equivalents'] / period_data['total_current_liabilities']
-
-        # 3. 杠杆比率
-        # 资产负债率
-        if all(k in period_data for k in ('total_liabilities', 'total_assets')) and period_data['total_assets'] != 0:
-            metrics['debt_to_assets'] = period_data['total_liabilities'] / period_data['total_assets']
-
-        # 产权比率
-        if all(k in period_data for k in ('total_liabilities', 'total_equity')) and period_data['total_equity'] != 0:
-            metrics['debt_to_equity'] = period_data['total_liabilities'] / period_data['total_equity']
-
-        # 利息保障倍数
-        if all(k in period_data for k in ('operating_profit', 'financing_costs')) and period_data[
-            'financing_costs'] != 0:
-            metrics['interest_coverage'] = period_data['operating_profit'] / period_data['financing_costs']
-
-        # 4. 盈利能力比率
-        # 总资产收益率(ROA)
-        if all(k in period_data for k in ('profit_attributable', 'total_assets')) and period_data['total_assets'] != 0:
-            metrics['return_on_assets'] = (period_data['profit_attributable'] / period_data['total_assets']) * 100
-
-        # 净资产收益率(ROE)
-        if all(k in period_data for k in ('profit_attributable', 'total_equity')) and period_data['total_equity'] != 0:
-            metrics['return_on_equity'] = (period_data['profit_attributable'] / period_data['total_equity']) * 100
-
-        # 投入资本回报率(ROI)
-        if all(k in period_data for k in ('operating_profit', 'total_equity', 'total_liabilities')) and (
-                period_data['total_equity'] + period_data['total_liabilities']) != 0:
-            # 简化计算：ROI = EBIT / (总负债 + 股东权益)
-            metrics['return_on_invested_capital'] = period_data['operating_profit'] / (
-                        period_data['total_liabilities'] + period_data['total_equity'])
-
-        # 5. 效率比率
-        # 资产周转率
-        if all(k in period_data for k in ('revenue', 'total_assets')) and period_data['total_assets'] != 0:
-            metrics['asset_turnover'] = period_data['revenue'] / period_data['total_assets']
-
-        # 存货周转率
-        if all(k in period_data for k in ('cost_of_sales', 'inventory')) and period_data['inventory'] != 0:
-            metrics['inventory_turnover'] = period_data['cost_of_sales'] / period_data['inventory']
-
-        # 应收账款周转率
-        if all(k in period_data for k in ('revenue', 'accounts_receivable')) and period_data[
-            'accounts_receivable'] != 0:
-            metrics['receivables_turnover'] = period_data['revenue'] / period_data['accounts_receivable']
-
-        # 应收账款周转天数
-        if 'receivables_turnover' in metrics and metrics['receivables_turnover'] != 0:
-            metrics['days_sales_outstanding'] = 365 / metrics['receivables_turnover']
-
-        # 6. 现金流比率
-        # 经营活动现金流比率
-        if all(k in period_data for k in ('net_cash_operating', 'total_current_liabilities')) and period_data[
-            'total_current_liabilities'] != 0:
-            metrics['operating_cash_flow_ratio'] = period_data['net_cash_operating'] / period_data[
-                'total_current_liabilities']
-
-        # 自由现金流 - 确保总是存在
-        metrics['free_cash_flow'] = None
-        if all(k in period_data for k in ('net_cash_operating', 'fixed_assets_acquisition')):
-            try:
-                metrics['free_cash_flow'] = float(period_data['net_cash_operating']) - float(
-                    period_data['fixed_assets_acquisition'])
-            except (TypeError, ValueError):
-                pass
-
-        # 7. 每股指标
-        # 每股账面价值
-        if 'shareholders_equity' in period_data:
-            metrics['book_value_per_share'] = period_data['shareholders_equity'] / shares_outstanding
-
-        # 每股收益(EPS)
-        if 'profit_attributable' in period_data:
-            metrics['earnings_per_share'] = period_data['profit_attributable'] / shares_outstanding
-
-        # 每股自由现金流
-        metrics['free_cash_flow_per_share'] = None
-        if metrics['free_cash_flow'] is not None and shares_outstanding != 0:
-            metrics['free_cash_flow_per_share'] = metrics['free_cash_flow'] / shares_outstanding
-
-        # 8. 其他指标
-        # 自由现金流收益率
-        if 'free_cash_flow' in metrics and 'market_cap' in period_data and period_data['market_cap'] != 0:
-            metrics['free_cash_flow_yield'] = metrics['free_cash_flow'] / period_data['market_cap']
-
-        metrics['last_price'] = market_snapshot_model.last_price  # 最新价格
-        metrics['open_price'] = market_snapshot_model.open_price  # 今日开盘价
-        metrics['high_price'] = market_snapshot_model.high_price  # 最高价格
-        metrics['low_price'] = market_snapshot_model.low_price  # 最低价格
-        metrics['prev_close_price'] = market_snapshot_model.prev_close_price  # 昨收盘价格
-
-        # 映射表没有的指标-------------------------------------------------------------------------------
-        """
-        book_value_growth
-        earnings_growth
-        earnings_per_share_growth
-        ebitda_growth
-        enterprise_value
-        enterprise_value_to_ebitda_ratio
-        enterprise_value_to_revenue_ratio
-        free_cash_flow_growth
-        free_cash_flow_yield
-        operating_cash_flow
-        operating_cycle
-        operating_income_growth
-        peg_ratio
-        price_to_book_ratio
-        price_to_earnings_ratio
-        price_to_sales_ratio
-        revenue_growth
-        working_capital_turnover
-        market_cap
-        """
-        metrics['book_value_growth']=None
-        metrics['earnings_growth'] = None
-        metrics['earnings_per_share_growth']=None
-        metrics['ebitda_growth']=None
-        metrics['enterprise_value']=None
-        metrics['enterprise_value_to_ebitda_ratio']=None
-        metrics['enterprise_value_to_revenue_ratio']=None
-        metrics['free_cash_flow_growth']=None
-        metrics['free_cash_flow_yield']=None
-        metrics['operating_cash_flow']=None
-        metrics['operating_cycle']=None
-        metrics['operating_income_growth']=None
-        metrics['peg_ratio']=None # pb_ratio
-        metrics['payout_ratio']=None
-
-        # 净资产
-        metrics['price_to_book_ratio'] = market_snapshot_model.pb_ratio
-        metrics['price_to_earnings_ratio']= market_snapshot_model.pe_ratio
-        metrics['price_to_sales_ratio']=None
-        metrics['revenue_growth']=None
-        metrics['working_capital_turnover']=None
-        metrics['market_cap']= total_market_val
-
-        print(f"{market_snapshot_model.update_time} Ticker: {ticker} Market_Capital: { total_market_val} ")
-
-        # 9. 确保所有模型字段都存在
-        """
-        required_fields = [
-            'book_value_growth', 'earnings_growth', 'earnings_per_share_growth',
-            'ebitda_growth', 'enterprise_value', 'enterprise_value_to_ebitda_ratio',
-            'enterprise_value_to_revenue_ratio', 'free_cash_flow_growth',
-            'operating_cash_flow', 'operating_cycle', 'operating_income_growth',
-            'peg_ratio', 'price_to_book_ratio', 'price_to_earnings_ratio',
-            'price_to_sales_ratio', 'revenue_growth', 'working_capital_turnover',
-            'market_cap'
-        ]
-
-        for field in required_fields:
-            metrics.setdefault(field, None)
-        """
-
-    except (KeyError, TypeError, ZeroDivisionError) as e1:
-        logger.warning(f"计算衍生指标时出错: {str(e1)}")
-    except Exception as e2:
-        logger.error(f"计算衍生指标时发生意外错误: {str(e2)}", exc_info=True)
-
-    return metrics
+    total_market_val = _snapshot_value(market_snapshot, "total_market_val")  # 总市值
+    shares_outstanding = _snapshot_value(market_snapshot, "outstanding_shares")
+    shares = shares_outstanding if shares_outstanding != 0 else np.nan
+
+    # 1. 基本比率（百分比）
+    metrics["gross_margin"] = _ratio(col("gross_profit"), col("revenue")) * 100
+    metrics["net_margin"] = _ratio(col("profit_attributable"), col("revenue")) * 100
+    metrics["operating_margin"] = _ratio(col("operating_profit"), col("revenue")) * 100
+
+    # 2. 流动性比率
+    metrics["current_ratio"] = _ratio(col("total_current_assets"), col("total_current_liabilities"))
+    metrics["quick_ratio"] = _ratio(col("cash_equivalents") + col("accounts_receivable"), col("total_current_liabilities"))
+    metrics["cash_ratio"] = _ratio(col("cash_equivalents"), col("total_current_liabilities"))
+
+    # 3. 杠杆比率
+    metrics["debt_to_assets"] = _ratio(col("total_liabilities"), col("total_assets"))
+    metrics["debt_to_equity"] = _ratio(col("total_liabilities"), col("total_equity"))
+    metrics["interest_coverage"] = _ratio(col("operating_profit"), col("financing_costs"))
+
+    # 4. 盈利能力比率
+    metrics["return_on_assets"] = _ratio(col("profit_attributable"), col("total_assets")) * 100
+    metrics["return_on_equity"] = _ratio(col("profit_attributable"), col("total_equity")) * 100
+    # 简化计算：ROI = EBIT / (总负债 + 股东权益)
+    metrics["return_on_invested_capital"] = _ratio(col("operating_profit"), col("total_liabilities") + col("total_equity"))
+
+    # 5. 效率比率
+    metrics["asset_turnover"] = _ratio(col("revenue"), col("total_assets"))
+    metrics["inventory_turnover"] = _ratio(col("cost_of_sales"), col("inventory"))
+    metrics["receivables_turnover"] = _ratio(col("revenue"), col("accounts_receivable"))
+    metrics["days_sales_outstanding"] = _ratio(365, metrics["receivables_turnover"])
+
+    # 6. 现金流比率
+    metrics["operating_cash_flow_ratio"] = _ratio(col("net_cash_operating"), col("total_current_liabilities"))
+    metrics["free_cash_flow"] = col("net_cash_operating") - col("fixed_assets_acquisition")
+
+    # 7. 每股指标（按当前总股本）
+    metrics["book_value_per_share"] = col("shareholders_equity") / shares
+    metrics["earnings_per_share"] = col("profit_attributable") / shares
+    metrics["free_cash_flow_per_share"] = metrics["free_cash_flow"] / shares
+
+    # 8. 市场快照指标（实时数据，各报告期相同）
+    metrics["market_cap"] = np.full(len(frame.index), total_market_val)
+    metrics["price_to_book_ratio"] = np.full(len(frame.index), _snapshot_value(market_snapshot, "pb_ratio"))
+    metrics["price_to_earnings_ratio"] = np.full(len(frame.index), _snapshot_value(market_snapshot, "pe_ratio"))
+    for name in ("last_price", "open_price", "high_price", "low_price", "prev_close_price"):
+        metrics[name] = np.full(len(frame.index), _snapshot_value(market_snapshot, name))
+
+    # 9. 增长率: 与同一报告期类型的上一期比较（年报比上年年报，中报比上年中报）
+    previous_rows = _previous_periods(frame.index)
+    has_previous = previous_rows >= 0
+    for metric, field in GROWTH_MAPPING.items():
+        current = metrics[field] if field in metrics else col(field)
+        previous = np.where(has_previous, current[previous_rows], np.nan)
+        metrics[metric] = _ratio(current - previous, np.abs(previous))
+
+    return pd.DataFrame(np.column_stack(list(metrics.values())), index=frame.index, columns=list(metrics))
+
+
+def calculate_derived_metrics(ticker: str, period_data: dict, market_snapshot=None) -> dict:
+    """
+    根据单个报告期的原始财务数据计算衍生指标（单期无法计算增长率，批量计算见 calculate_derived_metrics_frame）
+
+    参数:
+        market_snapshot: 该股票的市场快照；为空时单独请求一次。多个报告期应共用同一快照
+
+    返回:
+        dict: {指标名称: 计算值}
+    """
+    if market_snapshot is None:
+        # 获取失败时快照为 None，市值、市盈率等快照指标为空，其余指标照常计算
+        market_snapshot = get_market_snapshots_hk([ticker]).get(ticker)
+    frame = pd.DataFrame([period_data], index=pd.DatetimeIndex([pd.Timestamp(0)]), dtype=float)
+    row = calculate_derived_metrics_frame(frame, market_snapshot).iloc[0]
+    return {name: None if value != value else value for name, value in row.items()}
+
+
+def build_financial_metrics(ticker: str, frame: pd.DataFrame, metrics: pd.DataFrame) -> List[FinancialMetrics]:
+    """
+    把 报告期 × 字段 的原始数据和衍生指标批量转换为 FinancialMetrics，一次校验整批
+
+    模型中没有对应数据的指标为 None
+    """
+    # 衍生指标覆盖同名的原始字段
+    combined = np.hstack([frame.to_numpy(dtype=float), metrics.to_numpy(dtype=float)])
+    positions = {name: i for i, name in enumerate([*frame.columns, *metrics.columns])}
+    fields = [name for name in FinancialMetrics.model_fields if name in positions]
+    rows = combined[:, [positions[name] for name in fields]].tolist()
+    records = [
+        {
+            **dict.fromkeys(FinancialMetrics.model_fields),
+            "ticker": ticker,
+            "period": period,
+            "report_period": get_report_period(period),
+            "currency": CURRENCY_MAPPING,
+            **{name: value for name, value in zip(fields, row) if value == value},
+        }
+        for period, row in zip(frame.index.strftime("%Y-%m-%d").tolist(), rows)
+    ]
+    return _metrics_adapter.validate_python(records)
+
 
 def get_report_period(date_str: str) -> str:
     """
@@ -384,8 +343,17 @@ def get_report_period(date_str: str) -> str:
             return period_type
     return "other"
 
-def get_financial_metrics_hk(ticker: str = "HK.03690") -> List[FinancialMetrics]:
-    """从本地Excel文件获取美团(HK.03690)的完整财务指标"""
+def get_financial_metrics_hk(ticker: str = "HK.03690", market_snapshot=None) -> List[FinancialMetrics]:
+    """
+    从本地Excel文件获取美团(HK.03690)的完整财务指标
+
+    参数:
+        market_snapshot: 该股票的市场快照；为空时在计算前请求一次，所有报告期共用
+
+    不传快照时，HK_METRICS_TTL 秒内算过的结果直接复用（每个 agent、每个回测日都会调用）
+    """
+    if market_snapshot is None and (cached := _cached_metrics_hk(ticker)) is not None:
+        return cached
     # 创建ticker特定的数据目录
     ticker_data_dir = f"{DATA_SET_DIR}\\{ticker}"
     # logger.info(f"股票数据目录: {ticker_data_dir}")
@@ -421,45 +389,71 @@ def get_financial_metrics_hk(ticker: str = "HK.03690") -> List[FinancialMetrics]
         income_statement = load_excel(income_statement_path, sheet_name=sheet_name)
         cash_flow = load_excel(cash_flow_path, sheet_name=sheet_name)
 
-        # 将三大报表合并为按报告期组织的财务数据字典
-        financials_dict = merge_financial_statements(
+        # 将三大报表合并为 报告期 × 财务字段 的矩阵
+        financials_frame = merge_financial_statements_frame(
             balance_sheet,
             income_statement,
             cash_flow
         )
 
-        if not financials_dict:
-            logger.warning(f"未找到有效的财务数据: {ticker} (financials_dict=none merge exception)")
+        if financials_frame.index.empty:
+            logger.warning(f"未找到有效的财务数据: {ticker} (financials_frame=empty merge exception)")
             return []
 
-        metrics_list = []
-
-        # 处理每个报告期
-        for period_date, period_data in financials_dict.items():
-            # 计算衍生指标
-            calculated_metrics = calculate_derived_metrics(ticker,period_data)
+        # 市场快照是实时数据，与报告期无关，每只股票只取一次
+        if market_snapshot is None:
+            market_snapshot = get_market_snapshots_hk([ticker]).get(ticker)
+        if market_snapshot is None:
+            logger.error(f"无法获取 {ticker} 的市场快照，跳过财务指标计算")
+            return []
 
-            # 创建FinancialMetrics对象
-            metrics = FinancialMetrics(
-                ticker=ticker,
-                period=period_date,
-                report_period=get_report_period(period_date),
-                currency=CURRENCY_MAPPING,
-                **period_data,
-                **calculated_metrics
-            )
-            metrics_list.append(metrics)
+        # 所有报告期的衍生指标按列一次算出，再整批创建FinancialMetrics对象
+        calculated_metrics = calculate_derived_metrics_frame(financials_frame, market_snapshot)
+        metrics_list = build_financial_metrics(ticker, financials_frame, calculated_metrics)
+        logger.info(f"{market_snapshot.update_time} Ticker: {ticker} Market_Capital: {calculated_metrics['market_cap'].iloc[0]}")
 
         # 按报告日期倒序排列
         metrics_list.sort(key=lambda x: x.period, reverse=True)
 
         logger.info(f"成功加载 {len(metrics_list)} 个报告期的财务数据")
-        return metrics_list
+        with _metrics_lock:
+            _metrics_memo[ticker] = (time.monotonic(), metrics_list)
+        return list(metrics_list)
 
     except Exception as e:
         logger.error(f"处理财务数据时出错: {str(e)}", exc_info=True)
         return []
 
+
+def get_financial_metrics_hk_batch(tickers: List[str]) -> dict:
+    """
+    批量获取多只港股的财务指标，整个股票池的市场快照合并为一次(每 400 只一次)请求
+
+    返回:
+        dict: {股票代码: List[FinancialMetrics]}，无快照或无财报的股票为空列表
+    """
+    results = {ticker: cached for ticker in tickers if (cached := _cached_metrics_hk(ticker)) is not None}
+    snapshots = get_market_snapshots_hk([ticker for ticker in tickers if ticker not in results])
+    for ticker in tickers:
+        if ticker not in results:
+            results[ticker] = get_financial_metrics_hk(ticker, snapshots[ticker]) if ticker in snapshots else []
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def _cached_metrics_hk(ticker: str) -> List[FinancialMetrics] | None:
+    """HK_METRICS_TTL 秒内计算过的财务指标（副本），没有时为 None"""
+    with _metrics_lock:
+        computed_at, metrics_list = _metrics_memo.get(ticker, (None, None))
+    hit = computed_at is not None and time.monotonic() - computed_at <= HK_METRICS_TTL
+    get_data_metrics().record_cache("hk-financial-metrics", ticker, hit=hit)
+    return list(metrics_list) if hit else None
+
+
+def clear_financial_metrics_hk_cache():
+    """清空缓存的港股财务指标"""
+    with _metrics_lock:
+        _metrics_memo.clear()
+
 # 其他函数保持不变...
 
 # 使用示例
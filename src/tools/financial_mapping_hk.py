@@ -246,6 +246,17 @@ REPORT_PERIOD_MAPPING = {
     "03-31": "quarterly"
 }
 
+# 增长率指标 -> 计算所用字段；与同一报告期类型的上一期比较: (本期 - 上期) / |上期|
+# ebitda_growth 缺少折旧摊销科目，无法计算
+GROWTH_MAPPING = {
+    "revenue_growth": "revenue",
+    "earnings_growth": "profit_attributable",
+    "book_value_growth": "shareholders_equity",
+    "earnings_per_share_growth": "basic_eps",
+    "free_cash_flow_growth": "free_cash_flow",
+    "operating_income_growth": "operating_profit"
+}
+
 # 货币单位
 CURRENCY_MAPPING = "CNY"  # 所有金额单位为人民币
 
@@ -0,0 +1,181 @@
+# header_dates.py
+"""
+Date parsing for the column headers of the HK financial statement workbooks.
+
+convert_to_datetime tries each of DATE_FORMATS in turn, raising and catching an exception for every miss. The headers
+of one workbook share a format, so parse_date_headers infers it from the first header, parses the rest in one
+vectorized call and only sends the headers that do not fit it through convert_to_datetime. Results are memoized by
+header string and inferred format, and get_header_parse_stats shows how headers were parsed and which fell through to the fallback.
+"""
+
+import threading
+from collections import Counter
+from datetime import date, datetime
+
+import pandas as pd
+
+# Tried in order; the first that parses a header wins
+DATE_FORMATS = [
+    "%Y-%m-%d", "%Y/%m/%d", "%Y%m%d",
+    "%Y年%m月%d日", "%d/%m/%Y", "%m/%d/%Y",
+    "%Y.%m.%d", "%d-%b-%y", "%d-%b-%Y",
+    "%b %d, %Y", "%B %d, %Y"
+]
+
+# Headers tried when inferring a workbook's format; if none of them is a date, every header goes through the fallback
+INFER_SAMPLE_HEADERS = 3
+
+# Parsed headers kept in memory; the memo is cleared when it grows past this (headers are a few dozen dates per workbook)
+MAX_CACHED_HEADERS = 10_000
+
+_lock = threading.Lock()
+# (header string, format inferred for its workbook) -> parsed date (NaT if it is not a date)
+_parsed: dict[tuple[str, str | None], pd.Timestamp] = {}
+# native: datetime cells, cached: memo hits, inferred: parsed with the workbook's format, fallback: parsed one by one
+_stats: Counter = Counter()
+_formats: Counter = Counter()
+_fallback_headers: Counter = Counter()
+
+
+def convert_to_datetime(date_str):
+    """将各种日期格式转换为统一的datetime对象"""
+    try:
+        date_str = _normalize(date_str)
+
+        for fmt in DATE_FORMATS:
+            try:
+                return pd.to_datetime(date_str, format=fmt, errors="raise")
+            except:
+                continue
+
+        # 作为最后手段尝试自动解析
+        return pd.to_datetime(date_str, errors="coerce")
+    except:
+        return pd.NaT
+
+
+def parse_date_headers(headers) -> list:
+    """
+    Parse workbook column headers to Timestamps, NaT where a header is not a date.
+    Gives the same dates as calling convert_to_datetime on each header, except that all string headers of one call are
+    read with the format inferred from the first of them (so e.g. "01/02/2024" is read the same way as "31/12/2024").
+    """
+    headers = list(headers)
+    results = [pd.NaT] * len(headers)
+    pending: dict[str, list[int]] = {}
+    others = []
+    counts = Counter()
+
+    # The same header reads differently under another workbook's format (e.g. "01/02/2024"), so memo hits need the format first
+    normalized = _normalize_headers(list(dict.fromkeys(header for header in headers if isinstance(header, str))))
+    fmt = _infer_format(list(normalized.values()))
+
+    with _lock:
+        for i, header in enumerate(headers):
+            if isinstance(header, (datetime, date)):
+                results[i] = pd.Timestamp(header)
+                counts["native"] += 1
+            elif not isinstance(header, str):
+                # Numbers, NaN and the like are rare; parse them one by one and do not memoize them
+                others.append(i)
+            elif (header, fmt) in _parsed:
+                results[i] = _parsed[header, fmt]
+                counts["cached"] += 1
+            else:
+                pending.setdefault(header, []).append(i)
+
+    parsed, fallback = _parse_strings(list(pending), normalized, fmt)
+    for header, positions in pending.items():
+        for i in positions:
+            results[i] = parsed[header]
+    for i in others:
+        results[i] = convert_to_datetime(headers[i])
+        fallback.append((headers[i], results[i]))
+
+    counts["inferred"] += len(parsed) - (len(fallback) - len(others))
+    counts["fallback"] += len(fallback)
+    counts["unparsed"] += sum(1 for _, value in fallback if pd.isna(value))
+    with _lock:
+        if len(_parsed) + len(parsed) > MAX_CACHED_HEADERS:
+            _parsed.clear()
+        _parsed.update({(header, fmt): value for header, value in parsed.items()})
+        _stats.update(counts)
+        if fmt is not None:
+            _formats[fmt] += 1
+        _fallback_headers.update(str(header) for header, _ in fallback)
+    return results
+
+
+def get_header_parse_stats() -> dict[str, any]:
+    """
+    Counts of parsed headers by path (native datetime cells, memo hits, inferred format, per-header fallback, and
+    those the fallback could not parse either), the formats inferred per workbook, and the headers that fell through.
+    """
+    with _lock:
+        return {
+            **{name: _stats[name] for name in ("native", "cached", "inferred", "fallback", "unparsed")},
+            "formats": dict(_formats),
+            "fallback_headers": dict(_fallback_headers),
+        }
+
+
+def clear_header_cache():
+    """Forget parsed headers and reset the statistics."""
+    with _lock:
+        _parsed.clear()
+        _stats.clear()
+        _formats.clear()
+        _fallback_headers.clear()
+
+
+def _normalize(date_str):
+    if isinstance(date_str, str):
+        # 尝试去除时间部分（如果有）
+        date_str = date_str.split()[0]  # 取日期部分
+
+        # 处理中文日期
+        date_str = date_str.replace("年", "-").replace("月", "-").replace("日", "")
+
+        # 处理特殊格式
+        if "季度" in date_str:
+            year, quarter = date_str.split("年")
+            quarter = quarter.replace("季度", "").strip()
+            month = {"一": "03", "二": "06", "三": "09", "四": "12"}.get(quarter, "01")
+            date_str = f"{year}-{month}-01"
+    return date_str
+
+
+def _infer_format(normalized: list[str]) -> str | None:
+    """The first of DATE_FORMATS that parses the first header that is a date at all, or None if none of the samples is."""
+    for sample in normalized[:INFER_SAMPLE_HEADERS]:
+        for fmt in DATE_FORMATS:
+            try:
+                pd.to_datetime(sample, format=fmt, errors="raise")
+                return fmt
+            except (ValueError, TypeError):
+                continue
+    return None
+
+
+def _normalize_headers(headers: list[str]) -> dict[str, str]:
+    """Normalized form of each string header; headers _normalize cannot handle are left out."""
+    normalized = {}
+    for header in headers:
+        try:
+            normalized[header] = _normalize(header)
+        except (ValueError, IndexError):
+            continue
+    return normalized
+
+
+def _parse_strings(headers: list[str], normalized: dict[str, str], fmt: str | None) -> tuple[dict[str, pd.Timestamp], list[tuple[str, pd.Timestamp]]]:
+    """Parse string headers with the inferred format, sending the rest through convert_to_datetime (returned as fallback)."""
+    parsed = {}
+    candidates = [header for header in headers if header in normalized]
+    if fmt is not None and candidates:
+        dates = pd.to_datetime(pd.Series([normalized[header] for header in candidates], dtype=object), format=fmt, errors="coerce")
+        parsed = {header: value for header, value in zip(candidates, dates) if not pd.isna(value)}
+
+    fallback = [(header, convert_to_datetime(header)) for header in headers if header not in parsed]
+    parsed.update(fallback)
+    return parsed, fallback
@@ -0,0 +1,73 @@
+from src.tools import api_hk
+from src.tools.api import (
+    get_company_news,
+    get_financial_metrics,
+    get_insider_trades,
+    get_market_cap,
+    get_prices,
+    search_line_items_batch,
+    sync_line_items,
+)
+
+
+def prefetch_ticker(ticker: str, start_date: str, end_date: str, line_item_requests: list[dict], price_start_date: str | None = None) -> list[str]:
+    """
+    Fetch every dataset the agents read for one ticker into the cache, returning the errors instead of raising.
+
+    :param start_date: First day of insider trades and news to fetch, and of the dates line items and market caps are asked for.
+    :param end_date: Last day of data; metrics are fetched as of this date.
+    :param line_item_requests: search_line_items arguments (line_items, period, limit) of the selected analysts.
+    :param price_start_date: First day of prices, if prices need more history than start_date.
+    """
+    fetches = [
+        ("prices", lambda: get_prices(ticker, price_start_date or start_date, end_date)),
+        ("financial metrics", lambda: get_financial_metrics(ticker, end_date, limit=10)),
+        ("insider trades", lambda: get_insider_trades(ticker, end_date, start_date=start_date, limit=1000)),
+        ("company news", lambda: get_company_news(ticker, end_date, start_date=start_date, limit=1000)),
+    ]
+    for request in line_item_requests:
+        # Agents ask for line items as of each day of a backtest, so every end date in the range must be a cache hit
+        fetches.append(("line items", lambda request=request: sync_line_items(ticker, start_date=start_date, end_date=end_date, **request)))
+    if line_item_requests:
+        # Market caps for past dates come from the cached metrics up to that date, so metrics must reach back before start_date
+        fetches.append(("market cap", lambda: [get_market_cap(ticker, date) for date in (start_date, end_date)]))
+
+    errors = []
+    for name, fetch in fetches:
+        try:
+            fetch()
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+    return errors
+
+
+def prefetch_line_items(tickers: list[str], end_date: str, line_item_requests: list[dict], start_date: str | None = None) -> list[str]:
+    """
+    Fetch the line items of many tickers into the cache with batched requests, returning the errors instead of raising.
+    Later search_line_items calls for these tickers with the same arguments are then answered from the cache.
+
+    :param line_item_requests: search_line_items arguments (line_items, period, limit), e.g. an agent's LINE_ITEM_REQUEST.
+    :param start_date: Also fetch them as of this date, so the end dates in between are mostly covered (sync_line_items fills the rest).
+    """
+    errors = []
+    for request in line_item_requests:
+        for as_of in dict.fromkeys(filter(None, (end_date, start_date))):
+            try:
+                search_line_items_batch(tickers, end_date=as_of, **request)
+            except Exception as e:
+                errors.append(f"line items: {e}")
+    return errors
+
+
+def prefetch_financial_metrics_hk(tickers: list[str]) -> list[str]:
+    """
+    Compute the financial metrics of the HK tickers among many with one market snapshot request per SNAPSHOT_BATCH_SIZE
+    tickers, returning the errors instead of raising. get_financial_metrics then reuses them for HK_METRICS_TTL seconds.
+    """
+    if not (hk_tickers := [ticker for ticker in tickers if "HK" in ticker.upper()]):
+        return []
+    try:
+        api_hk.get_financial_metrics_hk_batch(hk_tickers)
+    except Exception as e:
+        return [f"HK financial metrics: {e}"]
+    return []
@@ -0,0 +1,76 @@
+"""
+Local stand-in for the financialdatasets.ai API, serving responses recorded with FINANCIAL_DATASETS_MODE=record.
+
+    python -m src.tools.replay_server --archive ./.cache/api_archive --port 8765 --latency 0.2 --error-rate 0.05
+    FINANCIAL_DATASETS_BASE_URL=http://127.0.0.1:8765 poetry run python src/backtester.py --ticker AAPL
+"""
+
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.tools.api_archive import INJECTED_ERROR_STATUS, FaultInjector, ResponseArchive
+
+
+def make_handler(archive: ResponseArchive, faults: FaultInjector) -> type[BaseHTTPRequestHandler]:
+    """Request handler class answering GET and POST requests from the archive."""
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, content: bytes, content_type: str | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type or "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def _serve(self, body: bytes | None = None):
+            faults.delay()
+            if faults.should_fail():
+                self._reply(INJECTED_ERROR_STATUS, b'{"error": "injected failure"}')
+                return
+            record = archive.load(self.command, self.path, body)
+            if record is None:
+                self._reply(404, json.dumps({"error": f"no recording for {self.command} {self.path}"}).encode("utf-8"))
+                return
+            self._reply(record["status"], record["content"].encode("utf-8"), record.get("content_type"))
+
+        def do_GET(self):
+            self._serve()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self._serve(self.rfile.read(length) if length else None)
+
+        def log_message(self, format, *args):
+            # Keep the console quiet; the client's data metrics already report every request
+            pass
+
+    return ReplayHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded financialdatasets.ai responses locally")
+    parser.add_argument("--archive", type=str, default=os.getenv("FINANCIAL_DATASETS_ARCHIVE", os.path.join(".cache", "api_archive")), help="Directory of recorded responses")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per response, drawn uniformly")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests (0-1) answered with a 503")
+    args = parser.parse_args()
+
+    handler = make_handler(ResponseArchive(args.archive), FaultInjector(args.latency, args.jitter, args.error_rate))
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Replaying {args.archive} on http://{args.host}:{args.port} (latency {args.latency}s, jitter {args.jitter}s, error rate {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
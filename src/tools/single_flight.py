@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Callable, Hashable
+
+
+class _Call:
+    """An in-flight call that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution whose result is shared."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable):
+        """Run fn, or wait for an identical in-flight call and return its result (or raise its error)."""
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Hand each waiter its own list so callers can't mutate each other's results
+            return list(call.result) if isinstance(call.result, list) else call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def _freeze(value) -> Hashable:
+    """Turn argument values into a hashable form for use in a call key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def single_flight(func: Callable) -> Callable:
+    """Decorator sharing one execution among concurrent calls made with identical arguments."""
+    group = SingleFlight()
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return group.do(_call_key(signature, args, kwargs), lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+class _AsyncCall:
+    """A coroutine running as a task that concurrent callers await, and how many of them still do."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+def async_single_flight(func: Callable) -> Callable:
+    """Decorator sharing one execution among concurrent awaits of a coroutine function made with identical arguments."""
+    calls: dict[Hashable, _AsyncCall] = {}
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop, so calls are only shared within a loop
+        key = (id(loop), _call_key(signature, args, kwargs))
+        call = calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            # The call runs as its own task, so the caller that started it can be cancelled without cancelling the others
+            call = calls[key] = _AsyncCall(loop.create_task(func(*args, **kwargs)))
+            call.task.add_done_callback(lambda _: _forget(calls, key, call))
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # Every caller was cancelled, so nobody needs the result any more; later callers start afresh
+                call.task.cancel()
+                _forget(calls, key, call)
+        # Hand each waiter its own list so callers can't mutate each other's results
+        return list(result) if isinstance(result, list) and not is_leader else result
+
+    return wrapper
+
+
+def _forget(calls: dict[Hashable, _AsyncCall], key: Hashable, call: _AsyncCall):
+    """Drop a finished or abandoned call, unless a newer call with the same key has replaced it."""
+    if calls.get(key) is call:
+        del calls[key]
+
+
+def _call_key(signature: inspect.Signature, args: tuple, kwargs: dict) -> Hashable:
+    """Key identifying a call by its bound arguments, defaults included."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return tuple((name, _freeze(value)) for name, value in bound.arguments.items())
@@ -0,0 +1,127 @@
+# statement_cache.py
+"""
+Parsed-statement cache for the HK financial statement workbooks.
+
+Opening an .xlsx and re-parsing its date headers takes hundreds of milliseconds, and the same workbook is read by
+every agent and on every backtest day. Parsed sheets are kept in memory and in a sidecar file per (workbook, sheet)
+under CACHE_DIR/hk_statements, stored as plain JSON rather than pickles; both are keyed on the workbook's mtime and size, so editing a workbook invalidates them.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+from typing import Callable
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.data.metrics import get_data_metrics
+
+load_dotenv()
+
+# Bump when load_excel's output changes so sidecars written by older code are re-parsed
+PARSER_VERSION = 1
+
+STATEMENT_CACHE_DIR = os.path.join(os.getenv("CACHE_DIR", "./.cache"), "hk_statements")
+
+_lock = threading.Lock()
+# (absolute workbook path, sheet) -> (mtime_ns, size, parsed frame)
+_memo: dict[tuple[str, str], tuple[int, int, pd.DataFrame]] = {}
+
+
+def cached_sheet(load: Callable[[str, str], pd.DataFrame]) -> Callable[[str, str], pd.DataFrame]:
+    """
+    Decorator for a (file_path, sheet_name) workbook loader, serving its result from memory, then from the sidecar,
+    and only then parsing the workbook. Empty frames (failed loads) are not cached. Frames are shared, so treat them as read-only.
+    """
+
+    @functools.wraps(load)
+    def wrapper(file_path: str, sheet_name: str) -> pd.DataFrame:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return load(file_path, sheet_name)
+        key = (os.path.abspath(file_path), str(sheet_name))
+        version = (stat.st_mtime_ns, stat.st_size)
+        metrics = get_data_metrics()
+
+        with _lock:
+            memo = _memo.get(key)
+        if memo is not None and memo[:2] == version:
+            metrics.record_cache("hk-statements", sheet_name, hit=True)
+            return memo[2]
+
+        df = _read_sidecar(key, version)
+        metrics.record_cache("hk-statements", sheet_name, hit=df is not None)
+        if df is not None:
+            metrics.increment("hk-statements", sheet_name, "sidecar_hits")
+        else:
+            df = load(file_path, sheet_name)
+            if df.empty:
+                return df
+            _write_sidecar(key, version, df)
+        with _lock:
+            _memo[key] = (*version, df)
+        return df
+
+    return wrapper
+
+
+def clear_statement_cache(remove_sidecars: bool = False):
+    """Forget parsed sheets held in memory, and optionally delete the sidecar files too."""
+    with _lock:
+        _memo.clear()
+    if remove_sidecars and os.path.isdir(STATEMENT_CACHE_DIR):
+        for name in os.listdir(STATEMENT_CACHE_DIR):
+            # .pkl sidecars were written by older versions
+            if name.endswith((".json", ".pkl")):
+                os.remove(os.path.join(STATEMENT_CACHE_DIR, name))
+
+
+def _sidecar_path(key: tuple[str, str]) -> str:
+    digest = hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()[:24]
+    return os.path.join(STATEMENT_CACHE_DIR, f"{os.path.basename(key[0])}.{digest}.json")
+
+
+def _read_sidecar(key: tuple[str, str], version: tuple[int, int]) -> pd.DataFrame | None:
+    """Parsed sheet from the sidecar, or None if there is none or it was written for another workbook version."""
+    try:
+        with open(_sidecar_path(key), encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar["header"] != [PARSER_VERSION, *version]:
+            return None
+        return _decode_frame(sidecar)
+    except Exception:
+        # A missing, truncated or foreign sidecar only costs re-parsing the workbook
+        return None
+
+
+def _write_sidecar(key: tuple[str, str], version: tuple[int, int], df: pd.DataFrame):
+    path = _sidecar_path(key)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(STATEMENT_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"header": [PARSER_VERSION, *version], **_encode_frame(df)}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        # A read-only cache directory, or cells JSON cannot hold, only cost re-parsing next time
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _encode_frame(df: pd.DataFrame) -> dict:
+    """A parsed sheet as plain lists: date headers as {"date": iso}, other headers as is, missing cells as None."""
+    return {
+        "columns": [{"date": col.isoformat()} if isinstance(col, pd.Timestamp) else col for col in df.columns],
+        "index": df.index.tolist(),
+        "values": [[None if pd.isna(value) else value for value in df.iloc[:, i].tolist()] for i in range(df.shape[1])],
+    }
+
+
+def _decode_frame(sidecar: dict) -> pd.DataFrame:
+    df = pd.DataFrame(dict(enumerate(sidecar["values"])), index=sidecar["index"])
+    df.columns = [pd.Timestamp(col["date"]) if isinstance(col, dict) else col for col in sidecar["columns"]]
+    return df
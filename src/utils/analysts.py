@@ -1,20 +1,20 @@
 """Constants and utilities related to analysts configuration."""
 
-from src.agents.aswath_damodaran import aswath_damodaran_agent
-from src.agents.ben_graham import ben_graham_agent
-from src.agents.bill_ackman import bill_ackman_agent
-from src.agents.cathie_wood import cathie_wood_agent
-from src.agents.charlie_munger import charlie_munger_agent
+from src.agents.aswath_damodaran import aswath_damodaran_agent, LINE_ITEM_REQUEST as ASWATH_DAMODARAN_LINE_ITEM_REQUEST
+from src.agents.ben_graham import ben_graham_agent, LINE_ITEM_REQUEST as BEN_GRAHAM_LINE_ITEM_REQUEST
+from src.agents.bill_ackman import bill_ackman_agent, LINE_ITEM_REQUEST as BILL_ACKMAN_LINE_ITEM_REQUEST
+from src.agents.cathie_wood import cathie_wood_agent, LINE_ITEM_REQUEST as CATHIE_WOOD_LINE_ITEM_REQUEST
+from src.agents.charlie_munger import charlie_munger_agent, LINE_ITEM_REQUEST as CHARLIE_MUNGER_LINE_ITEM_REQUEST
 from src.agents.fundamentals import fundamentals_analyst_agent
-from src.agents.michael_burry import michael_burry_agent
-from src.agents.phil_fisher import phil_fisher_agent
-from src.agents.peter_lynch import peter_lynch_agent
+from src.agents.michael_burry import michael_burry_agent, LINE_ITEM_REQUEST as MICHAEL_BURRY_LINE_ITEM_REQUEST
+from src.agents.phil_fisher import phil_fisher_agent, LINE_ITEM_REQUEST as PHIL_FISHER_LINE_ITEM_REQUEST
+from src.agents.peter_lynch import peter_lynch_agent, LINE_ITEM_REQUEST as PETER_LYNCH_LINE_ITEM_REQUEST
 from src.agents.sentiment import sentiment_analyst_agent
-from src.agents.stanley_druckenmiller import stanley_druckenmiller_agent
+from src.agents.stanley_druckenmiller import stanley_druckenmiller_agent, LINE_ITEM_REQUEST as STANLEY_DRUCKENMILLER_LINE_ITEM_REQUEST
 from src.agents.technicals import technical_analyst_agent
-from src.agents.valuation import valuation_analyst_agent
-from src.agents.warren_buffett import warren_buffett_agent
-from src.agents.rakesh_jhunjhunwala import rakesh_jhunjhunwala_agent
+from src.agents.valuation import valuation_analyst_agent, LINE_ITEM_REQUEST as VALUATION_LINE_ITEM_REQUEST
+from src.agents.warren_buffett import warren_buffett_agent, LINE_ITEM_REQUEST as WARREN_BUFFETT_LINE_ITEM_REQUEST
+from src.agents.rakesh_jhunjhunwala import rakesh_jhunjhunwala_agent, LINE_ITEM_REQUEST as RAKESH_JHUNJHUNWALA_LINE_ITEM_REQUEST
 
 # Define analyst configuration - single source of truth
 ANALYST_CONFIG = {
@@ -22,56 +22,67 @@ ANALYST_CONFIG = {
         "display_name": "Aswath Damodaran",
         "agent_func": aswath_damodaran_agent,
         "order": 0,
+        "line_item_request": ASWATH_DAMODARAN_LINE_ITEM_REQUEST,
     },
     "ben_graham": {
         "display_name": "Ben Graham",
         "agent_func": ben_graham_agent,
         "order": 1,
+        "line_item_request": BEN_GRAHAM_LINE_ITEM_REQUEST,
     },
     "bill_ackman": {
         "display_name": "Bill Ackman",
         "agent_func": bill_ackman_agent,
         "order": 2,
+        "line_item_request": BILL_ACKMAN_LINE_ITEM_REQUEST,
     },
     "cathie_wood": {
         "display_name": "Cathie Wood",
         "agent_func": cathie_wood_agent,
         "order": 3,
+        "line_item_request": CATHIE_WOOD_LINE_ITEM_REQUEST,
     },
     "charlie_munger": {
         "display_name": "Charlie Munger",
         "agent_func": charlie_munger_agent,
         "order": 4,
+        "line_item_request": CHARLIE_MUNGER_LINE_ITEM_REQUEST,
     },
     "michael_burry": {
         "display_name": "Michael Burry",
         "agent_func": michael_burry_agent,
         "order": 5,
+        "line_item_request": MICHAEL_BURRY_LINE_ITEM_REQUEST,
     },
     "peter_lynch": {
         "display_name": "Peter Lynch",
         "agent_func": peter_lynch_agent,
         "order": 6,
+        "line_item_request": PETER_LYNCH_LINE_ITEM_REQUEST,
     },
     "phil_fisher": {
         "display_name": "Phil Fisher",
         "agent_func": phil_fisher_agent,
         "order": 7,
+        "line_item_request": PHIL_FISHER_LINE_ITEM_REQUEST,
     },
     "rakesh_jhunjhunwala": {
         "display_name": "Rakesh Jhunjhunwala",
         "agent_func": rakesh_jhunjhunwala_agent,
         "order": 8,
+        "line_item_request": RAKESH_JHUNJHUNWALA_LINE_ITEM_REQUEST,
     },
     "stanley_druckenmiller": {
         "display_name": "Stanley Druckenmiller",
         "agent_func": stanley_druckenmiller_agent,
         "order": 9,
+        "line_item_request": STANLEY_DRUCKENMILLER_LINE_ITEM_REQUEST,
     },
     "warren_buffett": {
         "display_name": "Warren Buffett",
         "agent_func": warren_buffett_agent,
         "order": 10,
+        "line_item_request": WARREN_BUFFETT_LINE_ITEM_REQUEST,
     },
     "technical_analyst": {
         "display_name": "Technical Analyst",
@@ -92,6 +103,7 @@ ANALYST_CONFIG = {
         "display_name": "Valuation Analyst",
         "agent_func": valuation_analyst_agent,
         "order": 14,
+        "line_item_request": VALUATION_LINE_ITEM_REQUEST,
     },
 }
 
@@ -102,3 +114,8 @@ ANALYST_ORDER = [(config["display_name"], key) for key, config in sorted(ANALYST
 def get_analyst_nodes():
     """Get the mapping of analyst keys to their (node_name, agent_func) tuples."""
     return {key: (f"{key}_agent", config["agent_func"]) for key, config in ANALYST_CONFIG.items()}
+
+
+def get_line_item_requests(selected_analysts: list[str]) -> list[dict]:
+    """Get the per-ticker line item requests made by the selected analysts."""
+    return [ANALYST_CONFIG[key]["line_item_request"] for key in selected_analysts if "line_item_request" in ANALYST_CONFIG.get(key, {})]
@@ -364,3 +364,59 @@ def format_backtest_row(
             f"{Fore.RED}{bearish_count}{Style.RESET_ALL}",
             f"{Fore.BLUE}{neutral_count}{Style.RESET_ALL}",
         ]
+
+
+def print_data_metrics(snapshot: dict, memory_stats: dict | None = None) -> None:
+    """Print a summary of data layer activity: API calls, cache hits, latency and bytes per endpoint"""
+    endpoints = snapshot["endpoints"]
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}DATA LAYER SUMMARY:{Style.RESET_ALL} {snapshot['elapsed']:.1f}s elapsed")
+
+    api_rows = []
+    network_seconds = 0.0
+    for endpoint, entry in sorted(endpoints.items()):
+        if endpoint.startswith("cache/"):
+            continue
+        latency = entry.get("latency", {})
+        size = entry.get("response_bytes", {})
+        hits, misses = entry.get("cache_hits", 0), entry.get("cache_misses", 0)
+        network_seconds += latency.get("sum", 0.0)
+        api_rows.append(
+            [
+                f"{Fore.CYAN}{endpoint}{Style.RESET_ALL}",
+                int(hits),
+                int(misses),
+                f"{hits / (hits + misses):.0%}" if hits + misses else "-",
+                int(entry.get("requests", 0)),
+                int(entry.get("pages", 0)),
+                int(entry.get("retries", 0)),
+                int(entry.get("errors", 0)),
+                f"{latency.get('sum', 0.0):.2f}",
+                f"{latency['p50'] * 1000:.0f}" if latency.get("p50") is not None else "-",
+                f"{latency['p95'] * 1000:.0f}" if latency.get("p95") is not None else "-",
+                f"{size.get('sum', 0) / 1e6:.2f}",
+            ]
+        )
+    if api_rows:
+        print(
+            tabulate(
+                api_rows,
+                headers=["Endpoint", "Hits", "Misses", "Hit Rate", "Requests", "Pages", "Retries", "Errors", "Network (s)", "p50 (ms)", "p95 (ms)", "MB"],
+                tablefmt="grid",
+            )
+        )
+        print(f"Time waiting on the API (summed over threads): {Fore.YELLOW}{network_seconds:.2f}s{Style.RESET_ALL}")
+    else:
+        print("No data requests recorded")
+
+    cache_rows = []
+    for endpoint, entry in sorted(endpoints.items()):
+        if not endpoint.startswith("cache/"):
+            continue
+        load = entry.get("backend_load", {})
+        lock_wait = entry.get("lock_wait", {})
+        cache_rows.append([endpoint.split("/", 1)[1], int(entry.get("backend_loads", 0)), int(entry.get("backend_rows", 0)), f"{load.get('sum', 0.0):.2f}", f"{lock_wait.get('sum', 0.0):.2f}", int(entry.get("evictions", 0))])
+    if cache_rows:
+        print(tabulate(cache_rows, headers=["Dataset", "Backend Loads", "Rows Loaded", "Load (s)", "Lock Wait (s)", "Evictions"], tablefmt="grid"))
+    if memory_stats:
+        limit = f" of {memory_stats['max_bytes'] / 1e6:.1f}" if memory_stats["max_bytes"] else ""
+        print(f"Cache memory: {memory_stats['bytes'] / 1e6:.1f}{limit} MB, {memory_stats['evictions']} evictions")
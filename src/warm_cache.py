@@ -0,0 +1,157 @@
+"""
+Fill the persistent data cache for a universe of tickers ahead of interactive runs and backtests, e.g. from cron:
+
+    CACHE_BACKEND=sqlite poetry run python src/warm_cache.py --universe tickers.txt --analysts-all
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from colorama import Fore, Style, init
+from dateutil.relativedelta import relativedelta
+from dotenv import load_dotenv
+
+from src.data.cache import get_cache
+from src.data.metrics import get_data_metrics
+from src.tools.prefetch import prefetch_financial_metrics_hk, prefetch_line_items, prefetch_ticker
+from src.utils.analysts import ANALYST_CONFIG, ANALYST_ORDER, get_line_item_requests
+from src.utils.display import print_data_metrics
+
+# Load environment variables from .env file
+load_dotenv()
+
+init(autoreset=True)
+
+
+def read_universe(path: str) -> list[str]:
+    """Read tickers from a file: one or more per line (comma or whitespace separated), '#' starts a comment."""
+    tickers = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            for ticker in line.split("#", 1)[0].replace(",", " ").split():
+                if ticker.upper() not in tickers:
+                    tickers.append(ticker.upper())
+    return tickers
+
+
+class WarmState:
+    """Tickers already warmed for one (date range, analysts) run, saved after each ticker so an interrupted run can resume."""
+
+    def __init__(self, path: str, run_key: str):
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+        self._runs: dict[str, list[str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._runs = json.load(f)
+        self.done: set[str] = set(self._runs.get(run_key, []))
+
+    def mark_done(self, ticker: str):
+        with self._lock:
+            self.done.add(ticker)
+            self._runs[self.run_key] = sorted(self.done)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._runs, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def warm_cache(tickers: list[str], start_date: str, end_date: str, selected_analysts: list[str], workers: int = 8, state_path: str | None = None, restart: bool = False) -> dict[str, list[str]]:
+    """Fetch every dataset the selected analysts need for each ticker into the cache, returning the errors per failed ticker."""
+    line_item_requests = get_line_item_requests(selected_analysts)
+    run_key = hashlib.sha256(json.dumps([start_date, end_date, sorted(selected_analysts)]).encode("utf-8")).hexdigest()[:16]
+    state = WarmState(state_path or os.path.join(os.getenv("CACHE_DIR", "./.cache"), "warm_cache_state.json"), run_key)
+    if restart:
+        state.done.clear()
+
+    pending = [ticker for ticker in tickers if ticker not in state.done]
+    if skipped := len(tickers) - len(pending):
+        print(f"Resuming: {skipped} of {len(tickers)} tickers already warmed for this date range and analyst set")
+    print(f"Warming {len(pending)} tickers from {start_date} to {end_date} with {workers} workers...")
+
+    metrics = get_data_metrics()
+    requests_before = metrics.counter("requests")
+    started = time.monotonic()
+    # Line items of all pending tickers in a few batched requests; the per-ticker prefetch below then reads them from the cache
+    for error in prefetch_line_items(pending, end_date, line_item_requests, start_date=start_date):
+        print(f"{Fore.YELLOW}Batched {error}; fetching per ticker instead{Style.RESET_ALL}")
+    for error in prefetch_financial_metrics_hk(pending):
+        print(f"{Fore.YELLOW}Batched {error}; fetching per ticker instead{Style.RESET_ALL}")
+
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(_timed_prefetch, ticker, start_date, end_date, line_item_requests): ticker for ticker in pending}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            ticker = futures[future]
+            errors, seconds = future.result()
+            elapsed = time.monotonic() - started
+            throughput = f"{completed / elapsed * 60:.1f} tickers/min, {(metrics.counter('requests') - requests_before) / elapsed:.1f} requests/s"
+            if errors:
+                failures[ticker] = errors
+                print(f"[{completed}/{len(futures)}] {Fore.RED}{ticker}{Style.RESET_ALL} failed in {seconds:.1f}s: {'; '.join(errors)} ({throughput})")
+            else:
+                state.mark_done(ticker)
+                print(f"[{completed}/{len(futures)}] {Fore.GREEN}{ticker}{Style.RESET_ALL} done in {seconds:.1f}s ({throughput})")
+
+    if failures:
+        print(f"{Fore.YELLOW}Cache warm-up complete with errors for {len(failures)} ticker(s): {', '.join(failures)}. Re-run to retry them.{Style.RESET_ALL}")
+    else:
+        print("Cache warm-up complete.")
+    return failures
+
+
+def _timed_prefetch(ticker: str, start_date: str, end_date: str, line_item_requests: list[dict]) -> tuple[list[str], float]:
+    started = time.monotonic()
+    errors = prefetch_ticker(ticker, start_date, end_date, line_item_requests)
+    return errors, time.monotonic() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm the persistent data cache for a universe of tickers")
+    parser.add_argument("--universe", type=str, required=True, help="File of ticker symbols, one or more per line ('#' comments allowed)")
+    parser.add_argument("--end-date", type=str, default=datetime.now().strftime("%Y-%m-%d"), help="End date (YYYY-MM-DD). Defaults to today")
+    parser.add_argument("--start-date", type=str, help="Start date (YYYY-MM-DD). Defaults to 1 year before end date")
+    parser.add_argument("--analysts", type=str, required=False, help="Comma-separated list of analysts whose data to fetch (e.g., michael_burry,warren_buffett)")
+    parser.add_argument("--analysts-all", action="store_true", help="Fetch data for all available analysts (default when --analysts is not given)")
+    parser.add_argument("--workers", type=int, default=8, help="Number of tickers to fetch concurrently (default: 8)")
+    parser.add_argument("--state-file", type=str, help="Where progress is saved for resuming (default: CACHE_DIR/warm_cache_state.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and warm every ticker again")
+    parser.add_argument("--export-snapshot", type=str, help="Also write the warmed cache to this snapshot file (load it with CACHE_SNAPSHOT)")
+    args = parser.parse_args()
+
+    # Validate dates if provided
+    start_date = args.start_date or (datetime.strptime(args.end_date, "%Y-%m-%d") - relativedelta(years=1)).strftime("%Y-%m-%d")
+    for value in (start_date, args.end_date):
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Date {value} must be in YYYY-MM-DD format")
+
+    if args.analysts and not args.analysts_all:
+        selected_analysts = [a.strip() for a in args.analysts.split(",") if a.strip()]
+        if unknown := [a for a in selected_analysts if a not in ANALYST_CONFIG]:
+            print(f"{Fore.RED}Unknown analysts: {', '.join(unknown)}{Style.RESET_ALL}")
+            sys.exit(1)
+    else:
+        selected_analysts = [value for _, value in ANALYST_ORDER]
+
+    if os.getenv("CACHE_BACKEND", "memory").lower() == "memory" and not args.export_snapshot:
+        print(f"{Fore.YELLOW}Warning: CACHE_BACKEND=memory, so the warmed data is lost when this process exits. Set CACHE_BACKEND=sqlite.{Style.RESET_ALL}")
+
+    tickers = read_universe(args.universe)
+    # A snapshot holds what is in memory, so tickers warmed by an earlier run are read back (from the backend) too
+    failures = warm_cache(tickers, start_date, args.end_date, selected_analysts, workers=args.workers, state_path=args.state_file, restart=args.restart or bool(args.export_snapshot))
+    print_data_metrics(get_data_metrics().snapshot(), get_cache().get_memory_stats())
+    if args.export_snapshot:
+        written = get_cache().export_snapshot(args.export_snapshot)
+        print(f"Wrote {written['rows']} rows for {written['tickers']} tickers to {args.export_snapshot} ({os.path.getsize(args.export_snapshot) / 1e6:.1f} MB)")
+    sys.exit(1 if failures else 0)
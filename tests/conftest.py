@@ -0,0 +1,65 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.data.cache import get_cache
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: dict):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = json.dumps(payload)
+
+    def json(self) -> dict:
+        return self._payload
+
+
+class FakeClient:
+    """Stands in for FinancialDatasetsClient, answering each request with handler(method, url, body) -> (status, payload)."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests: list[tuple[str, str, dict | None]] = []
+
+    def get(self, url: str) -> FakeResponse:
+        self.requests.append(("GET", url, None))
+        return FakeResponse(*self.handler("GET", url, None))
+
+    def post(self, url: str, json: dict) -> FakeResponse:
+        self.requests.append(("POST", url, json))
+        return FakeResponse(*self.handler("POST", url, json))
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Install a FakeClient as the API client of src.tools.api; call it with the request handler."""
+    from src.tools import api
+
+    def install(handler) -> FakeClient:
+        client = FakeClient(handler)
+        monkeypatch.setattr(api, "_client", client)
+        return client
+
+    return install
+
+
+@pytest.fixture
+def ticker(request):
+    """A ticker unique to the test, dropped from the shared cache afterwards."""
+    name = f"TEST{abs(hash(request.node.nodeid)) % 10**8}"
+    yield name
+    get_cache().clear(ticker=name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of src.data.cache, advanced by hand with clock.advance(seconds)."""
+    from src.data import cache
+
+    now = [time.monotonic()]
+    fake = SimpleNamespace(time=time.time, monotonic=lambda: now[0], advance=lambda seconds: now.__setitem__(0, now[0] + seconds))
+    monkeypatch.setattr(cache, "time", fake)
+    return fake
@@ -0,0 +1,20 @@
+from src.tools.api_archive import ResponseArchive
+
+URL = "https://api.financialdatasets.ai/prices/?ticker=X&start_date=2024-01-01&end_date=2024-01-31"
+
+
+def test_error_response_keeps_the_good_recording(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    archive.save("GET", URL, None, 200, b'{"prices": []}', "application/json")
+    archive.save("GET", URL, None, 503, b"Service Unavailable", "text/plain")
+
+    assert archive.load("GET", URL)["status"] == 200
+
+
+def test_errors_are_recorded_when_nothing_better_was(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    archive.save("GET", URL, None, 404, b'{"error": "not found"}', "application/json")
+    assert archive.load("GET", URL)["status"] == 404
+
+    archive.save("GET", URL, None, 200, b'{"prices": []}', "application/json")
+    assert archive.load("GET", URL)["status"] == 200
@@ -0,0 +1,217 @@
+import datetime
+from urllib.parse import parse_qs, urlparse
+
+from src.data import cache
+from src.data.cache import get_cache
+from src.data.models import FinancialMetrics
+from src.tools import api
+
+TODAY = datetime.date(2025, 3, 12)
+
+
+def _prices_handler(method, url, body):
+    prices = [
+        {"open": 10.0, "close": 11.0, "high": 12.0, "low": 9.0, "volume": 1000, "time": "2024-01-02"},
+        {"open": 11.0, "close": 12.0, "high": 13.0, "low": 10.0, "volume": 1200, "time": "2024-01-03"},
+    ]
+    return 200, {"ticker": "X", "prices": prices}
+
+
+def test_fetchers_share_the_cache_instance():
+    assert api._cache is get_cache()
+
+
+def test_snapshot_exports_rows_warmed_through_the_fetchers(fake_client, ticker, tmp_path):
+    fake_client(_prices_handler)
+    assert len(api.get_prices(ticker, "2024-01-01", "2024-01-05")) == 2
+
+    counts = get_cache().export_snapshot(str(tmp_path / "snapshot.json.gz"))
+
+    assert counts["rows"] >= 2
+
+
+def test_memory_stats_count_rows_cached_by_the_fetchers(fake_client, ticker):
+    fake_client(_prices_handler)
+    api.get_prices(ticker, "2024-01-01", "2024-01-05")
+
+    stats = get_cache().get_memory_stats()
+
+    assert stats["bytes"] > 0
+    assert stats["datasets"]["prices"]["tickers"] >= 1
+    assert get_cache().get_memory_usage("prices", ticker) > 0
+
+
+def _query(url: str) -> dict[str, str]:
+    return {name: values[0] for name, values in parse_qs(urlparse(url).query).items()}
+
+
+def _insider_trade(filing_date: str) -> dict:
+    fields = ("issuer", "name", "title", "is_board_director", "transaction_date", "transaction_shares", "transaction_price_per_share", "transaction_value", "shares_owned_before_transaction", "shares_owned_after_transaction", "security_title")
+    return {**dict.fromkeys(fields), "ticker": "X", "name": f"Filer {filing_date}", "filing_date": filing_date}
+
+
+def test_filings_arriving_later_today_are_fetched(fake_client, ticker, monkeypatch, clock):
+    monkeypatch.setattr(cache, "_today", lambda: TODAY)
+    filings = [_insider_trade("2025-03-05")]
+
+    def handler(method, url, body):
+        query = _query(url)
+        trades = [t for t in filings if query.get("filing_date_gte", "") <= t["filing_date"] <= query["filing_date_lte"]]
+        return 200, {"insider_trades": sorted(trades, key=lambda t: t["filing_date"], reverse=True)[: int(query["limit"])]}
+
+    client = fake_client(handler)
+    assert len(api.get_insider_trades(ticker, TODAY.isoformat())) == 1
+
+    # Today stays covered for a while, then is fetched again
+    filings.append(_insider_trade(TODAY.isoformat()))
+    assert len(api.get_insider_trades(ticker, TODAY.isoformat())) == 1
+    assert len(client.requests) == 1
+    clock.advance(get_cache().recent_ttl + 1)
+    assert len(api.get_insider_trades(ticker, TODAY.isoformat())) == 2
+
+    tomorrow = TODAY + datetime.timedelta(days=1)
+    monkeypatch.setattr(cache, "_today", lambda: tomorrow)
+    clock.advance(get_cache().recent_ttl + 1)
+    filings.append(_insider_trade(tomorrow.isoformat()))
+    assert len(api.get_insider_trades(ticker, tomorrow.isoformat())) == 3
+
+
+def test_unbounded_call_after_a_narrow_sync_fetches_older_items(fake_client, ticker, monkeypatch):
+    monkeypatch.setattr(cache, "_today", lambda: TODAY)
+    filings = [_insider_trade(day) for day in ("2025-01-10", "2025-02-10", "2025-02-20", "2025-03-01", "2025-03-05")]
+
+    def handler(method, url, body):
+        query = _query(url)
+        trades = [t for t in filings if query.get("filing_date_gte", "") <= t["filing_date"] <= query["filing_date_lte"]]
+        return 200, {"insider_trades": sorted(trades, key=lambda t: t["filing_date"], reverse=True)[: int(query["limit"])]}
+
+    fake_client(handler)
+    assert len(api.get_insider_trades(ticker, "2025-03-10", start_date="2025-03-03")) == 1
+
+    trades = api.get_insider_trades(ticker, "2025-03-10", limit=3)
+
+    assert [trade.filing_date for trade in trades] == ["2025-03-05", "2025-03-01", "2025-02-20"]
+
+
+def test_price_bars_published_after_a_request_are_fetched(fake_client, ticker, monkeypatch, clock):
+    monkeypatch.setattr(cache, "_today", lambda: TODAY)
+    monkeypatch.setattr(api, "_today", lambda: TODAY)
+    # Yesterday's bar is not published yet
+    bars = [{"open": 10.0, "close": 11.0, "high": 12.0, "low": 9.0, "volume": 1000, "time": day} for day in ("2025-03-06", "2025-03-07", "2025-03-10")]
+
+    def handler(method, url, body):
+        query = _query(url)
+        return 200, {"ticker": ticker, "prices": [bar for bar in bars if query["start_date"] <= bar["time"] <= query["end_date"]]}
+
+    client = fake_client(handler)
+    assert len(api.get_prices(ticker, "2025-03-03", TODAY.isoformat())) == 3
+    # Agents asking again right away are answered from the cache
+    assert len(api.get_prices(ticker, "2025-03-03", TODAY.isoformat())) == 3
+    assert len(client.requests) == 1
+
+    tomorrow = TODAY + datetime.timedelta(days=1)
+    monkeypatch.setattr(cache, "_today", lambda: tomorrow)
+    monkeypatch.setattr(api, "_today", lambda: tomorrow)
+    clock.advance(24 * 60 * 60)
+    bars += [{**bars[-1], "time": day} for day in ("2025-03-11", TODAY.isoformat())]
+    assert [price.time for price in api.get_prices(ticker, "2025-03-03", tomorrow.isoformat())][-3:] == ["2025-03-10", "2025-03-11", TODAY.isoformat()]
+
+
+def test_settled_ranges_without_bars_stay_covered(fake_client, ticker, monkeypatch):
+    monkeypatch.setattr(api, "_today", lambda: TODAY)
+    client = fake_client(lambda method, url, body: (200, {"ticker": ticker, "prices": []}))
+
+    # A weekend long past has no bars, and asking again should not go back to the API
+    api.get_prices(ticker, "2025-01-04", "2025-01-05")
+    api.get_prices(ticker, "2025-01-04", "2025-01-05")
+
+    assert len(client.requests) == 1
+
+
+def _clear_line_items(*tickers: str):
+    for name in tickers:
+        get_cache().clear("line_items", api._line_items_cache_key(name, "ttm"))
+
+
+def test_line_items_without_reports_are_not_requested_again(fake_client, ticker):
+    client = fake_client(lambda method, url, body: (200, {"search_results": []}))
+    try:
+        assert api.search_line_items(ticker, ["free_cash_flow"], "2024-12-31") == []
+        assert api.search_line_items(ticker, ["free_cash_flow"], "2024-12-31") == []
+    finally:
+        _clear_line_items(ticker)
+
+    assert len(client.requests) == 1
+
+
+def test_batched_line_items_without_reports_are_not_requested_again(fake_client, ticker):
+    def handler(method, url, body):
+        return 200, {"search_results": [{"ticker": "OTHER", "report_period": "2024-09-30", "period": "ttm", "currency": "USD", "free_cash_flow": 1.0}]}
+
+    client = fake_client(handler)
+    tickers = [ticker, f"{ticker}B"]
+    try:
+        assert api.search_line_items_batch(tickers, ["free_cash_flow"], "2024-12-31") == {ticker: [], f"{ticker}B": []}
+        api.search_line_items_batch(tickers, ["free_cash_flow"], "2024-12-31")
+    finally:
+        _clear_line_items(*tickers)
+
+    assert len(client.requests) == 1
+
+
+def _quarterly_line_items_handler(method, url, body):
+    periods = [f"{year}-{month}" for year in range(2020, 2025) for month in ("03-31", "06-30", "09-30", "12-31")]
+    reports = [{"ticker": body["tickers"][0], "report_period": period, "period": "ttm", "currency": "USD", "free_cash_flow": float(i)} for i, period in enumerate(periods) if period <= body["end_date"]]
+    return 200, {"search_results": reports[::-1][: body["limit"]]}
+
+
+def test_synced_line_items_serve_every_end_date_in_the_range(fake_client, ticker):
+    client = fake_client(_quarterly_line_items_handler)
+    try:
+        api.sync_line_items(ticker, ["free_cash_flow"], "2023-01-01", "2024-12-31", limit=4)
+        requests = len(client.requests)
+        results = {end_date: api.search_line_items(ticker, ["free_cash_flow"], end_date, limit=4) for end_date in ("2023-01-01", "2023-05-15", "2023-11-30", "2024-08-01")}
+    finally:
+        _clear_line_items(ticker)
+
+    assert len(client.requests) == requests
+    for end_date, result in results.items():
+        expected = _quarterly_line_items_handler("POST", "", {"tickers": [ticker], "end_date": end_date, "limit": 4})[1]["search_results"]
+        assert [item.report_period for item in result] == [report["report_period"] for report in expected]
+
+
+def test_market_caps_between_prefetched_dates_come_from_the_cache(fake_client, ticker):
+    def handler(method, url, body):
+        metrics = [{**dict.fromkeys(FinancialMetrics.model_fields), "ticker": ticker, "report_period": period, "period": "ttm", "currency": "USD", "market_cap": cap} for period, cap in (("2024-09-30", 3.0), ("2024-06-30", 2.0), ("2023-12-31", 1.0))]
+        return 200, {"financial_metrics": [m for m in metrics if m["report_period"] <= _query(url)["report_period_lte"]]}
+
+    client = fake_client(handler)
+    try:
+        api.get_financial_metrics(ticker, "2024-12-31")
+        requests = len(client.requests)
+        market_caps = [api.get_market_cap(ticker, date) for date in ("2024-07-15", "2024-03-01")]
+    finally:
+        get_cache().clear(ticker=ticker)
+
+    assert market_caps == [2.0, 1.0]
+    assert len(client.requests) == requests
+
+
+def test_tickers_cut_off_by_a_full_batch_are_fetched_on_their_own(fake_client, ticker):
+    def handler(method, url, body):
+        report = {"report_period": "2024-09-30", "period": "ttm", "currency": "USD", "free_cash_flow": 1.0}
+        if len(body["tickers"]) > 1:
+            # The first ticker uses up the whole page
+            return 200, {"search_results": [{**report, "ticker": ticker, "report_period": f"2024-0{month}-15"} for month in range(4, 0, -1)]}
+        return 200, {"search_results": [{**report, "ticker": body["tickers"][0]}]}
+
+    client = fake_client(handler)
+    tickers = [ticker, f"{ticker}B"]
+    try:
+        results = api.search_line_items_batch(tickers, ["free_cash_flow"], "2024-12-31", limit=2)
+    finally:
+        _clear_line_items(*tickers)
+
+    assert [item.report_period for item in results[ticker]] == ["2024-04-15", "2024-03-15"]
+    assert [item.report_period for item in results[f"{ticker}B"]] == ["2024-09-30"]
+    assert [request[2]["tickers"] for request in client.requests] == [tickers, [f"{ticker}B"]]
@@ -0,0 +1,157 @@
+import asyncio
+import email.utils
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from src.tools import api_client
+from src.tools.api_client import AsyncFinancialDatasetsClient, FinancialDatasetsClient, TokenBucket, aclose_async_api_client, get_async_api_client
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Answers each request with the next (status, headers) of a script; an exception in the script is raised instead."""
+
+    def __init__(self, script: list):
+        super().__init__()
+        self.script = list(script)
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step
+        response = requests.Response()
+        response.status_code, response.headers, response._content, response.request, response.url = status, requests.structures.CaseInsensitiveDict(headers), b"{}", request, request.url
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time for api_client: sleeps advance monotonic time instantly and are recorded."""
+    state = SimpleNamespace(now=1000.0, sleeps=[])
+
+    def sleep(seconds):
+        state.sleeps.append(seconds)
+        state.now += seconds
+
+    monkeypatch.setattr(api_client, "time", SimpleNamespace(monotonic=lambda: state.now, sleep=sleep, time=time.time))
+    return state
+
+
+def _client(script: list, **kwargs) -> tuple[FinancialDatasetsClient, ScriptedAdapter]:
+    adapter = ScriptedAdapter(script)
+    return FinancialDatasetsClient(base_url="http://test", adapter=adapter, **kwargs), adapter
+
+
+def test_transient_failures_are_retried_with_jittered_backoff(clock):
+    client, adapter = _client([(503, {}), (502, {}), (200, {})], backoff_base=0.5)
+
+    response = client.get("/prices/?ticker=X")
+
+    assert response.status_code == 200 and adapter.calls == 3
+    assert len(clock.sleeps) == 2
+    assert 0 <= clock.sleeps[0] <= 0.5 and 0 <= clock.sleeps[1] <= 1.0
+
+
+def test_the_last_response_is_returned_once_retries_run_out(clock):
+    client, adapter = _client([(429, {})] * 3, max_retries=2)
+
+    assert client.get("/prices/?ticker=X").status_code == 429
+    assert adapter.calls == 3
+
+
+def test_other_errors_are_not_retried(clock):
+    client, adapter = _client([(404, {})])
+
+    assert client.get("/prices/?ticker=X").status_code == 404
+    assert adapter.calls == 1 and clock.sleeps == []
+
+
+def test_retry_after_seconds_and_dates_are_honoured_up_to_backoff_max(clock):
+    retry_at = email.utils.formatdate(time.time() + 20, usegmt=True)
+    client, _ = _client([(429, {"Retry-After": "3"}), (503, {"Retry-After": retry_at}), (429, {"Retry-After": "120"}), (200, {})], backoff_max=30.0)
+
+    client.get("/prices/?ticker=X")
+
+    assert clock.sleeps[0] == 3.0
+    assert 17 <= clock.sleeps[1] <= 20
+    assert clock.sleeps[2] == 30.0
+
+
+def test_connection_errors_are_retried_then_raised(clock):
+    client, adapter = _client([requests.ConnectionError("reset"), (200, {})])
+    assert client.get("/prices/?ticker=X").status_code == 200
+
+    client, adapter = _client([requests.ConnectionError("reset")] * 2, max_retries=1)
+    with pytest.raises(requests.ConnectionError):
+        client.get("/prices/?ticker=X")
+    assert adapter.calls == 2
+
+
+def test_token_bucket_allows_a_burst_then_paces_requests(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(5):
+        bucket.acquire()
+
+    # Three back to back, then one every half second
+    assert clock.sleeps == pytest.approx([0.5, 0.5])
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    for _ in range(3):
+        bucket.acquire()
+
+    assert clock.sleeps == pytest.approx([1.0])
+
+
+def test_clients_sharing_a_bucket_share_the_rate_limit(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    first, _ = _client([(200, {})], bucket=bucket)
+    second, _ = _client([(200, {})], bucket=bucket)
+
+    first.get("/prices/?ticker=X")
+    second.get("/prices/?ticker=Y")
+
+    assert clock.sleeps == pytest.approx([1.0])
+
+
+def test_async_client_retries_like_the_sync_client():
+    statuses = [503, 429, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json={})
+
+    async def main():
+        client = AsyncFinancialDatasetsClient(base_url="http://test", backoff_base=0.0, transport=httpx.MockTransport(handler))
+        try:
+            return await client.get("/prices/?ticker=X")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()).status_code == 200
+    assert statuses == []
+
+
+def test_aclose_closes_the_loops_async_client():
+    async def main():
+        client = get_async_api_client()
+        await aclose_async_api_client()
+        return client, get_async_api_client()
+
+    closed, reopened = asyncio.run(main())
+
+    assert closed._client.is_closed
+    assert reopened is not closed
@@ -0,0 +1,150 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+import pandas as pd
+import pytest
+
+from src.tools import api_hk
+from src.tools.financial_mapping_hk import STANDARD_MAPPING
+
+DATES = [pd.Timestamp("2024-12-31"), pd.Timestamp("2023-12-31")]
+
+
+def _statement(rows: dict[str, list]) -> pd.DataFrame:
+    return pd.DataFrame([[item, *values] for item, values in rows.items()], columns=["item", *DATES])
+
+
+def _dict_merge(balance_sheet: pd.DataFrame, income_statement: pd.DataFrame, cash_flow: pd.DataFrame) -> dict:
+    """The row-by-row merge merge_financial_statements used before it was vectorized."""
+    merged = {}
+    for date_col in [col for col in balance_sheet.columns if isinstance(col, pd.Timestamp)]:
+        period_data = {}
+        for statement, df in (("balance_sheet", balance_sheet), ("income_statement", income_statement), ("cash_flow", cash_flow)):
+            for _, row in df.iterrows():
+                if pd.notna(row[date_col]) and row["item"] in STANDARD_MAPPING[statement]:
+                    period_data[STANDARD_MAPPING[statement][row["item"]]] = float(row[date_col])
+        merged[date_col.strftime("%Y-%m-%d")] = period_data
+    return merged
+
+
+def _random_statement(rng: random.Random, statement: str) -> pd.DataFrame:
+    items = rng.sample(list(STANDARD_MAPPING[statement]), 8) + ["未映射科目", "其他"]
+    # Repeated items: the later row wins
+    items += rng.sample(items, 2)
+    cells = lambda: [rng.choice([np.nan, pd.NA, rng.uniform(-1e9, 1e9), float(rng.randrange(100))]) for _ in DATES]
+    return pd.DataFrame([[item, *cells()] for item in items], columns=["item", *DATES])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_merge_matches_the_row_by_row_merge(seed):
+    rng = random.Random(seed)
+    statements = [_random_statement(rng, statement) for statement in ("balance_sheet", "income_statement", "cash_flow")]
+
+    assert api_hk.merge_financial_statements(*statements) == _dict_merge(*statements)
+
+
+def test_empty_statements_merge_like_the_row_by_row_merge():
+    balance_sheet = _statement({"总资产": [100.0, np.nan]})
+    empty = _statement({})
+
+    assert api_hk.merge_financial_statements(balance_sheet, empty, empty) == _dict_merge(balance_sheet, empty, empty) == {"2024-12-31": {"total_assets": 100.0}, "2023-12-31": {}}
+    assert api_hk.merge_financial_statements(empty, empty, empty) == _dict_merge(empty, empty, empty)
+
+
+def test_statements_that_failed_to_load_are_skipped():
+    balance_sheet = _statement({"总资产": [100.0, 90.0]})
+
+    merged = api_hk.merge_financial_statements(balance_sheet, pd.DataFrame(), pd.DataFrame())
+
+    assert merged == {"2024-12-31": {"total_assets": 100.0}, "2023-12-31": {"total_assets": 90.0}}
+
+
+def _snapshot(code: str):
+    return SimpleNamespace(code=code, update_time="2025-03-12 16:08:00", total_market_val=500.0, outstanding_shares=10.0, pb_ratio=2.0, pe_ratio=15.0, last_price=50.0, open_price=49.0, high_price=51.0, low_price=48.0, prev_close_price=49.5)
+
+
+@pytest.fixture
+def hk_workbooks(monkeypatch):
+    """Statements of every HK ticker, and the tickers market snapshots were requested for."""
+    statements = {"balance": _statement({"总资产": [100.0, 90.0]}), "income": _statement({}), "cash": _statement({})}
+    monkeypatch.setattr(api_hk.os.path, "exists", lambda path: True)
+    monkeypatch.setattr(api_hk, "load_excel", lambda file_path, sheet_name: next(df for name, df in statements.items() if name in file_path))
+    requested = []
+    monkeypatch.setattr(api_hk.FutuMarket, "get_market_snapshot", lambda tickers: requested.extend(tickers) or [_snapshot(ticker) for ticker in tickers])
+    api_hk.clear_financial_metrics_hk_cache()
+    yield requested
+    api_hk.clear_financial_metrics_hk_cache()
+
+
+def test_hk_metrics_are_reused_across_calls(hk_workbooks):
+    first = api_hk.get_financial_metrics_hk("HK.00001")
+    second = api_hk.get_financial_metrics_hk("HK.00001")
+
+    assert first == second and first[0].market_cap == 500.0
+    assert hk_workbooks == ["HK.00001"]
+
+
+def test_batched_hk_metrics_share_one_snapshot_request_and_are_reused(hk_workbooks):
+    batch = api_hk.get_financial_metrics_hk_batch(["HK.00001", "HK.00002"])
+    api_hk.get_financial_metrics_hk("HK.00002")
+
+    assert list(batch) == ["HK.00001", "HK.00002"] and all(batch.values())
+    assert hk_workbooks == ["HK.00001", "HK.00002"]
+
+
+def test_derived_metrics_without_a_market_snapshot(monkeypatch):
+    monkeypatch.setattr(api_hk.FutuMarket, "get_market_snapshot", lambda tickers: [])
+
+    metrics = api_hk.calculate_derived_metrics("HK.00001", {"gross_profit": 30.0, "revenue": 100.0})
+
+    assert metrics["gross_margin"] == 30.0
+    assert metrics["market_cap"] is None
+
+
+def _growth_frame(rows: dict[str, dict[str, float]]) -> pd.DataFrame:
+    return pd.DataFrame.from_dict(rows, orient="index").set_axis(pd.DatetimeIndex(list(rows)))
+
+
+def test_growth_compares_the_previous_period_of_the_same_type():
+    # Latest first, as the workbooks list them
+    frame = _growth_frame({
+        "2024-12-31": {"revenue": 150.0, "profit_attributable": -10.0},
+        "2024-06-30": {"revenue": 70.0, "profit_attributable": 5.0},
+        "2023-12-31": {"revenue": 120.0, "profit_attributable": -20.0},
+        "2023-06-30": {"revenue": 50.0, "profit_attributable": 0.0},
+    })
+
+    growth = api_hk.calculate_derived_metrics_frame(frame, _snapshot("HK.00001"))
+
+    assert growth["revenue_growth"].tolist()[:3] == pytest.approx([0.25, 0.4, np.nan], nan_ok=True)
+    # (current - previous) / |previous|, so a smaller loss is positive growth
+    assert growth.loc["2024-12-31", "earnings_growth"] == pytest.approx(0.5)
+    # No growth from a zero base, nor for the first period of a type
+    assert np.isnan(growth.loc["2024-06-30", "earnings_growth"])
+    assert growth.loc[["2023-12-31", "2023-06-30"], "revenue_growth"].isna().all()
+
+
+def test_growth_skips_periods_more_than_a_year_apart():
+    frame = _growth_frame({"2025-03-31": {"revenue": 40.0}, "2023-03-31": {"revenue": 20.0}, "2022-03-31": {"revenue": 10.0}})
+
+    growth = api_hk.calculate_derived_metrics_frame(frame, _snapshot("HK.00001"))["revenue_growth"]
+
+    assert np.isnan(growth["2025-03-31"])
+    assert growth["2023-03-31"] == pytest.approx(1.0)
+
+
+def test_growth_of_derived_fields_and_the_built_models():
+    frame = _growth_frame({
+        "2024-12-31": {"net_cash_operating": 100.0, "fixed_assets_acquisition": 40.0},
+        "2023-12-31": {"net_cash_operating": 80.0, "fixed_assets_acquisition": 50.0},
+    })
+
+    metrics = api_hk.calculate_derived_metrics_frame(frame, _snapshot("HK.00001"))
+    models = api_hk.build_financial_metrics("HK.00001", frame, metrics)
+
+    # free_cash_flow = net_cash_operating - fixed_assets_acquisition: 60 against 30
+    assert models[0].free_cash_flow_growth == pytest.approx(1.0)
+    assert models[1].free_cash_flow_growth is None
+    assert all(model.revenue_growth is None and model.ebitda_growth is None for model in models)
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from src.data import cache_backend
+from src.data.cache import Cache
+from src.data.cache_backend import SQLiteCacheBackend
+
+HOUR = 60 * 60
+
+
+def _trade(filing_date: str) -> dict:
+    return {"ticker": "X", "name": "Jane Doe", "filing_date": filing_date, "transaction_date": filing_date, "transaction_shares": 100.0, "transaction_price_per_share": 10.0, "security_title": "Common"}
+
+
+def test_extended_coverage_expires_with_its_oldest_rows(tmp_path, monkeypatch):
+    clock = SimpleNamespace(time=lambda: 1_700_000_000.0)
+    monkeypatch.setattr(cache_backend, "time", clock)
+    backend = SQLiteCacheBackend(str(tmp_path))
+    cache = Cache(backend)
+
+    cache.set_insider_trades("X", [_trade("2024-02-15"), _trade("2024-05-20")])
+    cache.add_covered_range("insider_trades", "X", "2024-01-01", "2024-06-30")
+    clock.time = lambda: 1_700_000_000.0 + 11 * HOUR
+    cache.set_insider_trades("X", [_trade("2024-07-10")])
+    cache.add_covered_range("insider_trades", "X", "2024-07-01", "2024-07-31")
+
+    # The January to June rows are past the 12 hour TTL, so the merged range must not claim they are cached
+    clock.time = lambda: 1_700_000_000.0 + 13 * HOUR
+    reloaded = Cache(backend)
+    assert reloaded.get_missing_ranges("insider_trades", "X", "2024-01-01", "2024-07-31") != []
+    assert reloaded.get_missing_ranges("insider_trades", "X", "2024-01-01", "2024-06-30") == [("2024-01-01", "2024-06-30")]
+
+
+def test_refetched_range_gets_a_new_fetch_time(tmp_path, monkeypatch):
+    clock = SimpleNamespace(time=lambda: 1_700_000_000.0)
+    monkeypatch.setattr(cache_backend, "time", clock)
+    backend = SQLiteCacheBackend(str(tmp_path))
+    Cache(backend).add_covered_range("insider_trades", "X", "2024-01-01", "2024-06-30")
+
+    # A later process finds the range expired and fetches it again
+    clock.time = lambda: 1_700_000_000.0 + 13 * HOUR
+    cache = Cache(backend)
+    assert cache.get_missing_ranges("insider_trades", "X", "2024-01-01", "2024-06-30") == [("2024-01-01", "2024-06-30")]
+    cache.add_covered_range("insider_trades", "X", "2024-01-01", "2024-06-30")
+
+    clock.time = lambda: 1_700_000_000.0 + 14 * HOUR
+    assert Cache(backend).get_missing_ranges("insider_trades", "X", "2024-01-01", "2024-06-30") == []
@@ -0,0 +1,71 @@
+import datetime
+
+from src.data.cache import Cache
+from src.data.models import Price
+
+
+def _prices(days: int, offset: int = 0) -> list[dict]:
+    start = datetime.date(2024, 1, 1) + datetime.timedelta(days=offset)
+    return [{"open": 10.0, "close": 11.0, "high": 12.0, "low": 9.0, "volume": 1000, "time": (start + datetime.timedelta(days=i)).isoformat()} for i in range(days)]
+
+
+def _entry_bytes(days: int = 50) -> int:
+    cache = Cache()
+    cache.set_prices("X", _prices(days))
+    return cache.get_memory_usage("prices", "X")
+
+
+def test_bytes_are_counted_per_entry_and_released_on_clear():
+    cache = Cache()
+    cache.set_prices("A", _prices(50))
+    cache.set_prices("B", _prices(100))
+    small, large = cache.get_memory_usage("prices", "A"), cache.get_memory_usage("prices", "B")
+
+    assert 0 < small < large
+    assert cache.get_memory_stats()["bytes"] == small + large == cache.get_memory_stats()["datasets"]["prices"]["bytes"]
+
+    cache.set_prices("A", _prices(50, offset=50))
+    assert cache.get_memory_usage("prices", "A") > small
+
+    cache.clear("prices", "B")
+    assert cache.get_memory_stats()["bytes"] == cache.get_memory_usage("prices", "A")
+    assert cache.get_memory_stats()["datasets"]["prices"]["tickers"] == 1
+
+
+def test_derived_views_are_counted():
+    cache = Cache()
+    cache.set_prices("A", _prices(50))
+    rows_only = cache.get_memory_usage("prices", "A")
+
+    cache.get_price_frame("A", "2024-01-01", "2024-12-31")
+    with_columns = cache.get_memory_usage("prices", "A")
+    cache.get_models("prices", "A", Price)
+
+    assert rows_only < with_columns < cache.get_memory_usage("prices", "A")
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = Cache(max_bytes=int(_entry_bytes() * 3.5))
+    for ticker in ("A", "B", "C"):
+        cache.set_prices(ticker, _prices(50))
+        cache.add_covered_range("prices", ticker, "2024-01-01", "2024-02-19")
+    # Reading A makes B the least recently used
+    cache.get_prices("A")
+
+    cache.set_prices("D", _prices(50))
+
+    assert cache.get_prices("B") is None
+    assert cache.get_missing_ranges("prices", "B", "2024-01-01", "2024-02-19") == [("2024-01-01", "2024-02-19")]
+    assert all(cache.get_prices(ticker) for ticker in ("A", "C", "D"))
+    stats = cache.get_memory_stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= stats["max_bytes"]
+
+
+def test_the_most_recent_entry_is_kept_over_budget():
+    cache = Cache(max_bytes=1)
+    cache.set_prices("A", _prices(50))
+    cache.set_prices("B", _prices(50))
+
+    assert cache.get_prices("A") is None
+    assert cache.get_prices("B")
+    assert cache.get_memory_stats()["evictions"] == 1
@@ -0,0 +1,45 @@
+import time
+from types import SimpleNamespace
+
+from src.data import cache as cache_module
+from src.data.cache import Cache
+
+DAY = 24 * 60 * 60
+
+
+def _warm_cache() -> Cache:
+    cache = Cache()
+    cache.set_prices("X", [{"open": 10.0, "close": 11.0, "high": 12.0, "low": 9.0, "volume": 1000, "time": "2024-01-02"}])
+    cache.add_covered_range("prices", "X", "2024-01-01", "2024-01-05")
+    cache.set_company_news("X", [{"ticker": "X", "title": "Results", "author": "Reporter", "source": "Wire", "date": "2024-01-03", "url": "https://example.com/x", "sentiment": None}])
+    cache.add_covered_range("company_news", "X", "2024-01-01", "2024-01-05")
+    cache.set_market_cap("X", "2024-01-05", 1e9)
+    return cache
+
+
+def test_snapshot_skips_datasets_past_their_ttl(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot.json.gz")
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: time.time() - 7 * DAY, monotonic=time.monotonic))
+    _warm_cache().export_snapshot(path)
+    monkeypatch.setattr(cache_module, "time", time)
+
+    cache = Cache()
+    loaded = cache.load_snapshot(path)
+
+    assert loaded == {"tickers": 1, "rows": 1}
+    assert cache.get_prices("X")
+    assert cache.get_missing_ranges("prices", "X", "2024-01-01", "2024-01-05") == []
+    assert not cache.get_company_news("X")
+    assert cache.get_missing_ranges("company_news", "X", "2024-01-01", "2024-01-05") == [("2024-01-01", "2024-01-05")]
+    assert cache.get_market_cap("X", "2024-01-05") is None
+
+
+def test_fresh_snapshot_loads_every_dataset(tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+    _warm_cache().export_snapshot(path)
+
+    cache = Cache()
+    cache.load_snapshot(path)
+
+    assert cache.get_company_news("X")
+    assert cache.get_market_cap("X", "2024-01-05") == 1e9
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from src.tools import header_dates
+
+
+@pytest.fixture(autouse=True)
+def clear_headers():
+    header_dates.clear_header_cache()
+    yield
+    header_dates.clear_header_cache()
+
+
+def test_memoized_headers_follow_each_workbooks_format():
+    day_first = header_dates.parse_date_headers(["31/12/2024", "01/02/2024"])
+    month_first = header_dates.parse_date_headers(["12/31/2024", "01/02/2024"])
+
+    assert day_first == [pd.Timestamp("2024-12-31"), pd.Timestamp("2024-02-01")]
+    assert month_first == [pd.Timestamp("2024-12-31"), pd.Timestamp("2024-01-02")]
+
+
+def test_headers_seen_before_in_the_same_format_are_memo_hits():
+    header_dates.parse_date_headers(["31/12/2024", "01/02/2024"])
+    again = header_dates.parse_date_headers(["30/06/2024", "01/02/2024"])
+
+    assert again == [pd.Timestamp("2024-06-30"), pd.Timestamp("2024-02-01")]
+    assert header_dates.get_header_parse_stats()["cached"] == 1
+
+
+def test_ambiguous_headers_follow_the_first_unambiguous_sample():
+    headers = ["03/04/2024", "05/06/2024", "25/12/2023"]
+
+    # The first sample fits %d/%m/%Y before %m/%d/%Y, so the whole workbook is read day first
+    assert header_dates.parse_date_headers(headers) == [pd.Timestamp("2024-04-03"), pd.Timestamp("2024-06-05"), pd.Timestamp("2023-12-25")]
+    assert header_dates.get_header_parse_stats()["formats"] == {"%d/%m/%Y": 1}
+
+
+def test_month_first_workbooks_are_read_month_first():
+    headers = ["item", "12/31/2024", "06/30/2024", "01/02/2024"]
+
+    assert header_dates.parse_date_headers(headers)[1:] == [pd.Timestamp("2024-12-31"), pd.Timestamp("2024-06-30"), pd.Timestamp("2024-01-02")]
+    assert header_dates.get_header_parse_stats()["formats"] == {"%m/%d/%Y": 1}
+
+
+def test_unambiguous_headers_match_convert_to_datetime():
+    headers = ["2024-12-31", "2024年6月30日", "2023/12/31", "31-Dec-22", "Dec 31, 2021", "2021年四季度", "项目", pd.Timestamp("2020-12-31"), 2019, None]
+
+    parsed = header_dates.parse_date_headers(headers)
+
+    for header, value in zip(headers, parsed):
+        expected = pd.Timestamp(header) if isinstance(header, pd.Timestamp) else header_dates.convert_to_datetime(header)
+        assert (pd.isna(value) and pd.isna(expected)) or value == expected, header
+
+
+def test_headers_that_do_not_fit_the_format_fall_back():
+    parsed = header_dates.parse_date_headers(["2024-12-31", "2024/06/30", "备注"])
+    stats = header_dates.get_header_parse_stats()
+
+    assert parsed[:2] == [pd.Timestamp("2024-12-31"), pd.Timestamp("2024-06-30")] and pd.isna(parsed[2])
+    assert stats["inferred"] == 1 and stats["fallback"] == 2 and stats["unparsed"] == 1
+    assert set(stats["fallback_headers"]) == {"2024/06/30", "备注"}
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.models import Price
+from src.data.price_store import PRICE_COLUMNS, PriceColumns
+from src.tools import api
+
+ROWS = [
+    {"open": 10.0 + i, "close": 10.5 + i, "high": 11.0 + i, "low": 9.5 + i, "volume": 1000 * (i + 1), "time": time}
+    for i, time in enumerate(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-08", "2024-01-09"])
+]
+
+
+def _old_frame(rows: list[dict], start_date: str, end_date: str) -> pd.DataFrame:
+    """The DataFrame get_price_data built before the columnar store: prices_to_df of the Price models in range."""
+    return _ns(api.prices_to_df([Price(**row) for row in rows if start_date <= row["time"] <= end_date]))
+
+
+def _ns(df: pd.DataFrame) -> pd.DataFrame:
+    """Price columns with the index in nanoseconds like PriceColumns; newer pandas parses date strings to coarser units."""
+    return df[list(PRICE_COLUMNS)].set_axis(df.index.as_unit("ns"))
+
+
+@pytest.mark.parametrize("start_date, end_date", [("2024-01-01", "2024-01-31"), ("2024-01-03", "2024-01-08"), ("2024-01-06", "2024-01-07"), ("2024-01-09", "2024-01-09")])
+def test_frames_match_the_dataframe_path(start_date, end_date):
+    frame = PriceColumns(ROWS).frame(start_date, end_date)
+
+    if frame.empty:
+        assert not any(start_date <= row["time"] <= end_date for row in ROWS)
+    else:
+        pd.testing.assert_frame_equal(frame, _old_frame(ROWS, start_date, end_date))
+
+
+def test_frames_share_read_only_arrays():
+    store = PriceColumns(ROWS)
+    frame = store.frame("2024-01-01", "2024-01-31")
+
+    assert np.shares_memory(frame["close"].to_numpy(), store.close)
+    with pytest.raises(ValueError):
+        store.close[0] = 0.0
+
+
+def test_get_price_data_matches_prices_to_df(fake_client, ticker):
+    fake_client(lambda method, url, body: (200, {"ticker": ticker, "prices": ROWS}))
+
+    frame = api.get_price_data(ticker, "2024-01-03", "2024-01-08")
+
+    pd.testing.assert_frame_equal(frame, _ns(api.prices_to_df(api.get_prices(ticker, "2024-01-03", "2024-01-08"))))
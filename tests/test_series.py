@@ -0,0 +1,86 @@
+import datetime
+import random
+from operator import itemgetter
+
+import pytest
+
+from src.data import series
+from src.data.series import SortedSeries
+
+
+def _row(day: int) -> dict:
+    return {"time": (datetime.date(2024, 1, 1) + datetime.timedelta(days=day)).isoformat(), "close": float(day)}
+
+
+def _series() -> SortedSeries:
+    return SortedSeries(itemgetter("time"), itemgetter("time"))
+
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    monkeypatch.setattr(series, "SEGMENT_ROWS", 4)
+
+
+def test_batches_appended_at_either_end_become_segments(small_segments):
+    s = _series()
+    s.merge([_row(day) for day in range(10, 20)])
+    s.merge([_row(day) for day in range(20, 30)])
+    s.merge([_row(day) for day in range(0, 10)])
+
+    assert [row["time"] for row in s.rows] == [_row(day)["time"] for day in range(30)]
+    assert s.segments == 3 and len(s) == 30
+
+
+def test_short_tail_segments_are_coalesced(small_segments):
+    s = _series()
+    for day in range(6):
+        s.merge([_row(day)])
+
+    assert s.segments == 2
+    assert [row["close"] for row in s.rows] == [float(day) for day in range(6)]
+
+
+def test_cached_keys_are_not_merged_again():
+    s = _series()
+    s.merge([_row(1), _row(2)])
+    version = s.version
+    s.merge([{**_row(2), "close": -1.0}, _row(1)])
+
+    assert s.version == version
+    assert [row["close"] for row in s.rows] == [1.0, 2.0]
+
+
+def test_random_merges_match_a_sorted_list(small_segments):
+    rng = random.Random(7)
+    s, expected = _series(), {}
+    for _ in range(60):
+        start = rng.randrange(0, 200)
+        batch = [_row(day) for day in rng.sample(range(start, start + 20), rng.randrange(1, 10))]
+        s.merge(batch)
+        for row in batch:
+            expected.setdefault(row["time"], row)
+
+        assert [row["time"] for row in s.rows] == sorted(expected)
+    assert len(s) == len(expected)
+
+
+def test_range_slices_are_inclusive_and_span_segments(small_segments):
+    rng = random.Random(11)
+    s = _series()
+    days = list(range(0, 100, 3))
+    chunks = [days[i : i + 5] for i in range(0, len(days), 5)]
+    rng.shuffle(chunks)
+    for chunk in chunks:
+        s.merge([_row(day) for day in chunk])
+    times = [row["time"] for row in s.rows]
+    assert s.segments > 1
+
+    for _ in range(200):
+        start, end = sorted(_row(rng.randrange(-5, 105))["time"] for _ in range(2))
+        assert [row["time"] for row in s.range(start, end)] == [t for t in times if start <= t <= end]
+        lo, hi = s.bounds(start, end)
+        assert times[lo:hi] == [t for t in times if start <= t <= end]
+    assert s.range(None, times[2]) == s.rows[:3]
+    assert s.range(times[-2], None) == s.rows[-2:]
+    assert s.range("2030-01-01", "2031-01-01") == []
+    assert _series().range("2024-01-01", "2024-12-31") == []
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.tools.single_flight import async_single_flight
+
+
+def test_waiter_gets_the_result_when_the_leader_is_cancelled():
+    calls = []
+
+    @async_single_flight
+    async def fetch(ticker: str) -> list[str]:
+        calls.append(ticker)
+        await asyncio.sleep(0.05)
+        return [ticker]
+
+    async def main():
+        leader = asyncio.create_task(fetch("X"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(fetch("X"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == ["X"]
+    assert calls == ["X"]
+
+
+def test_call_is_cancelled_when_every_caller_is():
+    started, cancelled = [], []
+
+    @async_single_flight
+    async def fetch(ticker: str) -> str:
+        started.append(ticker)
+        try:
+            await asyncio.sleep(0.05 if len(started) > 1 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(ticker)
+            raise
+        return ticker
+
+    async def main():
+        callers = [asyncio.create_task(fetch("X")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        # A later call starts afresh instead of joining the cancelled execution
+        return await fetch("X")
+
+    assert asyncio.run(main()) == "X"
+    assert cancelled == ["X"]
+    assert started == ["X", "X"]
@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tools import statement_cache
+
+
+@pytest.fixture
+def sidecar_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(statement_cache, "STATEMENT_CACHE_DIR", str(tmp_path / "hk_statements"))
+    statement_cache.clear_statement_cache()
+    yield tmp_path
+    statement_cache.clear_statement_cache()
+
+
+def _workbook(tmp_path) -> str:
+    path = tmp_path / "statements.xlsx"
+    path.write_bytes(b"workbook")
+    return str(path)
+
+
+def _sheet() -> pd.DataFrame:
+    return pd.DataFrame({"item": ["总资产", "总负债"], pd.Timestamp("2024-12-31"): [10.0, np.nan], pd.Timestamp("2023-12-31"): [8.0, 3.0], "备注": ["a", pd.NA]})
+
+
+def test_sheets_are_read_back_from_the_sidecar(sidecar_dir):
+    loads = []
+    load = statement_cache.cached_sheet(lambda file_path, sheet_name: loads.append(sheet_name) or _sheet())
+    path = _workbook(sidecar_dir)
+
+    load(path, "Balance")
+    statement_cache.clear_statement_cache()
+    df = load(path, "Balance")
+
+    assert loads == ["Balance"]
+    assert df.columns.tolist() == _sheet().columns.tolist()
+    assert df["item"].tolist() == ["总资产", "总负债"]
+    assert df[pd.Timestamp("2024-12-31")].iloc[0] == 10.0
+    assert pd.isna(df[pd.Timestamp("2024-12-31")].iloc[1]) and pd.isna(df["备注"].iloc[1])
+
+
+def test_unreadable_sidecars_are_parsed_again(sidecar_dir):
+    loads = []
+    load = statement_cache.cached_sheet(lambda file_path, sheet_name: loads.append(sheet_name) or _sheet())
+    path = _workbook(sidecar_dir)
+    load(path, "Balance")
+    statement_cache.clear_statement_cache()
+
+    # A sidecar for this workbook version whose data is not a frame
+    for sidecar in (sidecar_dir / "hk_statements").iterdir():
+        sidecar.write_text(json.dumps({**json.loads(sidecar.read_text(encoding="utf-8")), "values": 3}), encoding="utf-8")
+    load(path, "Balance")
+
+    assert loads == ["Balance", "Balance"]